@@ -0,0 +1,196 @@
+"""pyfitel のベンチマーク。
+
+FITELnetSimulator を相手に、クライアントのオーバーヘッド、スループット、
+commands_wait のレイテンシー分布、大きな構成定義・出力のピークメモリーを計測し、
+結果をJSONで出力する。
+
+    python benchmarks/bench.py --output result.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from pyfitel import BackoffPoll, FITELnetAPI, FITELnetFleet, FITELnetSimulator, FixedPoll
+
+
+def _summary(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    quantiles = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": quantiles[49] * 1000,
+        "p90_ms": quantiles[89] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def _timed(func: Callable[[], object], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _serve(conn, kwargs: dict) -> None:
+    with FITELnetSimulator(**kwargs) as sim:
+        conn.send(sim.port)
+        conn.recv()
+
+
+@contextmanager
+def _remote_api(**kwargs) -> Iterator[FITELnetAPI]:
+    """別プロセスで FITELnetSimulator を起動し、接続する FITELnetAPI を返す。
+
+    メモリー計測にサーバー側の確保分が含まれないようにするために使用する。
+    """
+    conn, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, kwargs), daemon=True)
+    process.start()
+    try:
+        with FITELnetAPI("127.0.0.1", conn.recv(), "user", "password", tls=False) as api:
+            yield api
+    finally:
+        conn.send(None)
+        process.join()
+
+
+def bench_command(iterations: int) -> dict:
+    """1台に対する command() の1回あたりの所要時間と秒間リクエスト数。"""
+    with FITELnetSimulator(outputs={"show version": "F70 Version 01.16(01)\n"}) as sim, sim.api() as api:
+        api.command("show version")
+        samples = _timed(lambda: api.command("show version"), iterations)
+    return {**_summary(samples), "requests_per_sec": len(samples) / sum(samples)}
+
+
+def bench_fleet(devices: int, iterations: int, latency: float) -> dict:
+    """複数台に対する FITELnetFleet.command() の秒間リクエスト数。"""
+    sims = [FITELnetSimulator(latency=latency, output_size=256).start() for _ in range(devices)]
+    try:
+        inventory = {f"sim{i}": sim.api() for i, sim in enumerate(sims)}
+        with FITELnetFleet(inventory, max_workers=devices) as fleet:
+            fleet.command("show version")
+            start = time.perf_counter()
+            for _ in range(iterations):
+                results = fleet.command("show version")
+                assert all(result.ok for result in results.values())
+            elapsed = time.perf_counter() - start
+    finally:
+        for sim in sims:
+            sim.stop()
+    return {
+        "devices": devices,
+        "latency_ms": latency * 1000,
+        "requests": devices * iterations,
+        "requests_per_sec": devices * iterations / elapsed,
+    }
+
+
+def bench_commands_wait(iterations: int, processing_delay: float) -> dict:
+    """commands_wait() の実行から結果取得までのレイテンシー分布をポーリングポリシーごとに計測する。"""
+    policies = {
+        "fixed": FixedPoll(),
+        "backoff": BackoffPoll(),
+    }
+    results = {}
+    with FITELnetSimulator(processing_delay=processing_delay, output_size=256) as sim, sim.api() as api:
+        for name, poll in policies.items():
+            samples = _timed(
+                lambda poll=poll: api.commands_wait(["show version", "show ip route"], poll=poll), iterations
+            )
+            results[name] = _summary(samples)
+    return {"processing_delay_ms": processing_delay * 1000, **results}
+
+
+def bench_config_memory(size: int) -> dict:
+    """大きな構成定義を送信するときのピークメモリー(bytesで渡した場合とファイルパスで渡した場合)。"""
+    line = "ip access-list extended ACL permit ip 10.0.0.0 0.255.255.255 any\n"
+    with _remote_api() as api, tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "config.txt"
+        with open(path, "w") as f:
+            f.writelines(line for _ in range(size // len(line)))
+        return {
+            "config_bytes": path.stat().st_size,
+            "bytes_peak": _peak_memory(lambda: api.config(path.read_bytes(), commit=False)),
+            "path_peak": _peak_memory(lambda: api.config(path, commit=False)),
+        }
+
+
+def bench_output_memory(size: int) -> dict:
+    """大きなコマンド出力を受信するときのピークメモリー(command と command_lines)。"""
+    with _remote_api(output_size=size) as api:
+
+        def consume_lines() -> None:
+            for _ in api.command_lines("show logging"):
+                pass
+
+        return {
+            "output_bytes": size,
+            "command_peak": _peak_memory(lambda: api.command("show logging")),
+            "command_lines_peak": _peak_memory(consume_lines),
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", "-o", help="結果を書き込むJSONファイル。省略時は標準出力")
+    parser.add_argument("--iterations", type=int, default=200, help="1台に対する計測回数")
+    parser.add_argument("--devices", type=int, default=20, help="複数台計測の台数")
+    parser.add_argument("--latency", type=float, default=0.005, help="複数台計測の模擬応答遅延(秒)")
+    parser.add_argument("--processing-delay", type=float, default=0.05, help="commands_wait の模擬処理時間(秒)")
+    parser.add_argument("--size", type=int, default=16 * 1024 * 1024, help="構成定義・出力のバイト数")
+    args = parser.parse_args(argv)
+
+    try:
+        pyfitel_version = version("pyfitel")
+    except PackageNotFoundError:
+        pyfitel_version = "unknown"
+
+    result = {
+        "pyfitel": pyfitel_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "benchmarks": {
+            "command": bench_command(args.iterations),
+            "fleet": bench_fleet(args.devices, max(1, args.iterations // 20), args.latency),
+            "commands_wait": bench_commands_wait(max(1, args.iterations // 10), args.processing_delay),
+            "config_memory": bench_config_memory(args.size),
+            "output_memory": bench_output_memory(args.size),
+        },
+    }
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
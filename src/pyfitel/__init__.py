@@ -1,28 +1,217 @@
-from .cli import (
-    delete_commands_result,
-    delete_commands_result_all,
-    exec_command,
-    exec_commands,
-    get_clis_id_all,
-    get_commands_result,
-)
-from .config import replace_config, update_config
-from .core import FITELnetAPIError
-from .fitel import CLI, FITELnetAPI
-from .token import delete_token, publish_token
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .aio import AsyncFITELnetAPI
+    from .cache import ResponseCache
+    from .checkpoint import Checkpoint, DeviceProgress, ResumableJob
+    from .cli import (
+        delete_commands_result,
+        delete_commands_result_all,
+        exec_command,
+        exec_command_lines,
+        exec_command_to,
+        exec_commands,
+        get_clis_id_all,
+        get_commands_result,
+    )
+    from .columnar import ColumnTable, arp_table, interface_table, neighbor_table, route_table
+    from .config import replace_config, update_config
+    from .core import (
+        FITELnetAPIError,
+        SessionPool,
+        close_session,
+        configure_pool,
+        configure_rate_limit,
+        configure_retry,
+        configure_timeout,
+        deadline_scope,
+    )
+    from .diff import diff_config, parse_config
+    from .fitel import CLI, FITELnetAPI
+    from .fleet import FITELnetFleet, FleetResult
+    from .inventory import Device, load_inventory
+    from .jobs import JobManager
+    from .metrics import (
+        DeviceCounters,
+        LatencyHistogram,
+        OpenTelemetryExporter,
+        PollEvent,
+        RequestEvent,
+        add_hook,
+        remove_hook,
+    )
+    from .parsers import ArpEntry, InterfaceStatus, NeighborEntry, ParserRegistry, Route, parse_output, register_parser
+    from .poll import BackoffPoll, FixedPoll, PollPolicy
+    from .ratelimit import RateLimiter, TokenBucket, subnet_group
+    from .results import CommandResult, CommandsResult
+    from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+    from .rollout import ConfigRollout, HealthCheckError, RolloutAbortedError, RolloutResult
+    from .simulator import FITELnetSimulator
+    from .snapshot import FetchResult, Snapshot, SnapshotStore
+    from .token import delete_token, publish_token
+
+# 属性名と定義しているサブモジュールの対応。import pyfitel の時点では requests, httpx, numpy などを
+# 読み込まず、属性に初めてアクセスしたときにサブモジュールを読み込む (PEP 562)。
+_LAZY_ATTRIBUTES = {
+    "AsyncFITELnetAPI": "aio",
+    "ResponseCache": "cache",
+    "Checkpoint": "checkpoint",
+    "DeviceProgress": "checkpoint",
+    "ResumableJob": "checkpoint",
+    "delete_commands_result": "cli",
+    "delete_commands_result_all": "cli",
+    "exec_command": "cli",
+    "exec_command_lines": "cli",
+    "exec_command_to": "cli",
+    "exec_commands": "cli",
+    "get_clis_id_all": "cli",
+    "get_commands_result": "cli",
+    "ColumnTable": "columnar",
+    "arp_table": "columnar",
+    "interface_table": "columnar",
+    "neighbor_table": "columnar",
+    "route_table": "columnar",
+    "replace_config": "config",
+    "update_config": "config",
+    "FITELnetAPIError": "core",
+    "SessionPool": "core",
+    "close_session": "core",
+    "configure_pool": "core",
+    "configure_rate_limit": "core",
+    "configure_retry": "core",
+    "configure_timeout": "core",
+    "deadline_scope": "core",
+    "diff_config": "diff",
+    "parse_config": "diff",
+    "CLI": "fitel",
+    "FITELnetAPI": "fitel",
+    "FITELnetFleet": "fleet",
+    "FleetResult": "fleet",
+    "Device": "inventory",
+    "load_inventory": "inventory",
+    "JobManager": "jobs",
+    "DeviceCounters": "metrics",
+    "LatencyHistogram": "metrics",
+    "OpenTelemetryExporter": "metrics",
+    "PollEvent": "metrics",
+    "RequestEvent": "metrics",
+    "add_hook": "metrics",
+    "remove_hook": "metrics",
+    "ArpEntry": "parsers",
+    "InterfaceStatus": "parsers",
+    "NeighborEntry": "parsers",
+    "ParserRegistry": "parsers",
+    "Route": "parsers",
+    "parse_output": "parsers",
+    "register_parser": "parsers",
+    "BackoffPoll": "poll",
+    "FixedPoll": "poll",
+    "PollPolicy": "poll",
+    "RateLimiter": "ratelimit",
+    "TokenBucket": "ratelimit",
+    "subnet_group": "ratelimit",
+    "CommandResult": "results",
+    "CommandsResult": "results",
+    "CircuitBreaker": "retry",
+    "CircuitOpenError": "retry",
+    "RetryPolicy": "retry",
+    "ConfigRollout": "rollout",
+    "HealthCheckError": "rollout",
+    "RolloutAbortedError": "rollout",
+    "RolloutResult": "rollout",
+    "FITELnetSimulator": "simulator",
+    "FetchResult": "snapshot",
+    "Snapshot": "snapshot",
+    "SnapshotStore": "snapshot",
+    "delete_token": "token",
+    "publish_token": "token",
+}
 
 __all__ = [
+    "AsyncFITELnetAPI",
     "delete_commands_result",
     "delete_commands_result_all",
     "exec_command",
+    "exec_command_lines",
+    "exec_command_to",
     "exec_commands",
     "get_clis_id_all",
     "get_commands_result",
     "replace_config",
     "update_config",
     "FITELnetAPIError",
+    "ResponseCache",
+    "SessionPool",
+    "close_session",
+    "configure_pool",
+    "configure_rate_limit",
+    "configure_retry",
+    "configure_timeout",
+    "deadline_scope",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "RateLimiter",
+    "TokenBucket",
+    "subnet_group",
+    "DeviceCounters",
+    "LatencyHistogram",
+    "OpenTelemetryExporter",
+    "PollEvent",
+    "RequestEvent",
+    "add_hook",
+    "remove_hook",
+    "diff_config",
+    "parse_config",
     "CLI",
+    "CommandResult",
+    "CommandsResult",
     "FITELnetAPI",
+    "FITELnetFleet",
+    "JobManager",
+    "Checkpoint",
+    "DeviceProgress",
+    "ResumableJob",
+    "Device",
+    "load_inventory",
+    "FleetResult",
+    "ConfigRollout",
+    "HealthCheckError",
+    "RolloutAbortedError",
+    "RolloutResult",
+    "FITELnetSimulator",
+    "FetchResult",
+    "Snapshot",
+    "SnapshotStore",
+    "BackoffPoll",
+    "FixedPoll",
+    "PollPolicy",
+    "ArpEntry",
+    "ColumnTable",
+    "arp_table",
+    "interface_table",
+    "neighbor_table",
+    "route_table",
+    "InterfaceStatus",
+    "NeighborEntry",
+    "ParserRegistry",
+    "Route",
+    "parse_output",
+    "register_parser",
     "delete_token",
     "publish_token",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
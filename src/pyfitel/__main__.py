@@ -0,0 +1,167 @@
+"""pyfitel コマンド
+
+インベントリファイルの全ての機器に対して、運用管理コマンドの実行、複数コマンドの実行、構成定義の変更を
+並列に実行し、完了した機器から順に結果を JSON Lines で出力する。
+
+    pyfitel command inventory.csv "show version"
+    pyfitel commands-wait inventory.yaml "show ip route" "show arp" --parallel 64 --poll-timeout 600
+    pyfitel config inventory.json change.txt --output-dir results/
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO, Any
+
+from .fitel import FITELnetAPI
+from .fleet import FITELnetFleet, FleetResult
+from .inventory import load_inventory
+from .poll import BackoffPoll
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more: {value}")
+    return number
+
+
+def _positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: {value!r}") from None
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pyfitel", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inventory", type=Path, help="インベントリファイル (.csv, .json, .yaml)")
+    common.add_argument("-j", "--parallel", type=_positive_int, default=16, help="同時に処理する機器数 (既定: 16)")
+    common.add_argument("--max-per-host", type=_positive_int, default=1, help="1ホストあたりの同時実行数 (既定: 1)")
+    common.add_argument("--timeout", type=_positive_float, default=None, help="1台あたりのタイムアウト秒数")
+    common.add_argument("--user", default=None, help="インベントリで指定していない機器のユーザー名")
+    common.add_argument(
+        "--password-env",
+        default="PYFITEL_PASSWORD",
+        help="インベントリで指定していない機器のパスワードを格納した環境変数 (既定: PYFITEL_PASSWORD)",
+    )
+    common.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="機器ごとの結果を <機器名>.json に書き込む。ファイル名が重複する場合は連番を付ける",
+    )
+
+    commands = parser.add_subparsers(dest="action", required=True)
+    command = commands.add_parser("command", parents=[common], help="運用管理コマンドを実行する")
+    command.add_argument("cmd", help="実行するコマンド")
+    commands_wait = commands.add_parser(
+        "commands-wait", parents=[common], help="複数のCLIコマンドを実行し、完了まで待機する"
+    )
+    commands_wait.add_argument("cmds", nargs="+", help="実行するコマンド")
+    commands_wait.add_argument(
+        "--poll-timeout",
+        type=_positive_float,
+        default=300.0,
+        help="コマンドの完了を待つ秒数 (既定: 300)。--timeout を指定した場合はその秒数でも打ち切る",
+    )
+    commands_wait.add_argument(
+        "--poll-interval", type=_positive_float, default=2.0, help="実行結果を確認する間隔の上限秒数 (既定: 2)"
+    )
+    config = commands.add_parser("config", parents=[common], help="構成定義を変更する")
+    config.add_argument("config", type=Path, help="構成定義ファイル")
+    config.add_argument("--no-commit", dest="commit", action="store_false", help="commit を実行しない")
+    return parser
+
+
+def _operation(args: argparse.Namespace) -> Callable[[FITELnetAPI], Any]:
+    if args.action == "command":
+        return lambda api: api.command(args.cmd)
+    if args.action == "commands-wait":
+        poll = BackoffPoll(max_interval=args.poll_interval, timeout=args.poll_timeout)
+        return lambda api: api.commands_wait(args.cmds, poll=poll)
+    return lambda api: api.config(args.config, commit=args.commit)
+
+
+def _record(name: str, api: FITELnetAPI, result: FleetResult) -> dict:
+    return {
+        "device": name,
+        "host": api.host,
+        "ok": result.ok,
+        "elapsed": round(result.elapsed, 3),
+        "result": result.value,
+        "error": None if result.ok else f"{type(result.error).__name__}: {result.error}",
+    }
+
+
+def _output_files(output_dir: Path, names: list[str]) -> dict[str, Path]:
+    # 置換後に同じ名前になる機器や大文字・小文字だけが異なる機器は、連番を付けて別のファイルにする
+    files: dict[str, Path] = {}
+    used: set[str] = set()
+    for name in names:
+        stem = re.sub(r"[^\w.-]", "_", name)
+        candidate, n = stem, 1
+        while candidate.casefold() in used:
+            n += 1
+            candidate = f"{stem}-{n}"
+        used.add(candidate.casefold())
+        files[name] = output_dir / f"{candidate}.json"
+    return files
+
+
+def _write_device(path: Path, record: dict) -> None:
+    path.write_text(json.dumps(record, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def main(argv: list[str] | None = None, out: IO[str] | None = None) -> int:
+    """pyfitel コマンドのエントリーポイント。
+
+    Args:
+        argv (list[str] | None, optional): コマンドライン引数。Noneの場合は sys.argv
+        out (IO[str] | None, optional): JSON Lines の出力先。Noneの場合は標準出力
+
+    Returns:
+        int: 全ての機器で成功した場合は0、失敗した機器がある場合は1、引数やインベントリが不正な場合は2
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    stream: IO[str] = out or sys.stdout
+    try:
+        devices = load_inventory(args.inventory, user=args.user, password=os.environ.get(args.password_env))
+    except (OSError, ValueError, ImportError) as e:
+        parser.error(str(e))
+    files: dict[str, Path] = {}
+    if args.output_dir is not None:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        files = _output_files(args.output_dir, list(devices))
+
+    apis = {name: device.api() for name, device in devices.items()}
+    failed = 0
+    with FITELnetFleet(apis, max_workers=args.parallel, max_per_host=args.max_per_host) as fleet:
+        for name, result in fleet.iter_run(_operation(args), timeout=args.timeout):
+            record = _record(name, apis[name], result)
+            failed += not result.ok
+            if name in files:
+                _write_device(files[name], record)
+                del record["result"]
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,436 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import TYPE_CHECKING, Self
+from urllib.parse import urljoin
+
+from . import metrics
+from .cache import invalidate, is_commit
+from .config import ConfigSource, config_body, is_replayable_source
+from .core import (
+    FITELnetAPIError,
+    RequestRetry,
+    Timeout,
+    can_wait,
+    check_response,
+    cleanup_scope,
+    deadline_scope,
+    device_key,
+    is_replayable,
+    request_timeout,
+)
+from .diff import diff_config
+from .fitel import (
+    CLEANUP_TIMEOUT,
+    CLI,
+    MAX_COMMANDS,
+    has_exit_on_fail,
+    is_aborted,
+    merge_results,
+    split_clis,
+    to_cli_dicts,
+)
+from .poll import FixedPoll, PollPolicy
+from .results import CommandsResult
+from .retry import CircuitOpenError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+if TYPE_CHECKING:
+    from httpx import Response
+
+
+def _async_body(body: bytes | Iterator[bytes]) -> bytes | AsyncIterator[bytes]:
+    if isinstance(body, bytes):
+        return body
+
+    # ファイルの読み込みでイベントループを止めないよう、チャンクは別スレッドで読み出す
+    async def stream() -> AsyncIterator[bytes]:
+        while (chunk := await asyncio.to_thread(next, body, None)) is not None:
+            yield chunk
+
+    return stream()
+
+
+def _response_time(res: "Response | None") -> float | None:
+    try:
+        return res.elapsed.total_seconds() if res is not None else None
+    except RuntimeError:
+        return None
+
+
+class _CountingAsyncBody:
+    """チャンク転送するリクエストボディの送信バイト数を数える非同期イテラブル。"""
+
+    def __init__(self, body: AsyncIterator[bytes]) -> None:
+        self._body = body
+        self.size = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._body:
+            self.size += len(chunk)
+            yield chunk
+
+
+class AsyncFITELnetAPI:
+    """asyncio 用の FITELnetAPI クライアント。
+
+    HTTP通信には httpx.AsyncClient を使用し、機器ごとにコネクションプールを保持する。
+    利用するには `pip install pyfitel[async]` で httpx をインストールする必要がある。
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        tls: bool,
+        use_token: bool = False,
+        max_connections: int = 4,
+        idle_timeout: float = 60.0,
+        timeout: Timeout = None,
+    ) -> None:
+        """
+        Args:
+            host (str): 機器のIPアドレスまたはFQDN
+            port (int): ポート番号
+            user (str): ユーザー名
+            password (str): パスワード
+            tls (bool): httpsの場合はTrue,httpの場合はFalse
+            use_token (bool, optional): Trueの場合はアクセストークンを発行してBearer認証を使用する
+            max_connections (int, optional): 保持する最大コネクション数
+            idle_timeout (float, optional): 未使用のコネクションを切断するまでの秒数
+            timeout (Timeout, optional): 秒数または(接続, 読み込み)の秒数。Noneの場合は既定値
+        """
+        if httpx is None:
+            raise ImportError("httpx is required for AsyncFITELnetAPI. Install it with `pip install pyfitel[async]`.")
+
+        self._host = host
+        self._url = f"{'https' if tls else 'http'}://{host}:{port}/"
+        self._user = user
+        self._password = password
+        self._bearer = use_token
+        self._token: str | None = None
+        self._token_lock = asyncio.Lock()
+        self._timeout = timeout
+        self._client = httpx.AsyncClient(
+            verify=False,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=idle_timeout,
+            ),
+        )
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """発行済みのアクセストークンを削除し、機器とのHTTPセッションを切断する。"""
+        token, self._token = self._token, None
+        try:
+            if token is not None:
+                await self._send("DELETE", f"/api/v1/token/{token}", headers={"Authorization": f"Bearer {token}"})
+        finally:
+            await self._client.aclose()
+
+    async def _send(self, method: str, endpoint: str, **kwargs) -> "Response":
+        device = device_key(self._url)
+        if not metrics.has_hooks():
+            res = await self._send_retry(
+                endpoint, kwargs, RequestRetry(device, method, is_replayable(kwargs.get("content")))
+            )
+            check_response(res)
+            return res
+
+        body = None
+        if not is_replayable(kwargs.get("content")):
+            body = kwargs["content"] = _CountingAsyncBody(kwargs["content"])
+        retry = RequestRetry(device, method, body is None)
+        res = None
+        error = None
+        try:
+            res = await self._send_retry(endpoint, kwargs, retry)
+            check_response(res)
+            return res
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            metrics.emit(
+                retry.event(
+                    endpoint,
+                    status=res.status_code if res is not None else None,
+                    bytes_sent=body.size if body is not None else len(res.request.content) if res is not None else None,
+                    bytes_received=len(res.content) if res is not None else None,
+                    response_time=_response_time(res),
+                    error=error,
+                )
+            )
+
+    async def _send_retry(self, endpoint: str, kwargs: dict, retry: RequestRetry) -> "Response":
+        assert httpx is not None
+        retry.begin()
+        try:
+            while True:
+                delay = retry.throttle()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                connect, read = request_timeout(self._timeout)
+                timeout = httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+                try:
+                    res = await self._client.request(
+                        retry.method, urljoin(self._url, endpoint), timeout=timeout, **kwargs
+                    )
+                except (httpx.TransportError, httpx.TimeoutException):
+                    delay = retry.retry_on_error()
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+                delay = retry.retry_on_response(res.status_code, res.headers.get("Retry-After"))
+                if delay is None:
+                    return res
+                await res.aclose()
+                await asyncio.sleep(delay)
+        except BaseException:
+            retry.abort()
+            raise
+
+    async def _get_token(self, expired: str | None = None) -> str:
+        async with self._token_lock:
+            token = self._token
+            if token is None or token == expired:
+                res = await self._send("POST", "/api/v1/token", auth=(self._user, self._password))
+                token = self._token = res.json()["access_token"]
+            return token
+
+    async def _request(
+        self, method: str, endpoint: str, json: dict | None = None, content: bytes | AsyncIterator[bytes] | None = None
+    ) -> "Response":
+        kwargs: dict = {}
+        if json is not None:
+            kwargs["json"] = json
+        if content is not None:
+            kwargs["content"] = content
+            kwargs["headers"] = {"Content-Type": "multipart/form-data"}
+        if not self._bearer:
+            return await self._send(method, endpoint, auth=(self._user, self._password), **kwargs)
+
+        token = await self._get_token()
+        headers = {**kwargs.pop("headers", {}), "Authorization": f"Bearer {token}"}
+        try:
+            return await self._send(method, endpoint, headers=headers, **kwargs)
+        except FITELnetAPIError as e:
+            if e.http_code != 401:
+                raise
+            headers["Authorization"] = f"Bearer {await self._get_token(expired=token)}"
+            # 消費済みのチャンク転送のボディは再送できないため、トークンだけ更新して例外を送出する
+            if not is_replayable(content):
+                raise
+        return await self._send(method, endpoint, headers=headers, **kwargs)
+
+    async def command(self, cmd: str) -> str:
+        """運用管理コマンドを実行する。
+
+        Args:
+            cmd (str): 実行するコマンド
+
+        Returns:
+            str: コマンド実行結果
+        """
+        res = await self._request("POST", "/api/v1/cli", json={"cmd": cmd})
+        if is_commit(cmd):
+            invalidate(self._url)
+        return res.text
+
+    async def commands_wait(
+        self,
+        cmd_list: list[CLI] | list[str] | list[str | CLI],
+        wait: float = 0.5,
+        retries: int = 5,
+        interval: float = 1.0,
+        delete: bool = True,
+        poll: PollPolicy | None = None,
+        deadline: float | None = None,
+    ) -> dict:
+        """複数のCLI運用コマンドを実行し、完了まで待機する。
+
+        コマンドが10個を超える場合の動作は FITELnetAPI.commands_wait と同じ。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            wait (float, optional): CLI実行後の初回待機秒数
+            retries (int, optional): リトライ回数
+            interval (float, optional): リトライ間隔(秒)
+            delete (bool, optional): コマンド実行結果取得後に実行結果を機器から削除するかどうか
+            poll (PollPolicy | None, optional): ポーリングポリシー。指定した場合は wait, retries, interval を無視する
+            deadline (float | None, optional): 実行・ポーリング・削除全体の期限(秒)
+
+        Raises:
+            ValueError: retries must be 0 or more
+            TimeoutError: Command execution did not complete within the specified retries or deadline.
+
+        Returns:
+            dict: CLIコマンド実行結果
+        """
+        with deadline_scope(deadline):
+            return await self._commands_wait(
+                cmd_list, poll or FixedPoll(wait=wait, retries=retries, interval=interval), delete
+            )
+
+    async def commands_wait_compact(
+        self, cmd_list: list[CLI] | list[str] | list[str | CLI], **kwargs
+    ) -> CommandsResult:
+        """commands_wait と同じ処理を行い、実行結果を CommandsResult で返す。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            **kwargs: commands_wait に渡す引数
+
+        Returns:
+            CommandsResult: CLIコマンド実行結果
+        """
+        return CommandsResult.from_dict(await self.commands_wait(cmd_list, **kwargs))
+
+    async def _commands_wait(
+        self, cmd_list: list[CLI] | list[str] | list[str | CLI], poll: PollPolicy, delete: bool
+    ) -> dict:
+        clis = to_cli_dicts(cmd_list)
+        if len(clis) == 0:
+            raise ValueError("At least one command must be provided.")
+
+        pending_chunks = iter(split_clis(clis))
+        submitted: list[tuple[str, list[dict]]] = []
+
+        async def submit() -> None:
+            chunk = next(pending_chunks, None)
+            if chunk is not None:
+                res = await self._request("POST", "/api/v1/clis", json={"list": chunk, "total": len(chunk)})
+                submitted.append((res.json()["clis_id"], chunk))
+
+        results = []
+        await submit()
+        try:
+            while submitted:
+                clis_id, chunk = submitted[0]
+                if len(submitted) == 1 and not has_exit_on_fail(chunk):
+                    await submit()
+                res = await self._wait_result(clis_id, [cli["cmd"] for cli in chunk], poll, delete)
+                submitted.pop(0)
+                results.append(res)
+                if is_aborted(res):
+                    break
+                if not submitted:
+                    await submit()
+        except BaseException as e:
+            # 待機中のチャンクと先行して送信したチャンクが機器に残らないようにする
+            await self._discard_jobs(e, [clis_id for clis_id, _ in submitted], delete)
+            raise
+        if len(clis) <= MAX_COMMANDS:
+            return results[0]
+        return merge_results(results, total=len(clis))
+
+    async def _discard_jobs(self, error: BaseException, clis_ids: list[str], delete: bool) -> None:
+        """FITELnetAPI._discard_jobs と同じく、失敗したcommands_waitが機器に残したジョブを削除する。
+
+        Args:
+            error (BaseException): commands_wait が送出する例外
+            clis_ids (list[str]): 機器に残っているジョブのCLIコマンドID
+            delete (bool): ジョブを削除するかどうか
+        """
+        assert httpx is not None
+        left = clis_ids
+        if delete:
+            left = []
+            with cleanup_scope(CLEANUP_TIMEOUT):
+                for clis_id in clis_ids:
+                    try:
+                        await self._request("DELETE", f"/api/v1/clis/{clis_id}")
+                    except (FITELnetAPIError, CircuitOpenError, TimeoutError, httpx.HTTPError):
+                        left.append(clis_id)
+        if left:
+            error.add_note(f"Jobs left on the device: clis_id={', '.join(map(str, left))}")
+
+    async def _wait_result(self, clis_id: str, cmds: list[str], poll: PollPolicy, delete: bool) -> dict:
+        polls = 0
+        status = None
+        start = time.perf_counter()
+        try:
+            for delay in poll.delays(cmds):
+                if not can_wait(delay):
+                    raise TimeoutError("Deadline exceeded.")
+                await asyncio.sleep(delay)
+                result = (await self._request("GET", f"/api/v1/clis/{clis_id}")).json()
+                polls += 1
+                if result["status"] != "Processing":
+                    status = result["status"]
+                    if delete:
+                        await self._request("DELETE", f"/api/v1/clis/{clis_id}")
+                    return result
+            raise TimeoutError("Command execution did not complete within the specified retries.")
+        finally:
+            if metrics.has_hooks():
+                metrics.emit(
+                    metrics.PollEvent(device_key(self._url), str(clis_id), polls, time.perf_counter() - start, status)
+                )
+
+    async def config(self, config: ConfigSource, commit: bool = True, deadline: float | None = None) -> None:
+        """構成定義を変更する
+
+        Args:
+            config (ConfigSource): 構成定義。bytes, str, ファイルパス, ファイルオブジェクト, 行のイテラブル
+            commit (bool, optional): 構成定義適用後にcommitを実行するかどうか. デフォルトはTrue
+            deadline (float | None, optional): 構成定義の適用とcommit全体の期限(秒)
+
+        Raises:
+            FITELnetAPIError: use_token=True でアクセストークンが失効していた場合、ファイルオブジェクトや
+                イテレーターの構成定義は再送できないため、トークンを更新してHTTP 401のエラーを送出する
+        """
+        with deadline_scope(deadline):
+            try:
+                try:
+                    await self._request("PATCH", "/api/v1/config", content=_async_body(config_body(config)))
+                except FITELnetAPIError as e:
+                    # トークンの失効で送信できなかった場合、再送できる構成定義だけを送り直す
+                    if not self._bearer or e.http_code != 401 or not is_replayable_source(config):
+                        raise
+                    await self._request("PATCH", "/api/v1/config", content=_async_body(config_body(config)))
+            finally:
+                invalidate(self._url)
+            if commit:
+                await self.command("commit")
+
+    async def sync_config(self, config: str, commit: bool = True, deadline: float | None = None) -> str:
+        """現在の構成定義との差分だけを送信して、構成定義を目的の状態にする。
+
+        動作は FITELnetAPI.sync_config と同じ。
+
+        Args:
+            config (str): 目的の構成定義の全体
+            commit (bool, optional): 差分適用後にcommitを実行するかどうか
+            deadline (float | None, optional): 構成定義の取得・差分の適用・commit全体の期限(秒)
+
+        Returns:
+            str: 送信した差分。差分がない場合は空文字
+        """
+        with deadline_scope(deadline):
+            delta = diff_config(await self.command("show running-config"), config)
+            if delta:
+                await self.config(delta, commit=commit)
+        return delta
@@ -0,0 +1,140 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Protocol
+
+from .core import device_key
+
+
+class Invalidatable(Protocol):
+    def invalidate(self, url: str | None = None) -> None: ...
+
+
+_caches: "weakref.WeakSet[Invalidatable]" = weakref.WeakSet()
+
+
+def register(cache: Invalidatable) -> None:
+    """機器の構成定義が変更されたときに invalidate(url) を呼び出すキャッシュを登録する。
+
+    登録は弱参照で保持され、キャッシュが破棄されると自動的に解除される。
+
+    Args:
+        cache (Invalidatable): invalidate(url) メソッドを持つオブジェクト
+    """
+    _caches.add(cache)
+
+
+class ResponseCache:
+    """運用管理コマンドの実行結果を保持するLRUキャッシュ。
+
+    キャッシュ対象は ttls に前方一致するコマンドのみで、最も長く一致した前方一致文字列の
+    有効期限(秒)が適用される。同じ機器で構成定義の変更や commit が実行されると、その機器の
+    キャッシュは破棄される。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttls: Mapping[str, float] | None = None) -> None:
+        """
+        Args:
+            maxsize (int, optional): 保持する最大件数
+            ttls (Mapping[str, float] | None, optional): コマンドの前方一致文字列と有効期限(秒)の対応。
+                Noneの場合は show コマンドを10秒間キャッシュする
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be 1 or more")
+        self._maxsize = maxsize
+        self._ttls = dict(ttls) if ttls is not None else {"show": 10.0}
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        register(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(cmd: str) -> str:
+        return " ".join(cmd.split())
+
+    def ttl(self, cmd: str) -> float:
+        """コマンドの有効期限を返す。
+
+        Args:
+            cmd (str): コマンド
+        Returns:
+            float: 有効期限(秒)。キャッシュ対象外の場合は0。commit は ttls によらずキャッシュしない
+        """
+        if is_commit(cmd):
+            return 0.0
+        cmd = self._normalize(cmd)
+        matches = [prefix for prefix in self._ttls if cmd.startswith(prefix)]
+        if not matches:
+            return 0.0
+        return self._ttls[max(matches, key=len)]
+
+    def get(self, url: str, cmd: str) -> str | None:
+        """キャッシュされた実行結果を取得する。
+
+        Args:
+            url (str): API URL
+            cmd (str): コマンド
+        Returns:
+            str | None: 実行結果。キャッシュがないか有効期限切れの場合はNone
+        """
+        key = (device_key(url), self._normalize(cmd))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, url: str, cmd: str, result: str) -> None:
+        """実行結果をキャッシュに格納する。キャッシュ対象外のコマンドは格納しない。
+
+        Args:
+            url (str): API URL
+            cmd (str): コマンド
+            result (str): 実行結果
+        """
+        ttl = self.ttl(cmd)
+        if ttl <= 0:
+            return
+        key = (device_key(url), self._normalize(cmd))
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: str | None = None) -> None:
+        """キャッシュを破棄する。
+
+        Args:
+            url (str | None, optional): 破棄する機器のAPI URL。Noneの場合は全て破棄する
+        """
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                return
+            device = device_key(url)
+            for key in [key for key in self._entries if key[0] == device]:
+                del self._entries[key]
+
+
+def invalidate(url: str) -> None:
+    """登録された全てのキャッシュ(ResponseCache, SnapshotStore など)から機器のキャッシュを破棄する。
+
+    Args:
+        url (str): API URL
+    """
+    for cache in list(_caches):
+        cache.invalidate(url)
+
+
+def is_commit(cmd: str) -> bool:
+    """構成定義を確定させるコマンドかどうかを返す。"""
+    return cmd.split()[:1] == ["commit"]
@@ -0,0 +1,378 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Mapping
+from typing import NamedTuple, Self
+
+from .core import FITELnetAPIError
+from .fitel import CLI, FITELnetAPI, is_aborted, merge_results, split_clis, to_cli_dicts
+from .fleet import FITELnetFleet, FleetResult
+from .poll import BackoffPoll, PollPolicy
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+COMMITTED = "committed"
+DONE_STATES = frozenset({COMPLETED, COMMITTED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    job TEXT NOT NULL,
+    device TEXT NOT NULL,
+    state TEXT NOT NULL,
+    clis_ids TEXT NOT NULL,
+    results TEXT NOT NULL,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, device)
+);
+"""
+
+
+class DeviceProgress(NamedTuple):
+    """チェックポイントに記録された機器1台分の進捗。"""
+
+    device: str
+    state: str
+    clis_ids: tuple[str, ...]
+    results: tuple[dict, ...]
+    error: str | None
+    updated_at: float
+
+    @property
+    def done(self) -> bool:
+        return self.state in DONE_STATES
+
+
+class Checkpoint:
+    """ジョブの機器ごとの進捗を記録する SQLite のチェックポイント。
+
+    状態は pending (未実行), submitted (送信済み・未完了), completed (完了), committed (commit済み) の
+    いずれか。1つのファイルに複数のジョブを記録できる。
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        """
+        Args:
+            path (str | os.PathLike): SQLite データベースファイルのパス。存在しない場合は作成する
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """データベースを閉じる。"""
+        with self._lock:
+            self._conn.close()
+
+    def begin(self, job: str, digest: str) -> bool:
+        """ジョブを開始する。
+
+        Args:
+            job (str): ジョブ名
+            digest (str): ジョブの内容(コマンドや構成定義)のハッシュ値
+
+        Raises:
+            ValueError: 同じ名前のジョブが異なる内容で記録されている場合
+
+        Returns:
+            bool: 新しいジョブの場合はTrue、記録済みのジョブを再開する場合はFalse
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT digest FROM jobs WHERE job = ?", (job,)).fetchone()
+            if row is None:
+                self._conn.execute("INSERT INTO jobs VALUES (?, ?, ?)", (job, digest, time.time()))
+                return True
+        if row[0] != digest:
+            raise ValueError(f"job {job!r} was started with different commands or config")
+        return False
+
+    def get(self, job: str, device: str) -> DeviceProgress | None:
+        """機器の進捗を返す。
+
+        Args:
+            job (str): ジョブ名
+            device (str): 機器名
+        Returns:
+            DeviceProgress | None: 機器の進捗。記録がない場合はNone
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT device, state, clis_ids, results, error, updated_at FROM progress WHERE job = ? AND device = ?",
+                (job, device),
+            ).fetchone()
+        return None if row is None else _progress(row)
+
+    def progress(self, job: str) -> dict[str, DeviceProgress]:
+        """ジョブの全ての機器の進捗を返す。
+
+        Args:
+            job (str): ジョブ名
+        Returns:
+            dict[str, DeviceProgress]: 機器名ごとの進捗
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT device, state, clis_ids, results, error, updated_at FROM progress WHERE job = ? ORDER BY device",
+                (job,),
+            ).fetchall()
+        return {row[0]: _progress(row) for row in rows}
+
+    def update(
+        self,
+        job: str,
+        device: str,
+        state: str,
+        clis_ids: list[str] | tuple[str, ...] = (),
+        results: list[dict] | tuple[dict, ...] = (),
+        error: str | None = None,
+    ) -> None:
+        """機器の進捗を記録する。
+
+        Args:
+            job (str): ジョブ名
+            device (str): 機器名
+            state (str): 状態
+            clis_ids (list[str] | tuple[str, ...], optional): 送信済みのCLIコマンドID
+            results (list[dict] | tuple[dict, ...], optional): 回収済みのCLIコマンド実行結果
+            error (str | None, optional): 直前の実行で発生したエラー
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job, device, state, json.dumps(list(clis_ids)), json.dumps(list(results)), error, time.time()),
+            )
+
+    def set_error(self, job: str, device: str, error: str) -> None:
+        """状態を変えずに、機器の直前の実行で発生したエラーを記録する。"""
+        with self._lock, self._conn:
+            updated = self._conn.execute(
+                "UPDATE progress SET error = ?, updated_at = ? WHERE job = ? AND device = ?",
+                (error, time.time(), job, device),
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    "INSERT INTO progress VALUES (?, ?, ?, '[]', '[]', ?, ?)",
+                    (job, device, PENDING, error, time.time()),
+                )
+
+    def reset(self, job: str, device: str | None = None) -> None:
+        """進捗を削除する。
+
+        Args:
+            job (str): ジョブ名
+            device (str | None, optional): 機器名。Noneの場合はジョブ全体を削除する
+        """
+        with self._lock, self._conn:
+            if device is None:
+                self._conn.execute("DELETE FROM progress WHERE job = ?", (job,))
+                self._conn.execute("DELETE FROM jobs WHERE job = ?", (job,))
+            else:
+                self._conn.execute("DELETE FROM progress WHERE job = ? AND device = ?", (job, device))
+
+
+def _progress(row: tuple) -> DeviceProgress:
+    device, state, clis_ids, results, error, updated_at = row
+    return DeviceProgress(device, state, tuple(json.loads(clis_ids)), tuple(json.loads(results)), error, updated_at)
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def _config_bytes(config: bytes | str | list[str] | os.PathLike) -> bytes:
+    if isinstance(config, bytes):
+        return config
+    if isinstance(config, str):
+        return config.encode()
+    if isinstance(config, os.PathLike):
+        with open(config, "rb") as f:
+            return f.read()
+    if isinstance(config, list):
+        return "\n".join(line.rstrip("\r\n") for line in config).encode()
+    raise TypeError("config must be bytes, str, list[str] or os.PathLike")
+
+
+class ResumableJob:
+    """機器ごとの進捗をチェックポイントに記録しながら、複数の機器に並列に処理を実行する。
+
+    中断したジョブを同じジョブ名で再実行すると、完了済みの機器は実行せずに記録した結果を返し、
+    送信済みのCLIコマンドは再送信せずに get_commands_result で結果を回収する。
+    """
+
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        job: str,
+        devices: Mapping[str, FITELnetAPI],
+        max_workers: int = 32,
+        max_per_host: int = 1,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Args:
+            checkpoint (Checkpoint): 進捗を記録するチェックポイント
+            job (str): ジョブ名。再開する場合は中断したジョブと同じ名前を指定する
+            devices (Mapping[str, FITELnetAPI]): 機器名とFITELnetAPIの対応
+            max_workers (int, optional): 全体の最大同時実行数
+            max_per_host (int, optional): 1ホストあたりの最大同時実行数
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数。Noneの場合は無制限
+        """
+        self._checkpoint = checkpoint
+        self._job = job
+        self._devices = dict(devices)
+        self._max_workers = max_workers
+        self._max_per_host = max_per_host
+        self._timeout = timeout
+
+    @property
+    def job(self) -> str:
+        return self._job
+
+    def progress(self) -> dict[str, DeviceProgress]:
+        """機器ごとの進捗を返す。"""
+        return self._checkpoint.progress(self._job)
+
+    def _run[T](
+        self,
+        digest: str,
+        func: Callable[[str, FITELnetAPI, DeviceProgress | None], T],
+        done: Callable[[DeviceProgress], T],
+        timeout: float | None,
+    ) -> dict[str, FleetResult[T]]:
+        self._checkpoint.begin(self._job, digest)
+        progress = self._checkpoint.progress(self._job)
+        results: dict[str, FleetResult[T]] = {
+            name: FleetResult(value=done(progress[name]))
+            for name in self._devices
+            if name in progress and progress[name].done
+        }
+        remaining = {name: api for name, api in self._devices.items() if name not in results}
+
+        def run(name: str, api: FITELnetAPI) -> T:
+            try:
+                return func(name, api, progress.get(name))
+            except Exception as e:
+                self._checkpoint.set_error(self._job, name, f"{type(e).__name__}: {e}")
+                raise
+
+        if remaining:
+            fleet = FITELnetFleet(remaining, max_workers=self._max_workers, max_per_host=self._max_per_host)
+            results.update(fleet.run_named(run, timeout=self._timeout if timeout is None else timeout))
+        return {name: results[name] for name in self._devices}
+
+    def commands_wait(
+        self,
+        cmd_list: list[CLI] | list[str] | list[str | CLI],
+        poll: PollPolicy | None = None,
+        delete: bool = True,
+        timeout: float | None = None,
+    ) -> dict[str, FleetResult[dict]]:
+        """全ての機器で複数のCLI運用コマンドを実行し、完了まで待機する。
+
+        コマンドが10個を超える場合は10個ずつ順に実行する。CLIコマンドIDは送信直後に、
+        実行結果は回収直後に記録し、機器から削除するのは記録した後になる。
+        再開時に送信済みの実行結果が機器に残っていない場合(機器の再起動など)は、そのコマンド群を再実行する。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            poll (PollPolicy | None, optional): ポーリングポリシー。Noneの場合は BackoffPoll()
+            delete (bool, optional): 実行結果を記録した後に機器から削除するかどうか
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+
+        Raises:
+            ValueError: 同じジョブ名で異なるコマンドのジョブが記録されている場合
+
+        Returns:
+            dict[str, FleetResult[dict]]: 機器名ごとのCLIコマンド実行結果
+        """
+        clis = to_cli_dicts(cmd_list)
+        chunks = split_clis(clis)
+        submits = split_clis(list(cmd_list))
+        poll = poll or BackoffPoll()
+
+        def value(results: list[dict] | tuple[dict, ...]) -> dict:
+            return results[0] if len(chunks) == 1 else merge_results(list(results), total=len(clis))
+
+        def run(name: str, api: FITELnetAPI, progress: DeviceProgress | None) -> dict:
+            clis_ids = list(progress.clis_ids) if progress else []
+            results = list(progress.results) if progress else []
+            resumed = len(clis_ids)
+            while len(results) < len(chunks):
+                index = len(results)
+                chunk = chunks[index]
+                if index < len(clis_ids):
+                    clis_id = clis_ids[index]
+                else:
+                    clis_id = api.commands_submit(submits[index])
+                    clis_ids.append(clis_id)
+                    self._checkpoint.update(self._job, name, SUBMITTED, clis_ids, results)
+                try:
+                    res = api.commands_wait_result(clis_id, [cli["cmd"] for cli in chunk], poll, delete=False)
+                except FITELnetAPIError as e:
+                    if e.http_code != 404 or index >= resumed:
+                        raise
+                    del clis_ids[index:]
+                    resumed = index
+                    continue
+                results.append(res)
+                self._checkpoint.update(self._job, name, SUBMITTED, clis_ids, results)
+                if delete:
+                    api.commands_delete(clis_id)
+                if is_aborted(res):
+                    break
+            self._checkpoint.update(self._job, name, COMPLETED, clis_ids, results)
+            return value(results)
+
+        digest = _digest(b"commands_wait", json.dumps(clis, sort_keys=True).encode())
+        return self._run(digest, run, lambda progress: value(progress.results), timeout)
+
+    def config(
+        self, config: bytes | str | list[str] | os.PathLike, commit: bool = True, timeout: float | None = None
+    ) -> dict[str, FleetResult[None]]:
+        """全ての機器の構成定義を変更する。
+
+        構成定義の適用後と commit 後に進捗を記録する。再開時は、commit 済みの機器には何もしない。
+        適用済みで commit していない機器は、未commitの変更が機器の再起動などで失われている場合があるため、
+        構成定義を再度適用してから commit する。
+
+        Args:
+            config (bytes | str | list[str] | os.PathLike): 構成定義。再開時にも送信するため、ファイルオブジェクトやイテレーターは指定できない
+            commit (bool, optional): 構成定義適用後にcommitを実行するかどうか
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+
+        Raises:
+            ValueError: 同じジョブ名で異なる構成定義のジョブが記録されている場合
+
+        Returns:
+            dict[str, FleetResult[None]]: 機器名ごとの処理結果
+        """
+        data = _config_bytes(config)
+
+        def run(name: str, api: FITELnetAPI, progress: DeviceProgress | None) -> None:
+            api.config(data, commit=False)
+            self._checkpoint.update(self._job, name, SUBMITTED)
+            if commit:
+                api.commit()
+            self._checkpoint.update(self._job, name, COMMITTED if commit else COMPLETED)
+
+        digest = _digest(b"config", data, b"commit" if commit else b"")
+        return self._run(digest, run, lambda progress: None, timeout)
@@ -1,4 +1,30 @@
-from .core import auth, delete, get, post
+import codecs
+import os
+from collections.abc import Iterator
+from typing import IO
+
+import requests
+
+from .cache import invalidate, is_commit
+from .core import Timeout, auth, delete, get, post
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _iter_lines(res: requests.Response, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(res.encoding or "utf-8")(errors="replace")
+    pending = ""
+    try:
+        for chunk in res.iter_content(chunk_size):
+            lines = (pending + decoder.decode(chunk)).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line.removesuffix("\r")
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending.removesuffix("\r")
+    finally:
+        res.close()
 
 
 def exec_command(
@@ -8,6 +34,7 @@ def exec_command(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> str:
     """CLIの運用コマンドを実行する。
 
@@ -18,6 +45,7 @@ def exec_command(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         str: コマンド実行結果
     """
@@ -29,11 +57,101 @@ def exec_command(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
         data=data,
     )
+    if is_commit(cmd):
+        invalidate(url)
     return res.text
 
 
+def exec_command_lines(
+    url: str,
+    cmd: str,
+    user: str | None = None,
+    password: str | None = None,
+    bearer: bool = False,
+    token: str | None = None,
+    timeout: Timeout = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[str]:
+    """CLIの運用コマンドを実行し、実行結果を受信しながら1行ずつ返す。
+
+    リクエストは呼び出し時に送信される。返されたイテレーターを最後まで読むか
+    close() するまで、機器とのコネクションは解放されない。
+
+    Args:
+        url (str): API URL
+        cmd (str): 実行するコマンド
+        user (str | None): BASIC認証時のユーザー名
+        password (str | None): BASIC認証時のパスワード
+        bearer (bool): Bearer認証を使用する場合はTrue
+        token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
+        chunk_size (int): 1回に受信するバイト数
+    Returns:
+        Iterator[str]: 改行を除いたコマンド実行結果の各行
+    """
+
+    api = "/api/v1/cli"
+    data = {"cmd": cmd}
+
+    res = post(
+        base_url=url,
+        endpoint=api,
+        auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
+        data=data,
+        stream=True,
+    )
+    return _iter_lines(res, chunk_size)
+
+
+def exec_command_to(
+    url: str,
+    cmd: str,
+    out: IO[bytes] | os.PathLike,
+    user: str | None = None,
+    password: str | None = None,
+    bearer: bool = False,
+    token: str | None = None,
+    timeout: Timeout = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> int:
+    """CLIの運用コマンドを実行し、実行結果をデコードせずにファイルまたはバッファに書き込む。
+
+    Args:
+        url (str): API URL
+        cmd (str): 実行するコマンド
+        out (IO[bytes] | os.PathLike): 書き込み先のバイナリファイルオブジェクトまたはファイルパス
+        user (str | None): BASIC認証時のユーザー名
+        password (str | None): BASIC認証時のパスワード
+        bearer (bool): Bearer認証を使用する場合はTrue
+        token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
+        chunk_size (int): 1回に受信するバイト数
+    Returns:
+        int: 書き込んだバイト数
+    """
+
+    api = "/api/v1/cli"
+    data = {"cmd": cmd}
+
+    res = post(
+        base_url=url,
+        endpoint=api,
+        auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
+        data=data,
+        stream=True,
+    )
+    with res:
+        if isinstance(out, os.PathLike):
+            with open(out, "wb") as f:
+                return sum(f.write(chunk) for chunk in res.iter_content(chunk_size))
+        return sum(out.write(chunk) for chunk in res.iter_content(chunk_size))
+
+
 def exec_commands(
     url: str,
     cmd_list: list[dict],
@@ -41,6 +159,7 @@ def exec_commands(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> dict:
     """複数のCLI運用コマンドを実行する。
 
@@ -51,6 +170,7 @@ def exec_commands(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue、BASIC認証の場合はFalse
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         dict:
     """
@@ -66,8 +186,11 @@ def exec_commands(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
         data=data,
     )
+    if any(is_commit(cli["cmd"]) for cli in cmd_list):
+        invalidate(url)
     return res.json()
 
 
@@ -77,6 +200,7 @@ def get_clis_id_all(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> dict:
     """全てのCLIコマンドの複数実行のCLIコマンドIDを取得する。
 
@@ -86,6 +210,7 @@ def get_clis_id_all(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue、BASIC認証の場合はFalse
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         dict:
     """
@@ -96,6 +221,7 @@ def get_clis_id_all(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
     )
     return res.json()
 
@@ -106,6 +232,7 @@ def delete_commands_result_all(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> None:
     """全てのCLIコマンドの複数実行の結果を削除する。
 
@@ -115,6 +242,7 @@ def delete_commands_result_all(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue、BASIC認証の場合はFalse
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     """
 
     api = "/api/v1/clis"
@@ -122,6 +250,7 @@ def delete_commands_result_all(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
     )
 
 
@@ -132,6 +261,7 @@ def get_commands_result(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> dict:
     """指定したCLIコマンドIDの複数CLIコマンドの実行結果を取得する。
 
@@ -142,6 +272,7 @@ def get_commands_result(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue、BASIC認証の場合はFalse
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         dict:
     """
@@ -151,6 +282,7 @@ def get_commands_result(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
     )
     return res.json()
 
@@ -162,6 +294,7 @@ def delete_commands_result(
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> None:
     """指定したCLIコマンドIDの複数CLIコマンドの実行結果を削除する。
 
@@ -172,6 +305,7 @@ def delete_commands_result(
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue、BASIC認証の場合はFalse
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     """
 
     api = f"/api/v1/clis/{clis_id}"
@@ -179,4 +313,5 @@ def delete_commands_result(
         base_url=url,
         endpoint=api,
         auth=auth(bearer=bearer, user=user, password=password, token=token),
+        timeout=timeout,
     )
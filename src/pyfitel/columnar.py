@@ -0,0 +1,255 @@
+import socket
+from array import array
+from collections.abc import Iterable
+from typing import Any
+
+from .parsers import (
+    ArpEntry,
+    InterfaceStatus,
+    NeighborEntry,
+    ParserRegistry,
+    Route,
+    iter_arp,
+    iter_interfaces,
+    iter_neighbors,
+    iter_routes,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for columnar tables. Install it with `pip install pyfitel[numpy]`.")
+
+
+def pack_address(address: str) -> tuple[int, int, int]:
+    """IPアドレスを(アドレスファミリー, 上位64bit, 下位64bit)の整数に変換する。
+
+    IPv4アドレスは下位64bitに格納する。
+
+    Args:
+        address (str): IPv4またはIPv6アドレス
+    Returns:
+        tuple[int, int, int]: アドレスファミリー(4または6), 上位64bit, 下位64bit
+    """
+    if ":" in address:
+        packed = int.from_bytes(socket.inet_pton(socket.AF_INET6, address))
+        return 6, packed >> 64, packed & 0xFFFFFFFFFFFFFFFF
+    return 4, 0, int.from_bytes(socket.inet_aton(address))
+
+
+def unpack_address(family: int, hi: int, lo: int) -> str:
+    """pack_address で変換した整数をIPアドレスの文字列に戻す。"""
+    if family == 6:
+        return socket.inet_ntop(socket.AF_INET6, ((int(hi) << 64) | int(lo)).to_bytes(16))
+    return socket.inet_ntoa(int(lo).to_bytes(4))
+
+
+def pack_mac(mac: str) -> int:
+    """MACアドレスを48bitの整数に変換する。"""
+    return int(mac.replace(":", "").replace("-", "").replace(".", ""), 16)
+
+
+class _Categories:
+    def __init__(self) -> None:
+        self.codes = array("i")
+        self.values: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def append(self, value: str | None) -> None:
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class ColumnTable:
+    """列指向のテーブル。
+
+    各列は numpy.ndarray で保持する。文字列の列はカテゴリーのコード(int32, 欠損は-1)と
+    カテゴリー値のリストで保持する。
+    """
+
+    def __init__(self, columns: dict[str, Any], categories: dict[str, list[str]] | None = None) -> None:
+        """
+        Args:
+            columns (dict[str, numpy.ndarray]): 列名と値の配列
+            categories (dict[str, list[str]] | None): カテゴリー列の列名とカテゴリー値のリスト
+        """
+        self.columns = columns
+        self.categories = categories or {}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def decode(self, name: str) -> list[str | None]:
+        """カテゴリー列を文字列のリストに戻す。
+
+        Args:
+            name (str): 列名
+        Returns:
+            list[str | None]: 各行の値
+        """
+        values = self.categories[name]
+        return [values[code] if code >= 0 else None for code in self.columns[name].tolist()]
+
+    def to_arrow(self) -> Any:
+        """pyarrow.Table に変換する。カテゴリー列は DictionaryArray になる。
+
+        Returns:
+            pyarrow.Table: 変換したテーブル
+        """
+        import pyarrow as pa  # type: ignore[import-not-found]
+
+        arrays = {}
+        for name, column in self.columns.items():
+            if name in self.categories:
+                mask = column < 0
+                indices = pa.array(column, mask=mask)
+                arrays[name] = pa.DictionaryArray.from_arrays(indices, pa.array(self.categories[name]))
+            else:
+                arrays[name] = pa.array(column)
+        return pa.table(arrays)
+
+
+def _build(numeric: dict[str, array], categories: dict[str, _Categories], dtypes: dict[str, str]) -> ColumnTable:
+    _require_numpy()
+    assert np is not None
+    columns: dict[str, Any] = {}
+    for name, values in numeric.items():
+        columns[name] = np.frombuffer(values, dtype=values.typecode).astype(dtypes.get(name, values.typecode))
+    for name, cats in categories.items():
+        columns[name] = np.frombuffer(cats.codes, dtype=np.int32).copy()
+    return ColumnTable(columns, {name: cats.values for name, cats in categories.items()})
+
+
+def route_table(routes: Iterable[Route]) -> ColumnTable:
+    """経路を列指向のテーブルに変換する。
+
+    列: family(uint8), network_hi/network_lo(uint64), prefixlen(uint8),
+    nexthop_family(uint8, ネクストホップなしは0), nexthop_hi/nexthop_lo(uint64),
+    distance/metric(int64, 欠損は-1), selected/fib(bool), protocol/interface(カテゴリー)
+
+    Args:
+        routes (Iterable[Route]): 経路
+    Returns:
+        ColumnTable: 経路のテーブル
+    """
+    numeric = {
+        "family": array("B"),
+        "network_hi": array("Q"),
+        "network_lo": array("Q"),
+        "prefixlen": array("B"),
+        "nexthop_family": array("B"),
+        "nexthop_hi": array("Q"),
+        "nexthop_lo": array("Q"),
+        "distance": array("q"),
+        "metric": array("q"),
+        "selected": array("B"),
+        "fib": array("B"),
+    }
+    categories = {"protocol": _Categories(), "interface": _Categories()}
+    for route in routes:
+        network, prefixlen = route.prefix.split("/")
+        family, hi, lo = pack_address(network)
+        numeric["family"].append(family)
+        numeric["network_hi"].append(hi)
+        numeric["network_lo"].append(lo)
+        numeric["prefixlen"].append(int(prefixlen))
+        nh_family, nh_hi, nh_lo = pack_address(route.nexthop) if route.nexthop else (0, 0, 0)
+        numeric["nexthop_family"].append(nh_family)
+        numeric["nexthop_hi"].append(nh_hi)
+        numeric["nexthop_lo"].append(nh_lo)
+        numeric["distance"].append(-1 if route.distance is None else route.distance)
+        numeric["metric"].append(-1 if route.metric is None else route.metric)
+        numeric["selected"].append(route.selected)
+        numeric["fib"].append(route.fib)
+        categories["protocol"].append(route.protocol)
+        categories["interface"].append(route.interface)
+    return _build(numeric, categories, {"selected": "bool", "fib": "bool"})
+
+
+def arp_table(entries: Iterable[ArpEntry]) -> ColumnTable:
+    """ARPエントリーを列指向のテーブルに変換する。
+
+    列: address(uint32), mac(uint64), interface(カテゴリー)
+
+    Args:
+        entries (Iterable[ArpEntry]): ARPエントリー
+    Returns:
+        ColumnTable: ARPテーブル
+    """
+    numeric = {"address": array("Q"), "mac": array("Q")}
+    categories = {"interface": _Categories()}
+    for entry in entries:
+        numeric["address"].append(pack_address(entry.address)[2])
+        numeric["mac"].append(pack_mac(entry.mac))
+        categories["interface"].append(entry.interface)
+    return _build(numeric, categories, {"address": "uint32"})
+
+
+def neighbor_table(entries: Iterable[NeighborEntry]) -> ColumnTable:
+    """IPv6近隣エントリーを列指向のテーブルに変換する。
+
+    列: address_hi/address_lo(uint64), mac(uint64), state/interface(カテゴリー)
+
+    Args:
+        entries (Iterable[NeighborEntry]): IPv6近隣エントリー
+    Returns:
+        ColumnTable: IPv6近隣テーブル
+    """
+    numeric = {"address_hi": array("Q"), "address_lo": array("Q"), "mac": array("Q")}
+    categories = {"state": _Categories(), "interface": _Categories()}
+    for entry in entries:
+        _, hi, lo = pack_address(entry.address)
+        numeric["address_hi"].append(hi)
+        numeric["address_lo"].append(lo)
+        numeric["mac"].append(pack_mac(entry.mac))
+        categories["state"].append(entry.state)
+        categories["interface"].append(entry.interface)
+    return _build(numeric, categories, {})
+
+
+def interface_table(interfaces: Iterable[InterfaceStatus]) -> ColumnTable:
+    """インターフェース情報を列指向のテーブルに変換する。
+
+    列: name/status/protocol/address(カテゴリー), mtu/input_packets/input_bytes/
+    output_packets/output_bytes(int64, 欠損は-1)
+
+    Args:
+        interfaces (Iterable[InterfaceStatus]): インターフェース情報
+    Returns:
+        ColumnTable: インターフェースのテーブル
+    """
+    counters = ("mtu", "input_packets", "input_bytes", "output_packets", "output_bytes")
+    numeric = {name: array("q") for name in counters}
+    categories = {name: _Categories() for name in ("name", "status", "protocol", "address")}
+    for interface in interfaces:
+        for name in counters:
+            value = getattr(interface, name)
+            numeric[name].append(-1 if value is None else value)
+        for name, cats in categories.items():
+            cats.append(getattr(interface, name))
+    return _build(numeric, categories, {})
+
+
+tables = ParserRegistry()
+tables.register("show ip route", lambda lines: route_table(iter_routes(lines)))
+tables.register("show ipv6 route", lambda lines: route_table(iter_routes(lines)))
+tables.register("show arp", lambda lines: arp_table(iter_arp(lines)))
+tables.register("show ipv6 neighbors", lambda lines: neighbor_table(iter_neighbors(lines)))
+tables.register("show interface", lambda lines: interface_table(iter_interfaces(lines)))
@@ -1,64 +1,146 @@
-from .core import auth, patch, put
+import os
+from collections.abc import Iterable, Iterator
+from typing import IO
+
+from .cache import invalidate
+from .core import Timeout, auth, patch, put
+
+CHUNK_SIZE = 64 * 1024
+
+type ConfigSource = bytes | str | os.PathLike | IO[bytes] | IO[str] | Iterable[str] | Iterable[bytes]
+
+
+def _encode(data: bytes | str) -> bytes:
+    return data if isinstance(data, bytes) else str(data).encode()
+
+
+def _read_file(file: IO[bytes] | IO[str], chunk_size: int) -> Iterator[bytes]:
+    while chunk := file.read(chunk_size):
+        yield _encode(chunk)
+
+
+def _read_path(path: os.PathLike, chunk_size: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        yield from _read_file(f, chunk_size)
+
+
+def _join_lines(lines: Iterable[str] | Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    buf = bytearray()
+    first = True
+    for line in lines:
+        if not first:
+            buf += b"\n"
+        buf += _encode(line).rstrip(b"\r\n")
+        first = False
+        if len(buf) >= chunk_size:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+def is_replayable_source(config: ConfigSource | None) -> bool:
+    """構成定義を再送できるかどうかを返す。
+
+    ファイルオブジェクトとイテレーターは1回の送信で消費されるため再送できない。
+    """
+    if config is None or isinstance(config, (bytes, str, os.PathLike)):
+        return True
+    return not hasattr(config, "read") and iter(config) is not config
+
+
+def config_body(config: ConfigSource, chunk_size: int = CHUNK_SIZE) -> bytes | Iterator[bytes]:
+    """構成定義を送信用のデータに変換する。
+
+    bytes, str はそのまま送信し、ファイルパス, ファイルオブジェクト, 行のイテラブルは
+    chunk_size ごとに読み出しながらチャンク転送で送信する。行のイテラブルは改行で連結する。
+    ファイルオブジェクトとイテレーターは1回の送信で消費される。
+
+    Args:
+        config (ConfigSource): 構成定義
+        chunk_size (int, optional): ファイルから1回に読み出すバイト数
+    Returns:
+        bytes | Iterator[bytes]: 送信するデータ
+    """
+    if isinstance(config, (bytes, str)):
+        return _encode(config)
+    if isinstance(config, os.PathLike):
+        return _read_path(config, chunk_size)
+    if hasattr(config, "read"):
+        return _read_file(config, chunk_size)  # type: ignore[arg-type]
+    return _join_lines(config, chunk_size)  # type: ignore[arg-type]
 
 
 def replace_config(
     url: str,
-    config: bytes | str,
+    config: ConfigSource,
     user: str | None = None,
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> str:
     """ルータの設定を置き換える。
 
     Args:
         url (str): API URL
-        config (bytes | str):
+        config (ConfigSource): 構成定義。bytes, str, ファイルパス, ファイルオブジェクト, 行のイテラブル
         user (str | None): BASIC認証時のユーザー名
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         str: コンフィグ適用結果
     """
 
     api = "/api/v1/config"
 
-    if not isinstance(config, bytes):
-        config = str(config).encode()
-
-    res = put(
-        base_url=url, endpoint=api, auth=auth(bearer=bearer, user=user, password=password, token=token), data=config
-    )
+    try:
+        res = put(
+            base_url=url,
+            endpoint=api,
+            auth=auth(bearer=bearer, user=user, password=password, token=token),
+            timeout=timeout,
+            data=config_body(config),
+        )
+    finally:
+        invalidate(url)
     return res.text
 
 
 def update_config(
     url: str,
-    config: bytes | str,
+    config: ConfigSource,
     user: str | None = None,
     password: str | None = None,
     bearer: bool = False,
     token: str | None = None,
+    timeout: Timeout = None,
 ) -> str:
     """ルータの設定の差分反映(追加・削除・変更)を行う。
 
     Args:
         url (str): API URL
-        config (bytes | str):
+        config (ConfigSource): 構成定義。bytes, str, ファイルパス, ファイルオブジェクト, 行のイテラブル
         user (str | None): BASIC認証時のユーザー名
         password (str | None): BASIC認証時のパスワード
         bearer (bool): Bearer認証を使用する場合はTrue
         token (str | None): Bearer認証時のアクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         str: コンフィグ適用結果
     """
     api = "/api/v1/config"
 
-    if not isinstance(config, bytes):
-        config = str(config).encode()
-
-    res = patch(
-        base_url=url, endpoint=api, auth=auth(bearer=bearer, user=user, password=password, token=token), data=config
-    )
+    try:
+        res = patch(
+            base_url=url,
+            endpoint=api,
+            auth=auth(bearer=bearer, user=user, password=password, token=token),
+            timeout=timeout,
+            data=config_body(config),
+        )
+    finally:
+        invalidate(url)
     return res.text
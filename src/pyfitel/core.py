@@ -1,8 +1,20 @@
-from urllib.parse import urljoin
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextvars import ContextVar
+from urllib.parse import urljoin, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from . import metrics
+from .ratelimit import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+
 
 class FITELnetAPIError(Exception):
     """FITELnet API errors."""
@@ -14,26 +26,541 @@ class FITELnetAPIError(Exception):
     def __str__(self):
         return f"HTTP {self._http_code} : {self._message}"
 
+    @property
+    def message(self):
+        return self._message
+
+    @property
+    def http_code(self):
+        return self._http_code
+
+
+def device_key(base_url: str) -> str:
+    """URLから機器を識別するキー(スキーム://ホスト:ポート)を作成する。
+
+    Args:
+        base_url (str): ベースURL
+    Returns:
+        str: 機器を識別するキー
+    """
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class SessionPool:
+    """機器ごとのHTTPセッション(Keep-Alive接続)を保持するプール。
+
+    同一機器へのリクエストで TCP/TLS 接続を再利用し、一定時間使用されていない
+    セッションは次回アクセス時に破棄する。
+    """
+
+    def __init__(self, pool_maxsize: int = 4, idle_timeout: float = 60.0) -> None:
+        """
+        Args:
+            pool_maxsize (int): 1機器あたりに保持する最大コネクション数
+            idle_timeout (float): 未使用のセッションを破棄するまでの秒数
+        """
+        if pool_maxsize < 1:
+            raise ValueError("pool_maxsize must be 1 or more")
+        self._pool_maxsize = pool_maxsize
+        self._idle_timeout = idle_timeout
+        self._sessions: dict[str, tuple[requests.Session, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(base_url: str) -> str:
+        return device_key(base_url)
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def session(self, base_url: str) -> requests.Session:
+        """機器に対応するセッションを取得する。存在しない場合は作成する。
+
+        Args:
+            base_url (str): ベースURL
+        Returns:
+            requests.Session: セッション
+        """
+        key = self._key(base_url)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(key)
+            session = entry[0] if entry is not None else self._new_session()
+            self._sessions[key] = (session, now)
+        return session
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [key for key, (_, last) in self._sessions.items() if now - last > self._idle_timeout]
+        for key in expired:
+            self._sessions.pop(key)[0].close()
+
+    def evict_idle(self) -> None:
+        """一定時間使用されていないセッションを破棄する。"""
+        with self._lock:
+            self._evict_idle(time.monotonic())
+
+    def close(self, base_url: str | None = None) -> None:
+        """セッションを破棄する。
+
+        Args:
+            base_url (str | None): 破棄する機器のベースURL。Noneの場合は全てのセッションを破棄する
+        """
+        with self._lock:
+            if base_url is None:
+                sessions = [session for session, _ in self._sessions.values()]
+                self._sessions.clear()
+            else:
+                entry = self._sessions.pop(self._key(base_url), None)
+                sessions = [entry[0]] if entry is not None else []
+        for session in sessions:
+            session.close()
+
+
+_pool = SessionPool()
+
+
+def configure_pool(pool_maxsize: int = 4, idle_timeout: float = 60.0) -> None:
+    """既定のセッションプールを設定する。既存のセッションは破棄される。
+
+    Args:
+        pool_maxsize (int): 1機器あたりに保持する最大コネクション数
+        idle_timeout (float): 未使用のセッションを破棄するまでの秒数
+    """
+    global _pool
+    old, _pool = _pool, SessionPool(pool_maxsize=pool_maxsize, idle_timeout=idle_timeout)
+    old.close()
+
+
+def close_session(base_url: str | None = None) -> None:
+    """既定のセッションプールからセッションを破棄する。
+
+    Args:
+        base_url (str | None): 破棄する機器のベースURL。Noneの場合は全てのセッションを破棄する
+    """
+    _pool.close(base_url)
+
+
+def session(base_url: str) -> requests.Session:
+    """既定のセッションプールから機器のセッションを取得する。
+
+    Args:
+        base_url (str): ベースURL
+    Returns:
+        requests.Session: セッション
+    """
+    return _pool.session(base_url)
+
+
+def check_response(res) -> None:
+    """レスポンスのステータスコードを確認し、2xx以外の場合は例外を送出する。
+
+    Args:
+        res: status_code, json(), text を持つレスポンスオブジェクト
+    Raises:
+        FITELnetAPIError: ステータスコードが2xx以外の場合
+    """
+    if res.status_code // 100 != 2:
+        try:
+            msg = res.json().get("error")
+        except ValueError:
+            msg = res.text
+        raise FITELnetAPIError(msg, res.status_code)
+
+
+type Timeout = float | tuple[float | None, float | None] | None
+
+# show tech-support や大きな構成定義の commit など、同期実行のCLIは応答に数分かかることがあるため、
+# 既定では読み込みタイムアウトを設定しない。全体の時間は deadline_scope() で制限する
+DEFAULT_TIMEOUT: tuple[float | None, float | None] = (10.0, None)
+
+_default_timeout: tuple[float | None, float | None] = DEFAULT_TIMEOUT
+_deadline: ContextVar[float | None] = ContextVar("pyfitel_deadline", default=None)
+
+
+def configure_timeout(connect: float | None = DEFAULT_TIMEOUT[0], read: float | None = DEFAULT_TIMEOUT[1]) -> None:
+    """APIリクエストの既定のタイムアウトを設定する。
+
+    Args:
+        connect (float | None): 接続タイムアウト秒数。Noneの場合は無制限
+        read (float | None): 読み込みタイムアウト秒数。Noneの場合は無制限
+    """
+    global _default_timeout
+    _default_timeout = (connect, read)
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """ブロック内のAPIリクエスト全体の期限を設定する。
+
+    ブロック内の各リクエストのタイムアウトは残り時間以下に制限され、期限を過ぎた後の
+    リクエストは送信せずに TimeoutError を送出する。入れ子にした場合は早い方の期限が適用される。
+
+    Args:
+        seconds (float | None): 期限までの秒数。Noneの場合は期限を設定しない
+    """
+    if seconds is None:
+        yield
+        return
+    end = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(end if current is None else min(current, end))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextlib.contextmanager
+def cleanup_scope(seconds: float) -> Iterator[None]:
+    """期限切れの後でも後片付けのリクエストを送れるよう、期限を seconds 秒後に置き換える。
+
+    deadline_scope と異なり外側の期限より延びることがある。実行中のジョブの削除など、
+    例外を送出する前の短い後片付けにだけ使用する。
+
+    Args:
+        seconds (float): 後片付けに使用できる秒数
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """現在の期限までの残り秒数を返す。
+
+    Returns:
+        float | None: 残り秒数。期限が設定されていない場合はNone
+    """
+    end = _deadline.get()
+    return None if end is None else end - time.monotonic()
+
+
+def request_timeout(timeout: Timeout = None) -> tuple[float | None, float | None]:
+    """期限を考慮したリクエストの接続・読み込みタイムアウトを返す。
+
+    Args:
+        timeout (Timeout): 秒数または(接続, 読み込み)の秒数。Noneの場合は既定値
+    Returns:
+        tuple[float | None, float | None]: 接続タイムアウト秒数, 読み込みタイムアウト秒数
+    Raises:
+        TimeoutError: 期限を過ぎている場合
+    """
+    if timeout is None:
+        connect, read = _default_timeout
+    elif isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+
+    left = remaining()
+    if left is not None:
+        if left <= 0:
+            raise TimeoutError("Deadline exceeded.")
+        connect = left if connect is None else min(connect, left)
+        read = left if read is None else min(read, left)
+    return connect, read
+
+
+def can_wait(delay: float) -> bool:
+    """期限までに delay 秒待機できるかどうかを返す。"""
+    left = remaining()
+    return left is None or delay < left
+
+
+# 再送した構成定義の PUT が機器で適用済みの場合があるため、既定ではリトライしない
+_retry_policy = RetryPolicy(retries=0)
+_circuit_breaker: CircuitBreaker | None = None
+
+
+def configure_retry(policy: RetryPolicy | None = None, circuit_breaker: CircuitBreaker | None = None) -> None:
+    """APIリクエストのリトライ方針とサーキットブレーカーを設定する。
+
+    既定ではリトライせず、サーキットブレーカーも使用しない。RetryPolicy() を指定すると GET, PUT, DELETE を
+    最大2回リトライする。policy に None を指定すると既定の動作(リトライしない)に戻す。
+
+    Args:
+        policy (RetryPolicy | None): リトライ方針。Noneの場合はリトライしない
+        circuit_breaker (CircuitBreaker | None): サーキットブレーカー。Noneの場合は使用しない
+    """
+    global _retry_policy, _circuit_breaker
+    _retry_policy = policy if policy is not None else RetryPolicy(retries=0)
+    _circuit_breaker = circuit_breaker
+
+
+def get_retry_policy() -> RetryPolicy:
+    """現在のリトライ方針を返す。"""
+    return _retry_policy
+
+
+def get_circuit_breaker() -> CircuitBreaker | None:
+    """現在のサーキットブレーカーを返す。"""
+    return _circuit_breaker
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def configure_rate_limit(limiter: RateLimiter | None = None) -> None:
+    """APIリクエストのレートリミッターを設定する。
+
+    Args:
+        limiter (RateLimiter | None): レートリミッター。Noneの場合は制限しない
+    """
+    global _rate_limiter
+    _rate_limiter = limiter
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """現在のレートリミッターを返す。"""
+    return _rate_limiter
+
+
+def throttle_delay(device: str) -> float:
+    """レートリミッターからリクエスト1回分のトークンを予約し、送信までの待機秒数を返す。
+
+    Args:
+        device (str): 機器を識別するキー
+    Returns:
+        float: 待機秒数
+    Raises:
+        TimeoutError: 待機すると期限を過ぎる場合
+    """
+    limiter = _rate_limiter
+    if limiter is None:
+        return 0.0
+    delay = limiter.reserve(device)
+    if delay > 0 and not can_wait(delay):
+        limiter.cancel(device)
+        raise TimeoutError("Deadline exceeded.")
+    return delay
+
+
+def is_replayable(data) -> bool:
+    """リクエストボディを再送できるかどうかを返す。イテレーターは再送できない。"""
+    return data is None or isinstance(data, (bytes, str, dict))
+
+
+class RequestRetry:
+    """1回のAPI呼び出しにおけるリトライ・サーキットブレーカー・レートリミットの判断と計測の状態。
+
+    送信処理そのものは呼び出し元が行い、同期版(request_api)と非同期版(AsyncFITELnetAPI)で同じ判断を共有する。
+    呼び出し元は begin() の後、送信ごとに throttle() の秒数だけ待ってから送信し、送信エラーでは
+    retry_on_error()、レスポンスでは retry_on_response() が返す秒数だけ待って再送する。
+    Noneが返された場合は再送しない。途中で例外により終了した場合は abort() を呼び出す。
+    """
+
+    def __init__(self, device: str, method: str, replayable: bool) -> None:
+        """
+        Args:
+            device (str): 機器を識別するキー
+            method (str): HTTPメソッド
+            replayable (bool): リクエストボディを再送できるかどうか
+        """
+        self.device = device
+        self.method = method
+        self.replayable = replayable
+        self.retries = 0
+        self._policy = _retry_policy
+        self._breaker = _circuit_breaker
+        self._probe = False
+        self._start = time.perf_counter()
+
+    def begin(self) -> None:
+        """サーキットブレーカーを確認する。
+
+        Raises:
+            CircuitOpenError: 遮断中の場合
+        """
+        if self._breaker is not None:
+            self._probe = self._breaker.check(self.device)
+
+    def throttle(self) -> float:
+        """送信前に待機する秒数を返す。
+
+        Raises:
+            TimeoutError: 待機すると期限を過ぎる場合
+        """
+        return throttle_delay(self.device)
+
+    def _retry(self, retry_after: str | None = None) -> float | None:
+        if not self.replayable or not self._policy.can_retry(self.method, self.retries):
+            return None
+        delay = self._policy.delay(self.retries, retry_after)
+        if not can_wait(delay):
+            return None
+        self.retries += 1
+        return delay
+
+    def retry_on_error(self) -> float | None:
+        """接続エラー・タイムアウトの後に再送する場合は待機秒数を返す。再送しない場合は失敗を記録してNoneを返す。"""
+        delay = self._retry()
+        if delay is None:
+            self._settle(failed=True)
+        return delay
+
+    def retry_on_response(self, status: int, retry_after: str | None = None) -> float | None:
+        """レスポンスを受信した後に再送する場合は待機秒数を返す。再送しない場合は結果を記録してNoneを返す。
+
+        Args:
+            status (int): HTTPステータスコード
+            retry_after (str | None, optional): Retry-After ヘッダーの値
+        """
+        delay = self._retry(retry_after) if status in self._policy.status_codes else None
+        if delay is None:
+            self._settle(failed=status // 100 == 5)
+        return delay
+
+    def _settle(self, failed: bool) -> None:
+        self._probe = False
+        if self._breaker is None:
+            return
+        if failed:
+            self._breaker.record_failure(self.device)
+        else:
+            self._breaker.record_success(self.device)
+
+    def abort(self) -> None:
+        """結果を記録せずに終了した半開状態の試行(期限切れなど)を取り消し、次のリクエストに試行を譲る。"""
+        if self._probe and self._breaker is not None:
+            self._breaker.cancel(self.device)
+        self._probe = False
+
+    def event(
+        self,
+        endpoint: str,
+        status: int | None,
+        bytes_sent: int | None,
+        bytes_received: int | None,
+        response_time: float | None,
+        error: BaseException | None,
+    ) -> metrics.RequestEvent:
+        """呼び出し全体の RequestEvent を作成する。"""
+        return metrics.RequestEvent(
+            device=self.device,
+            method=self.method,
+            endpoint=metrics.endpoint_template(endpoint),
+            status=status,
+            bytes_sent=bytes_sent,
+            bytes_received=bytes_received,
+            elapsed=time.perf_counter() - self._start,
+            response_time=response_time,
+            retries=self.retries,
+            error=type(error).__name__ if error is not None else None,
+        )
+
+
+class _CountingBody:
+    """チャンク転送するリクエストボディの送信バイト数を数えるイテラブル。"""
+
+    def __init__(self, body: Iterable[bytes]) -> None:
+        self._body = body
+        self.size = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._body:
+            self.size += len(chunk)
+            yield chunk
+
+
+def _request_size(res, body: _CountingBody | None) -> int | None:
+    if body is not None:
+        return body.size
+    content = getattr(getattr(res, "request", None), "body", None)
+    return len(content) if isinstance(content, (bytes, str)) else None
+
+
+def _response_size(res, stream: bool) -> int | None:
+    if stream:
+        length = getattr(res, "headers", {}).get("Content-Length")
+        return int(length) if length is not None else None
+    content = getattr(res, "content", None)
+    return len(content) if isinstance(content, bytes) else None
+
 
 def request_api(func):
     """APIリクエストの共通処理を行うデコレーター。
 
+    configure_rate_limit() でレートリミッターが設定されている場合は、各送信の前にトークンを待つ。
+    接続エラーや一時的なエラーレスポンスは設定されたリトライ方針に従ってリトライし、
+    最終的に2xx以外のレスポンスの場合は FITELnetAPIError を送出する。
+    metrics.add_hook() でフックが登録されている場合は、呼び出しごとに RequestEvent を通知する。
+
     Args:
         func (Callable): APIリクエスト関数
     Returns:
         Callable: デコレーター適用後の関数
     """
+    method = func.__name__.upper()
+    signature = inspect.signature(func)
 
+    @functools.wraps(func)
     def wrapper(*args, **kwargs) -> requests.Response:
-        res = func(*args, **kwargs)
-        if res.status_code // 100 != 2:
-            try:
-                msg = res.json().get("error")
-            except requests.JSONDecodeError:
-                msg = res.text
-            raise FITELnetAPIError(msg, res.status_code)
-
-        return res
+        if args:
+            # data などを位置引数で渡された場合も同じように扱えるよう、キーワード引数にそろえる
+            kwargs = signature.bind(*args, **kwargs).arguments
+        device = device_key(kwargs["base_url"])
+        if not metrics.has_hooks():
+            res = _send(kwargs, RequestRetry(device, method, is_replayable(kwargs.get("data"))))
+            check_response(res)
+            return res
+
+        body = None
+        if not is_replayable(kwargs.get("data")):
+            body = kwargs["data"] = _CountingBody(kwargs["data"])
+        retry = RequestRetry(device, method, body is None)
+        res = None
+        error = None
+        try:
+            res = _send(kwargs, retry)
+            check_response(res)
+            return res
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            response_time = getattr(res, "elapsed", None)
+            metrics.emit(
+                retry.event(
+                    kwargs["endpoint"],
+                    status=res.status_code if res is not None else None,
+                    bytes_sent=_request_size(res, body),
+                    bytes_received=_response_size(res, kwargs.get("stream", False)) if res is not None else None,
+                    response_time=response_time.total_seconds() if response_time is not None else None,
+                    error=error,
+                )
+            )
+
+    def _send(kwargs: dict, retry: RequestRetry) -> requests.Response:
+        retry.begin()
+        try:
+            while True:
+                delay = retry.throttle()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    res = func(**kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    delay = retry.retry_on_error()
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+                delay = retry.retry_on_response(res.status_code, getattr(res, "headers", {}).get("Retry-After"))
+                if delay is None:
+                    return res
+                res.close()
+                time.sleep(delay)
+        except BaseException:
+            retry.abort()
+            raise
 
     return wrapper
 
@@ -61,22 +588,25 @@ def auth(bearer: bool, user: str | None, password: str | None, token: str | None
 
 
 @request_api
-def get(base_url: str, endpoint: str, auth: dict) -> requests.Response:
+def get(base_url: str, endpoint: str, auth: dict, timeout: Timeout = None) -> requests.Response:
     """GETリクエストを送信する。
 
     Args:
         base_url (str): ベースURL
         endpoint (str): APIエンドポイントURL
         auth (dict): 認証情報
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         requests.Response: レスポンスオブジェクト
     """
 
-    return requests.get(url=urljoin(base_url, endpoint), **auth)
+    return session(base_url).get(url=urljoin(base_url, endpoint), timeout=request_timeout(timeout), **auth)
 
 
 @request_api
-def post(base_url: str, endpoint: str, auth: dict, data: dict | None) -> requests.Response:
+def post(
+    base_url: str, endpoint: str, auth: dict, data: dict | None, stream: bool = False, timeout: Timeout = None
+) -> requests.Response:
     """POSTリクエストを送信する。
 
     Args:
@@ -84,63 +614,78 @@ def post(base_url: str, endpoint: str, auth: dict, data: dict | None) -> request
         endpoint (str): APIエンドポイントURL
         auth (dict): 認証情報
         data (dict): 送信するデータ
+        stream (bool): Trueの場合はレスポンスボディを読み込まずに返す
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         requests.Response: レスポンスオブジェクト
     """
 
-    return requests.post(url=urljoin(base_url, endpoint), json=data, **auth)
+    return session(base_url).post(
+        url=urljoin(base_url, endpoint), timeout=request_timeout(timeout), json=data, stream=stream, **auth
+    )
 
 
 @request_api
-def delete(base_url: str, endpoint: str, auth: dict) -> requests.Response:
+def delete(base_url: str, endpoint: str, auth: dict, timeout: Timeout = None) -> requests.Response:
     """DELETEリクエストを送信する。
 
     Args:
         base_url (str): ベースURL
         endpoint (str): APIエンドポイントURL
         auth (dict): 認証情報
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         requests.Response: レスポンスオブジェクト
     """
 
-    return requests.delete(url=urljoin(base_url, endpoint), **auth)
+    return session(base_url).delete(url=urljoin(base_url, endpoint), timeout=request_timeout(timeout), **auth)
 
 
 @request_api
-def put(base_url: str, endpoint: str, auth: dict, data: bytes) -> requests.Response:
+def put(
+    base_url: str, endpoint: str, auth: dict, data: bytes | Iterable[bytes], timeout: Timeout = None
+) -> requests.Response:
     """PUTリクエストを送信する。
 
     Args:
         base_url (str): ベースURL
         endpoint (str): APIエンドポイントURL
         auth (dict): 認証情報
-        data (bytes): 送信するバイトデータ
+        data (bytes | Iterable[bytes]): 送信するバイトデータ。イテラブルの場合はチャンク転送で送信する
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         requests.Response: レスポンスオブジェクト
     """
     headers = {"Content-Type": "multipart/form-data"}
     if "headers" in auth:
-        headers.update(auth["headers"])
-        auth.pop("headers")
+        auth = dict(auth)
+        headers.update(auth.pop("headers"))
 
-    return requests.put(url=urljoin(base_url, endpoint), headers=headers, data=data, **auth)
+    return session(base_url).put(
+        url=urljoin(base_url, endpoint), timeout=request_timeout(timeout), headers=headers, data=data, **auth
+    )
 
 
 @request_api
-def patch(base_url: str, endpoint: str, auth: dict, data: bytes) -> requests.Response:
+def patch(
+    base_url: str, endpoint: str, auth: dict, data: bytes | Iterable[bytes], timeout: Timeout = None
+) -> requests.Response:
     """PATCHリクエストを送信する。
 
     Args:
         base_url (str): ベースURL
         endpoint (str): APIエンドポイントURL
         auth (dict): 認証情報
-        data (bytes): 送信するバイトデータ
+        data (bytes | Iterable[bytes]): 送信するバイトデータ。イテラブルの場合はチャンク転送で送信する
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         requests.Response: レスポンスオブジェクト
     """
     headers = {"Content-Type": "multipart/form-data"}
     if "headers" in auth:
-        headers.update(auth["headers"])
-        auth.pop("headers")
+        auth = dict(auth)
+        headers.update(auth.pop("headers"))
 
-    return requests.patch(url=urljoin(base_url, endpoint), headers=headers, data=data, **auth)
+    return session(base_url).patch(
+        url=urljoin(base_url, endpoint), timeout=request_timeout(timeout), headers=headers, data=data, **auth
+    )
@@ -0,0 +1,109 @@
+from collections.abc import Iterable, Iterator
+
+_IGNORED = ("!", "#")
+_TERMINATORS = frozenset({"exit", "end"})
+
+
+class ConfigNode:
+    """インデントで階層化された構成定義の1行と、その配下の行。"""
+
+    def __init__(self, line: str = "") -> None:
+        """
+        Args:
+            line (str, optional): 前後の空白を除いた行。ルートの場合は空文字
+        """
+        self.line = line
+        self.children: dict[str, ConfigNode] = {}
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ConfigNode) and self.line == other.line and self.children == other.children
+
+    def __repr__(self) -> str:
+        return f"ConfigNode({self.line!r}, children={len(self.children)})"
+
+    def lines(self, depth: int = 0) -> Iterator[str]:
+        """ノードと配下の行を show running-config と同じ形式で返す。
+
+        Args:
+            depth (int, optional): ノードのインデントの深さ
+        Returns:
+            Iterator[str]: インデントした各行。配下の行がある場合は最後に exit を返す
+        """
+        yield " " * depth + self.line
+        for child in self.children.values():
+            yield from child.lines(depth + 1)
+        if self.children:
+            yield " " * (depth + 1) + "exit"
+
+
+def parse_config(config: str | Iterable[str]) -> ConfigNode:
+    """構成定義をインデントに基づいて木構造に変換する。
+
+    空行、! や # で始まるコメント行、exit と end は無視する。同じ階層の重複した行は1つにまとめる。
+
+    Args:
+        config (str | Iterable[str]): 構成定義の文字列または行のイテラブル
+    Returns:
+        ConfigNode: ルートノード
+    """
+    lines = config.splitlines() if isinstance(config, str) else config
+    root = ConfigNode()
+    stack: list[tuple[int, ConfigNode]] = [(-1, root)]
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        text = line.strip()
+        if not text or text.startswith(_IGNORED) or text in _TERMINATORS:
+            continue
+        indent = len(line) - len(line.lstrip())
+        while stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1]
+        node = parent.children.get(text)
+        if node is None:
+            node = parent.children[text] = ConfigNode(text)
+        stack.append((indent, node))
+    return root
+
+
+def negate(line: str) -> str:
+    """設定行を削除する行を返す。no で始まる行の場合は no を除いた行を返す。
+
+    Args:
+        line (str): 設定行
+    Returns:
+        str: 削除する行
+    """
+    return line[3:] if line.startswith("no ") else f"no {line}"
+
+
+def _diff(running: ConfigNode, desired: ConfigNode, depth: int) -> Iterator[str]:
+    indent = " " * depth
+    for line in running.children:
+        if line not in desired.children and negate(line) not in desired.children:
+            yield indent + negate(line)
+    for line, node in desired.children.items():
+        current = running.children.get(line)
+        if current is None:
+            yield from node.lines(depth)
+        elif current != node:
+            nested = list(_diff(current, node, depth + 1))
+            if nested:
+                yield indent + line
+                yield from nested
+                yield indent + " exit"
+
+
+def diff_config(running: str | Iterable[str], desired: str | Iterable[str]) -> str:
+    """現在の構成定義を目的の構成定義にするための差分を作成する。
+
+    階層ごとに、目的の構成定義にない行を no で削除してから、追加・変更した行を送信する。
+    変更がある階層には、その階層に入る行と exit を含める。
+
+    Args:
+        running (str | Iterable[str]): 現在の構成定義 (show running-config の出力)
+        desired (str | Iterable[str]): 目的の構成定義の全体
+    Returns:
+        str: update_config で送信する差分。差分がない場合は空文字
+    """
+    delta = list(_diff(parse_config(running), parse_config(desired), 0))
+    return "\n".join(delta) + "\n" if delta else ""
@@ -1,23 +1,167 @@
+import functools
+import os
+import threading
 import time
+from collections.abc import Callable, Iterator
+from typing import IO, TYPE_CHECKING, Any, Self
 
-from .cli import delete_commands_result, exec_command, exec_commands, get_commands_result
-from .config import update_config
+from . import metrics
+from .cache import ResponseCache
+from .cli import (
+    delete_commands_result,
+    delete_commands_result_all,
+    exec_command,
+    exec_command_lines,
+    exec_command_to,
+    exec_commands,
+    get_clis_id_all,
+    get_commands_result,
+)
+from .config import ConfigSource, is_replayable_source, update_config
+from .core import FITELnetAPIError, Timeout, can_wait, cleanup_scope, close_session, deadline_scope, device_key
+from .diff import diff_config
+from .parsers import ParserRegistry, registry
+from .poll import FixedPoll, PollPolicy
+from .results import CommandsResult
+from .retry import CircuitOpenError
+from .token import delete_token, publish_token
+
+if TYPE_CHECKING:
+    from .columnar import ColumnTable
 
 
 class CLI:
+    """複数CLIコマンド実行で送信するコマンド1個分の設定。
+
+    変更できないオブジェクトで、API送信用の辞書は作成時に1回だけ生成する。copy や pickle で複製できる。
+    """
+
+    __slots__ = ("_cmd", "_on_fail_exit", "_payload")
+
     def __init__(self, cmd: str, on_fail_exit: bool = False) -> None:
-        self._cmd = cmd
-        self._on_fail_action = "exit" if on_fail_exit else "continue"
+        """
+        Args:
+            cmd (str): 実行するコマンド
+            on_fail_exit (bool, optional): Trueの場合はコマンドが失敗したときに以降のコマンドを実行しない
+        """
+        object.__setattr__(self, "_cmd", cmd)
+        object.__setattr__(self, "_on_fail_exit", on_fail_exit)
+        object.__setattr__(
+            self, "_payload", {"cmd": cmd, "on_fail": {"action": "exit" if on_fail_exit else "continue"}}
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def cmd(self) -> str:
+        return self._cmd
+
+    @property
+    def on_fail_exit(self) -> bool:
+        return self._on_fail_exit
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CLI):
+            return NotImplemented
+        return (self._cmd, self._on_fail_exit) == (other._cmd, other._on_fail_exit)
+
+    def __hash__(self) -> int:
+        return hash((self._cmd, self._on_fail_exit))
+
+    def __repr__(self) -> str:
+        return f"CLI({self._cmd!r}, on_fail_exit={self._on_fail_exit!r})"
+
+    def __reduce__(self) -> tuple[type["CLI"], tuple[str, bool]]:
+        return (CLI, (self._cmd, self._on_fail_exit))
 
     def to_dict(self) -> dict:
-        return {
-            "cmd": self._cmd,
-            "on_fail": {"action": self._on_fail_action},
-        }
+        """API送信用の辞書の複製を返す。"""
+        return {"cmd": self._cmd, "on_fail": dict(self._payload["on_fail"])}
+
+
+@functools.lru_cache(maxsize=1024)
+def _cli(cmd: str) -> CLI:
+    return CLI(cmd)
+
+
+def to_cli_dicts(cmd_list: list[CLI] | list[str] | list[str | CLI]) -> list[dict]:
+    """CLIコマンドのリストをAPI送信用の辞書のリストに変換する。
+
+    辞書は CLI が作成時に生成したものをそのまま返すため、変更してはいけない。
+    文字列のコマンドはキャッシュした CLI を使用する。
+
+    Args:
+        cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+    Returns:
+        list[dict]: API送信用のCLIコマンドのリスト
+    """
+    return [(cmd if isinstance(cmd, CLI) else _cli(str(cmd)))._payload for cmd in cmd_list]
+
+
+MAX_COMMANDS = 10
+# 失敗したcommands_waitが実行中のジョブを削除するために、期限切れの後でも使用できる秒数
+CLEANUP_TIMEOUT = 5.0
+
+
+def split_clis[T](clis: list[T], size: int = MAX_COMMANDS) -> list[list[T]]:
+    """CLIコマンドのリストを1回のAPIで実行できる数ごとに分割する。
+
+    Args:
+        clis (list[T]): API送信用のCLIコマンドのリスト、またはCLIコマンドのリスト
+        size (int, optional): 1回のAPIで実行するコマンド数
+    Returns:
+        list[list[T]]: 分割したCLIコマンドのリスト
+    """
+    return [clis[i : i + size] for i in range(0, len(clis), size)]
+
+
+def has_exit_on_fail(clis: list[dict]) -> bool:
+    """失敗時に実行を中断するコマンドが含まれているかどうかを返す。"""
+    return any(cli["on_fail"]["action"] == "exit" for cli in clis)
+
+
+def is_aborted(result: dict) -> bool:
+    """失敗時に実行を中断するコマンドが失敗したかどうかを返す。"""
+    return any(
+        item.get("on_fail", {}).get("action") == "exit" and item.get("result") != "success"
+        for item in result.get("list", [])
+    )
+
+
+def merge_results(results: list[dict], total: int) -> dict:
+    """分割して実行したCLIコマンドの実行結果を1つにまとめる。
+
+    Args:
+        results (list[dict]): 分割実行ごとの実行結果
+        total (int): 実行を要求したコマンド数
+    Returns:
+        dict: CLIコマンド実行結果。clis_id には分割実行ごとのIDのリストが格納される
+    """
+    statuses = [res.get("status") for res in results]
+    return {
+        "clis_id": [res.get("clis_id") for res in results],
+        "status": next((status for status in statuses if status != "success"), "success"),
+        "list": [item for res in results for item in res.get("list", [])],
+        "total": total,
+    }
 
 
 class FITELnetAPI:
-    def __init__(self, host: str, port: int, user: str, password: str, tls: bool) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        tls: bool,
+        use_token: bool = False,
+        cache: ResponseCache | None = None,
+        timeout: Timeout = None,
+    ) -> None:
         """
         Args:
             host (str): 機器のIPアドレスまたはFQDN
@@ -25,7 +169,11 @@ class FITELnetAPI:
             user (str): ユーザー名
             password (str): パスワード
             tls (bool): httpsの場合はTrue,httpの場合はFalse
+            use_token (bool, optional): Trueの場合はアクセストークンを発行してBearer認証を使用する
+            cache (ResponseCache | None, optional): 運用管理コマンドの実行結果のキャッシュ
+            timeout (Timeout, optional): 秒数または(接続, 読み込み)の秒数。Noneの場合は既定値
         """
+        self._host = host
         self._url = "http"
         if tls:
             self._url += "s"
@@ -33,7 +181,44 @@ class FITELnetAPI:
 
         self._user = user
         self._password = password
-        self._bearer = False
+        self._bearer = use_token
+        self._token: str | None = None
+        self._token_lock = threading.Lock()
+        self._cache = cache
+        self._timeout = timeout
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """発行済みのアクセストークンを削除し、機器とのHTTPセッションを切断する。"""
+        with self._token_lock:
+            token, self._token = self._token, None
+        try:
+            if token is not None:
+                delete_token(url=self._url, token=token, timeout=self._timeout)
+        finally:
+            close_session(self._url)
+
+    def _get_token(self, expired: str | None = None) -> str:
+        with self._token_lock:
+            token = self._token
+            if token is None or token == expired:
+                token = self._token = publish_token(
+                    url=self._url, user=self._user, password=self._password, timeout=self._timeout
+                )["access_token"]
+            return token
 
     def _get_auth(self) -> dict:
         return {
@@ -41,9 +226,23 @@ class FITELnetAPI:
             "user": self._user,
             "password": self._password,
             "bearer": self._bearer,
-            "token": None,
+            "token": self._get_token() if self._bearer else None,
+            "timeout": self._timeout,
         }
 
+    def _call[T](self, func: Callable[..., T], **kwargs) -> T:
+        auth = self._get_auth()
+        try:
+            return func(**kwargs, **auth)
+        except FITELnetAPIError as e:
+            if not self._bearer or e.http_code != 401:
+                raise
+            auth["token"] = self._get_token(expired=auth["token"])
+            # 消費済みのファイルオブジェクトやイテレーターを再送すると空の構成定義が適用されるため、再送しない
+            if not is_replayable_source(kwargs.get("config")):
+                raise
+        return func(**kwargs, **auth)
+
     def command(self, cmd: str) -> str:
         """運用管理コマンドを実行する。
 
@@ -53,7 +252,162 @@ class FITELnetAPI:
         Returns:
             str: コマンド実行結果
         """
-        return exec_command(cmd=cmd, **self._get_auth())
+        if self._cache is None:
+            return self._call(exec_command, cmd=cmd)
+        result = self._cache.get(self._url, cmd)
+        if result is None:
+            result = self._call(exec_command, cmd=cmd)
+            self._cache.put(self._url, cmd, result)
+        return result
+
+    def command_lines(self, cmd: str) -> Iterator[str]:
+        """運用管理コマンドを実行し、実行結果を受信しながら1行ずつ返す。
+
+        Args:
+            cmd (str): 実行するコマンド
+
+        Returns:
+            Iterator[str]: 改行を除いたコマンド実行結果の各行
+        """
+        return self._call(exec_command_lines, cmd=cmd)
+
+    def command_parsed(self, cmd: str, parsers: ParserRegistry | None = None) -> Any:
+        """運用管理コマンドを実行し、登録されたパーサーで解析した結果を返す。
+
+        キャッシュを使用しない場合は、実行結果を受信しながら1行ずつ解析する。
+
+        Args:
+            cmd (str): 実行するコマンド
+            parsers (ParserRegistry | None, optional): 使用するパーサーのレジストリ。Noneの場合は既定のレジストリ
+
+        Raises:
+            KeyError: コマンドに対応するパーサーが登録されていない場合
+
+        Returns:
+            Any: 解析結果。既定のレジストリではレコードのリスト
+        """
+        parsers = parsers or registry
+        parser = parsers.get(cmd)
+        if parser is None:
+            raise KeyError(f"No parser registered for command: {cmd}")
+        if self._cache is not None:
+            return parser(self.command(cmd).splitlines())
+        return parser(self.command_lines(cmd))
+
+    def command_table(self, cmd: str) -> "ColumnTable":
+        """運用管理コマンドを実行し、実行結果を列指向のテーブルに変換する。
+
+        show ip route, show ipv6 route, show arp, show interface に対応する。
+        利用するには numpy が必要。
+
+        Args:
+            cmd (str): 実行するコマンド
+
+        Returns:
+            ColumnTable: 列指向のテーブル
+        """
+        from .columnar import tables
+
+        return self.command_parsed(cmd, parsers=tables)
+
+    def command_to(self, cmd: str, out: IO[bytes] | os.PathLike) -> int:
+        """運用管理コマンドを実行し、実行結果をファイルまたはバッファに書き込む。
+
+        Args:
+            cmd (str): 実行するコマンド
+            out (IO[bytes] | os.PathLike): 書き込み先のバイナリファイルオブジェクトまたはファイルパス
+
+        Returns:
+            int: 書き込んだバイト数
+        """
+        return self._call(exec_command_to, cmd=cmd, out=out)
+
+    def commands_submit(self, cmd_list: list[CLI] | list[str] | list[str | CLI]) -> str:
+        """複数のCLI運用コマンドの実行を要求し、完了を待たずにCLIコマンドIDを返す。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト (最大10個)
+
+        Raises:
+            ValueError: コマンドが10個を超える場合
+
+        Returns:
+            str: CLIコマンドID
+        """
+        return str(self._call(exec_commands, cmd_list=to_cli_dicts(cmd_list))["clis_id"])
+
+    def commands_result(self, clis_id: str) -> dict:
+        """複数CLIコマンドの実行結果を取得する。
+
+        Args:
+            clis_id (str): CLIコマンドID
+
+        Returns:
+            dict: CLIコマンド実行結果。実行中の場合は status が Processing
+        """
+        return self._call(get_commands_result, clis_id=clis_id)
+
+    def commands_wait_result(
+        self, clis_id: str, cmds: list[str], poll: PollPolicy | None = None, delete: bool = True
+    ) -> dict:
+        """実行を要求済みの複数CLIコマンドの完了まで待機し、実行結果を返す。
+
+        Args:
+            clis_id (str): CLIコマンドID
+            cmds (list[str]): 実行を要求したコマンド。ポーリングポリシーの待機時間の目安に使用する
+            poll (PollPolicy | None, optional): ポーリングポリシー。Noneの場合は FixedPoll()
+            delete (bool, optional): 実行結果取得後に実行結果を機器から削除するかどうか
+
+        Raises:
+            TimeoutError: ポーリングポリシーの上限または期限までに完了しなかった場合
+
+        Returns:
+            dict: CLIコマンド実行結果
+        """
+        return self._wait_result(clis_id, cmds, poll or FixedPoll(), delete)
+
+    def commands_delete(self, clis_id: str) -> None:
+        """複数CLIコマンドの実行結果を機器から削除する。
+
+        Args:
+            clis_id (str): CLIコマンドID
+        """
+        self._call(delete_commands_result, clis_id=clis_id)
+
+    def commands_delete_all(self) -> None:
+        """機器上の全ての複数CLIコマンドの実行結果を削除する。他の利用者の実行結果も削除される。"""
+        self._call(delete_commands_result_all)
+
+    def commands_list(self) -> dict:
+        """機器上の複数CLIコマンドのCLIコマンドIDを一覧する。
+
+        Returns:
+            dict: get_clis_id_all の結果
+        """
+        return self._call(get_clis_id_all)
+
+    def _wait_result(self, clis_id: str, cmds: list[str], poll: PollPolicy, delete: bool) -> dict:
+        polls = 0
+        status = None
+        start = time.perf_counter()
+        try:
+            for delay in poll.delays(cmds):
+                if not can_wait(delay):
+                    raise TimeoutError("Deadline exceeded.")
+                time.sleep(delay)
+                res = self._call(get_commands_result, clis_id=clis_id)
+                polls += 1
+                if res["status"] != "Processing":
+                    status = res["status"]
+                    if delete:
+                        self._call(delete_commands_result, clis_id=clis_id)
+                    return res
+            raise TimeoutError("Command execution did not complete within the specified retries.")
+        finally:
+            if metrics.has_hooks():
+                metrics.emit(
+                    metrics.PollEvent(device_key(self._url), str(clis_id), polls, time.perf_counter() - start, status)
+                )
 
     def commands_wait(
         self,
@@ -62,52 +416,152 @@ class FITELnetAPI:
         retries: int = 5,
         interval: float = 1.0,
         delete: bool = True,
+        poll: PollPolicy | None = None,
+        deadline: float | None = None,
     ) -> dict:
         """複数のCLI運用コマンドを実行し、完了まで待機する。
 
+        コマンドが10個を超える場合は10個ずつに分割して実行し、実行結果を1つにまとめて返す。
+        分割した直前のコマンド群に on_fail_exit のコマンドが含まれない場合は、その完了を待たずに
+        次のコマンド群を送信する。on_fail_exit のコマンドが失敗した場合は以降のコマンド群を実行しない。
+
         Args:
             cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
             wait (float, optional): CLI実行後の初回待機秒数
             retries (int, optional): リトライ回数
             interval (float, optional): リトライ間隔(秒)
             delete (bool, optional): コマンド実行結果取得後に実行結果を機器から削除するかどうか
+            poll (PollPolicy | None, optional): ポーリングポリシー。指定した場合は wait, retries, interval を無視する
+            deadline (float | None, optional): 実行・ポーリング・削除全体の期限(秒)
 
         Raises:
             ValueError: retries must be 0 or more
-            TimeoutError: Command execution did not complete within the specified retries.
+            TimeoutError: Command execution did not complete within the specified retries or deadline.
 
         Returns:
             dict: CLIコマンド実行結果
         """
-        if retries < 0:
-            raise ValueError("retries must be 0 or more")
+        with deadline_scope(deadline):
+            return self._commands_wait(
+                cmd_list, poll or FixedPoll(wait=wait, retries=retries, interval=interval), delete
+            )
 
-        clis = {
-            "list": [cmd.to_dict() if isinstance(cmd, CLI) else CLI(str(cmd)).to_dict() for cmd in cmd_list],
-            "total": len(cmd_list),
-        }
-        res = exec_commands(cmd_list=clis["list"], **self._get_auth())
-        clis_id = res["clis_id"]
-
-        time.sleep(wait)
-        for _ in range(retries + 1):
-            res = get_commands_result(clis_id=clis_id, **self._get_auth())
-            if res["status"] != "Processing":
-                if delete:
-                    delete_commands_result(clis_id=clis_id, **self._get_auth())
-                return res
-            time.sleep(interval)
-        raise TimeoutError("Command execution did not complete within the specified retries.")
-
-    def config(self, config: bytes | str | list[str], commit: bool = True) -> None:
+    def commands_wait_compact(self, cmd_list: list[CLI] | list[str] | list[str | CLI], **kwargs) -> CommandsResult:
+        """commands_wait と同じ処理を行い、実行結果を CommandsResult で返す。
+
+        出力を bytes で保持するため、多数の機器の結果をメモリに保持する場合に辞書より使用メモリが少ない。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            **kwargs: commands_wait に渡す引数
+
+        Returns:
+            CommandsResult: CLIコマンド実行結果
+        """
+        return CommandsResult.from_dict(self.commands_wait(cmd_list, **kwargs))
+
+    def _commands_wait(self, cmd_list: list[CLI] | list[str] | list[str | CLI], poll: PollPolicy, delete: bool) -> dict:
+        clis = to_cli_dicts(cmd_list)
+        chunks = split_clis(clis)
+        if len(chunks) <= 1:
+            clis_id = self._call(exec_commands, cmd_list=clis)["clis_id"]
+            try:
+                return self._wait_result(clis_id, [cli["cmd"] for cli in clis], poll, delete)
+            except BaseException as e:
+                self._discard_jobs(e, [clis_id], delete)
+                raise
+
+        pending_chunks = iter(chunks)
+        submitted: list[tuple[str, list[dict]]] = []
+
+        def submit() -> None:
+            chunk = next(pending_chunks, None)
+            if chunk is not None:
+                submitted.append((self._call(exec_commands, cmd_list=chunk)["clis_id"], chunk))
+
+        results = []
+        submit()
+        try:
+            while submitted:
+                clis_id, chunk = submitted[0]
+                if len(submitted) == 1 and not has_exit_on_fail(chunk):
+                    submit()
+                res = self._wait_result(clis_id, [cli["cmd"] for cli in chunk], poll, delete)
+                submitted.pop(0)
+                results.append(res)
+                if is_aborted(res):
+                    break
+                if not submitted:
+                    submit()
+        except BaseException as e:
+            # 待機中のチャンクと先行して送信したチャンクが機器に残らないようにする
+            self._discard_jobs(e, [clis_id for clis_id, _ in submitted], delete)
+            raise
+        return merge_results(results, total=len(clis))
+
+    def _discard_jobs(self, error: BaseException, clis_ids: list[str], delete: bool) -> None:
+        """失敗したcommands_waitが機器に残したジョブを削除する。
+
+        期限切れの後でも CLEANUP_TIMEOUT 秒の範囲で削除を試みる。削除しなかった、または
+        削除できなかったジョブのclis_idは error の注記に残す。
+
+        Args:
+            error (BaseException): commands_wait が送出する例外
+            clis_ids (list[str]): 機器に残っているジョブのCLIコマンドID
+            delete (bool): ジョブを削除するかどうか
+        """
+        left = clis_ids
+        if delete:
+            left = []
+            with cleanup_scope(CLEANUP_TIMEOUT):
+                for clis_id in clis_ids:
+                    try:
+                        self.commands_delete(clis_id)
+                    except (FITELnetAPIError, CircuitOpenError, OSError):
+                        left.append(clis_id)
+        if left:
+            error.add_note(f"Jobs left on the device: clis_id={', '.join(map(str, left))}")
+
+    def config(self, config: ConfigSource, commit: bool = True, deadline: float | None = None) -> None:
         """構成定義を変更する
 
         Args:
-            config (bytes | str | list[str]): 構成定義
+            config (ConfigSource): 構成定義。bytes, str, ファイルパス, ファイルオブジェクト, 行のイテラブル
             commit (bool, optional): 構成定義適用後にcommitを実行すうるかどうか. デフォルトはTrue
+            deadline (float | None, optional): 構成定義の適用とcommit全体の期限(秒)
+
+        Raises:
+            FITELnetAPIError: use_token=True でアクセストークンが失効していた場合、ファイルオブジェクトや
+                イテレーターの構成定義は再送できないため、トークンを更新してHTTP 401のエラーを送出する
+        """
+        with deadline_scope(deadline):
+            self._call(update_config, config=config)
+            if commit:
+                self.commit()
+
+    def commit(self) -> str:
+        """commit を実行する。キャッシュは使用しない。
+
+        Returns:
+            str: コマンド実行結果
+        """
+        return self._call(exec_command, cmd="commit")
+
+    def sync_config(self, config: str, commit: bool = True, deadline: float | None = None) -> str:
+        """現在の構成定義との差分だけを送信して、構成定義を目的の状態にする。
+
+        show running-config の出力と比較し、差分がない場合は何も送信しない。
+
+        Args:
+            config (str): 目的の構成定義の全体
+            commit (bool, optional): 差分適用後にcommitを実行するかどうか
+            deadline (float | None, optional): 構成定義の取得・差分の適用・commit全体の期限(秒)
+
+        Returns:
+            str: 送信した差分。差分がない場合は空文字
         """
-        if isinstance(config, list):
-            config = "\n".join(config).encode()
-        update_config(config=config, **self._get_auth())
-        if commit:
-            self.command("commit")
+        with deadline_scope(deadline):
+            delta = diff_config(self.command("show running-config"), config)
+            if delta:
+                self.config(delta, commit=commit)
+        return delta
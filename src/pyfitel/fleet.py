@@ -0,0 +1,296 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Self
+
+from .core import deadline_scope
+from .fitel import CLI, FITELnetAPI
+from .results import CommandsResult
+
+logger = logging.getLogger(__name__)
+
+
+class FleetResult[T]:
+    """1台の機器に対する処理結果。"""
+
+    def __init__(self, value: T | None = None, error: BaseException | None = None, elapsed: float = 0.0) -> None:
+        """
+        Args:
+            value (T | None): 処理が成功した場合の戻り値
+            error (BaseException | None): 処理が失敗した場合の例外
+            elapsed (float): 処理に要した秒数
+        """
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"FleetResult(value={self.value!r}, elapsed={self.elapsed:.3f})"
+        return f"FleetResult(error={self.error!r}, elapsed={self.elapsed:.3f})"
+
+
+class _HostSlot:
+    """ホストの同時実行数の枠。
+
+    タイムアウトした処理の枠は処理の終了を待たずに解放するため、解放は1回だけ行う。
+    """
+
+    def __init__(self, semaphore: threading.BoundedSemaphore) -> None:
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+        self._released = False
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._semaphore.release()
+
+
+class FITELnetFleet:
+    """複数の機器に対してFITELnetAPIの操作を並列に実行する。"""
+
+    def __init__(
+        self,
+        devices: Mapping[str, FITELnetAPI],
+        max_workers: int = 32,
+        max_per_host: int = 1,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Args:
+            devices (Mapping[str, FITELnetAPI]): 機器名とFITELnetAPIの対応
+            max_workers (int, optional): 全体の最大同時実行数
+            max_per_host (int, optional): 1ホストあたりの最大同時実行数
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数。Noneの場合は無制限
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be 1 or more")
+        if max_per_host < 1:
+            raise ValueError("max_per_host must be 1 or more")
+        self._devices = dict(devices)
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._host_locks = {api.host: threading.BoundedSemaphore(max_per_host) for api in self._devices.values()}
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def devices(self) -> dict[str, FITELnetAPI]:
+        return self._devices
+
+    def close(self) -> None:
+        """全ての機器とのセッションを切断する。"""
+        for api in self._devices.values():
+            try:
+                api.close()
+            except Exception:
+                logger.warning("failed to close session for %s", api.url, exc_info=True)
+
+    def _run_one[T](
+        self,
+        name: str,
+        api: FITELnetAPI,
+        func: Callable[[str, FITELnetAPI], T],
+        started: dict[str, float],
+        slots: dict[str, _HostSlot],
+        timeout: float | None,
+    ) -> FleetResult[T]:
+        semaphore = self._host_locks[api.host]
+        semaphore.acquire()
+        slot = slots[name] = _HostSlot(semaphore)
+        start = time.monotonic()
+        started[name] = start
+        try:
+            with deadline_scope(timeout):
+                return FleetResult(value=func(name, api), elapsed=time.monotonic() - start)
+        except Exception as e:  # noqa: BLE001 - 例外は FleetResult.error で呼び出し元に返す
+            return FleetResult(error=e, elapsed=time.monotonic() - start)
+        finally:
+            slot.release()
+
+    def iter_run[T](
+        self, func: Callable[[FITELnetAPI], T], timeout: float | None = None
+    ) -> Iterator[tuple[str, FleetResult[T]]]:
+        """全ての機器に対して任意の処理を並列に実行し、完了した機器から順に結果を返す。
+
+        タイムアウトした機器の結果には TimeoutError が格納される。各機器の処理には timeout 秒の
+        期限(deadline_scope)が設定されるため、タイムアウト後のAPIリクエストは送信されない。
+        タイムアウトした機器が使用していたホストの同時実行数の枠は、処理の終了を待たずに解放する。
+        途中で反復を終了した場合、未実行の機器の処理は取り消される。
+
+        Args:
+            func (Callable[[FITELnetAPI], T]): 各機器に対して実行する処理
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数。Noneの場合はコンストラクタの値を使用する
+
+        Returns:
+            Iterator[tuple[str, FleetResult[T]]]: 機器名と処理結果
+        """
+        return self._iter_run(lambda name, api: func(api), timeout)
+
+    def _iter_run[T](
+        self, func: Callable[[str, FITELnetAPI], T], timeout: float | None
+    ) -> Iterator[tuple[str, FleetResult[T]]]:
+        if timeout is None:
+            timeout = self._timeout
+        started: dict[str, float] = {}
+        slots: dict[str, _HostSlot] = {}
+
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pyfitel-fleet")
+        try:
+            futures: dict[Future[FleetResult[T]], str] = {
+                executor.submit(self._run_one, name, api, func, started, slots, timeout): name
+                for name, api in self._devices.items()
+            }
+            pending = set(futures)
+            while pending:
+                wait_time = None
+                if timeout is not None:
+                    now = time.monotonic()
+                    deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+                    wait_time = max(0.0, min(deadlines, default=now + timeout) - now)
+                done, pending = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+                for f in done:
+                    yield futures[f], f.result()
+                if timeout is not None:
+                    now = time.monotonic()
+                    for f in list(pending):
+                        name = futures[f]
+                        if name in started and now - started[name] >= timeout:
+                            pending.discard(f)
+                            slots[name].release()
+                            yield (
+                                name,
+                                FleetResult(
+                                    error=TimeoutError(f"{name}: operation did not complete within {timeout} seconds."),
+                                    elapsed=now - started[name],
+                                ),
+                            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run[T](self, func: Callable[[FITELnetAPI], T], timeout: float | None = None) -> dict[str, FleetResult[T]]:
+        """全ての機器に対して任意の処理を並列に実行する。
+
+        タイムアウトした機器の結果には TimeoutError が格納される。各機器の処理には timeout 秒の
+        期限(deadline_scope)が設定されるため、タイムアウト後のAPIリクエストは送信されない。
+
+        Args:
+            func (Callable[[FITELnetAPI], T]): 各機器に対して実行する処理
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数。Noneの場合はコンストラクタの値を使用する
+
+        Returns:
+            dict[str, FleetResult[T]]: 機器名ごとの処理結果
+        """
+        return self.run_named(lambda name, api: func(api), timeout=timeout)
+
+    def run_named[T](
+        self, func: Callable[[str, FITELnetAPI], T], timeout: float | None = None
+    ) -> dict[str, FleetResult[T]]:
+        """全ての機器に対して、機器名を受け取る任意の処理を並列に実行する。
+
+        同じ FITELnetAPI を複数の機器名で登録した場合も、機器名ごとに別々に実行する。
+        タイムアウトの扱いは run() と同じ。
+
+        Args:
+            func (Callable[[str, FITELnetAPI], T]): 機器名とFITELnetAPIを受け取り、各機器に対して実行する処理
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数。Noneの場合はコンストラクタの値を使用する
+
+        Returns:
+            dict[str, FleetResult[T]]: 機器名ごとの処理結果
+        """
+        results = dict(self._iter_run(func, timeout))
+        return {name: results[name] for name in self._devices}
+
+    def command(self, cmd: str, timeout: float | None = None) -> dict[str, FleetResult[str]]:
+        """全ての機器で運用管理コマンドを実行する。
+
+        Args:
+            cmd (str): 実行するコマンド
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+
+        Returns:
+            dict[str, FleetResult[str]]: 機器名ごとのコマンド実行結果
+        """
+        return self.run(lambda api: api.command(cmd), timeout=timeout)
+
+    def commands_wait(
+        self,
+        cmd_list: list[CLI] | list[str] | list[str | CLI],
+        timeout: float | None = None,
+        **kwargs,
+    ) -> dict[str, FleetResult[dict]]:
+        """全ての機器で複数のCLI運用コマンドを実行し、完了まで待機する。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+            **kwargs: FITELnetAPI.commands_wait に渡す引数
+
+        Returns:
+            dict[str, FleetResult[dict]]: 機器名ごとのCLIコマンド実行結果
+        """
+        return self.run(lambda api: api.commands_wait(cmd_list, **kwargs), timeout=timeout)
+
+    def commands_wait_compact(
+        self,
+        cmd_list: list[CLI] | list[str] | list[str | CLI],
+        timeout: float | None = None,
+        **kwargs,
+    ) -> dict[str, FleetResult[CommandsResult]]:
+        """全ての機器で複数のCLI運用コマンドを実行し、実行結果を CommandsResult で返す。
+
+        多数の機器の結果をまとめて保持する場合に commands_wait より使用メモリが少ない。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+            **kwargs: FITELnetAPI.commands_wait に渡す引数
+
+        Returns:
+            dict[str, FleetResult[CommandsResult]]: 機器名ごとのCLIコマンド実行結果
+        """
+        return self.run(lambda api: api.commands_wait_compact(cmd_list, **kwargs), timeout=timeout)
+
+    def config(
+        self, config: bytes | str | list[str] | os.PathLike, commit: bool = True, timeout: float | None = None
+    ) -> dict[str, FleetResult[None]]:
+        """全ての機器の構成定義を変更する。
+
+        Args:
+            config (bytes | str | list[str] | os.PathLike): 構成定義。全ての機器に送信するため、ファイルオブジェクトやイテレーターは指定できない
+            commit (bool, optional): 構成定義適用後にcommitを実行するかどうか
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+
+        Returns:
+            dict[str, FleetResult[None]]: 機器名ごとの処理結果
+        """
+        return self.run(lambda api: api.config(config, commit=commit), timeout=timeout)
+
+    def sync_config(
+        self, config: str, commit: bool = True, timeout: float | None = None
+    ) -> dict[str, FleetResult[str]]:
+        """全ての機器で現在の構成定義との差分だけを送信して、構成定義を目的の状態にする。
+
+        Args:
+            config (str): 目的の構成定義の全体
+            commit (bool, optional): 差分適用後にcommitを実行するかどうか
+            timeout (float | None, optional): 1台あたりのタイムアウト秒数
+
+        Returns:
+            dict[str, FleetResult[str]]: 機器名ごとの送信した差分。差分がない機器は空文字
+        """
+        return self.run(lambda api: api.sync_config(config, commit=commit), timeout=timeout)
@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from .fitel import FITELnetAPI
+
+_TRUE = frozenset({"1", "true", "yes", "on"})
+
+
+class Device(NamedTuple):
+    """インベントリの機器1台分の接続情報。"""
+
+    name: str
+    host: str
+    port: int
+    tls: bool
+    user: str
+    password: str
+    use_token: bool
+
+    def api(self, timeout: float | None = None) -> FITELnetAPI:
+        """機器に接続する FITELnetAPI を作成する。"""
+        return FITELnetAPI(
+            self.host, self.port, self.user, self.password, tls=self.tls, use_token=self.use_token, timeout=timeout
+        )
+
+
+def _bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE
+
+
+def _credential(entry: Mapping[str, Any], key: str, default: str | None) -> str:
+    value = entry.get(key)
+    if value not in (None, ""):
+        return str(value)
+    env = entry.get(f"{key}_env")
+    if env not in (None, ""):
+        if env not in os.environ:
+            raise ValueError(f"environment variable {env} is not set")
+        return os.environ[env]
+    if default is None:
+        raise ValueError(f"{key} is not set for {entry.get('name') or entry.get('host')}")
+    return default
+
+
+def parse_device(entry: Mapping[str, Any], user: str | None = None, password: str | None = None) -> Device:
+    """インベントリの1行を機器の接続情報に変換する。
+
+    認証情報は user/password を直接指定するか、user_env/password_env で環境変数名を指定する。
+    どちらもない場合は引数の既定値を使用する。
+
+    Args:
+        entry (Mapping[str, Any]): name, host, port, tls, user, password, user_env, password_env, use_token
+        user (str | None, optional): 既定のユーザー名
+        password (str | None, optional): 既定のパスワード
+
+    Raises:
+        ValueError: host や認証情報が指定されていない場合
+
+    Returns:
+        Device: 機器の接続情報
+    """
+    host = str(entry.get("host") or "").strip()
+    if not host:
+        raise ValueError(f"host is not set: {dict(entry)}")
+    tls = _bool(entry.get("tls", False))
+    port = entry.get("port")
+    return Device(
+        name=str(entry.get("name") or host),
+        host=host,
+        port=int(port) if port not in (None, "") else (443 if tls else 80),
+        tls=tls,
+        user=_credential(entry, "user", user),
+        password=_credential(entry, "password", password),
+        use_token=_bool(entry.get("use_token", False)),
+    )
+
+
+def _load_entries(path: Path) -> list[Mapping[str, Any]]:
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="") as f:
+            try:
+                return list(csv.DictReader(f))
+            except csv.Error as e:
+                raise ValueError(f"invalid CSV inventory {path.name}: {e}") from e
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required for YAML inventories. Install it with `pip install pyfitel[yaml]`.")
+        with open(path) as f:
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"invalid YAML inventory {path.name}: {e}") from e
+    elif suffix == ".json":
+        with open(path) as f:
+            data = json.load(f)
+    else:
+        raise ValueError(f"unsupported inventory format: {path.name}")
+    if isinstance(data, Mapping):
+        data = data.get("devices", [])
+    data = data or []
+    if not isinstance(data, list) or not all(isinstance(entry, Mapping) for entry in data):
+        raise ValueError(f"inventory must be a list of devices: {path.name}")
+    return data
+
+
+def load_inventory(path: str | os.PathLike, user: str | None = None, password: str | None = None) -> dict[str, Device]:
+    """インベントリファイル(CSV, JSON, YAML)を読み込む。
+
+    JSON と YAML は機器のリスト、または devices キーに機器のリストを持つオブジェクトを指定する。
+
+    Args:
+        path (str | os.PathLike): インベントリファイルのパス。拡張子で形式を判別する
+        user (str | None, optional): 既定のユーザー名
+        password (str | None, optional): 既定のパスワード
+
+    Raises:
+        ValueError: 形式が不正な場合、ファイルを解析できない場合や機器名が重複している場合
+
+    Returns:
+        dict[str, Device]: 機器名と接続情報の対応
+    """
+    devices: dict[str, Device] = {}
+    for entry in _load_entries(Path(path)):
+        device = parse_device(entry, user=user, password=password)
+        if device.name in devices:
+            raise ValueError(f"duplicate device name: {device.name}")
+        devices[device.name] = device
+    return devices
@@ -0,0 +1,139 @@
+import time
+from collections.abc import Iterable
+
+from .core import FITELnetAPIError, can_wait, deadline_scope
+from .fitel import CLI, FITELnetAPI, to_cli_dicts
+from .poll import BackoffPoll, PollPolicy
+
+
+def listed_jobs(listing: dict) -> dict[str, str | None]:
+    """get_clis_id_all の結果を、CLIコマンドIDと状態の対応に変換する。
+
+    Args:
+        listing (dict): get_clis_id_all の結果
+    Returns:
+        dict[str, str | None]: CLIコマンドIDと状態の対応。状態が含まれない場合はNone
+    """
+    return {str(item["clis_id"]): item.get("status") for item in listing.get("data", [])}
+
+
+class JobManager:
+    """1台の機器に複数のCLIコマンド複数実行(/api/v1/clis)のジョブを投入し、まとめて結果を回収する。
+
+    完了したジョブは get_clis_id_all の一覧1回で検出し、完了したジョブの結果だけを取得する。
+    ポーリング1回あたりのリクエストが完了したジョブ数に比例するのは、一覧に各ジョブの状態が含まれる
+    機器の場合に限られる。状態が含まれない機器では、一覧にある未回収のジョブの結果を毎回個別に取得する。
+    一覧にないジョブは取得しない。
+
+    機器上のジョブが全てこのマネージャーの回収済みのジョブの場合は delete_commands_result_all
+    1回で結果を削除し、それ以外の場合は自分のジョブだけを個別に削除する。
+    """
+
+    def __init__(self, api: FITELnetAPI, poll: PollPolicy | None = None) -> None:
+        """
+        Args:
+            api (FITELnetAPI): ジョブを投入する機器
+            poll (PollPolicy | None, optional): 一覧取得のポーリングポリシー。Noneの場合は BackoffPoll()
+        """
+        self._api = api
+        self._poll = poll or BackoffPoll()
+        self._pending: dict[str, list[str]] = {}
+        self._results: dict[str, dict] = {}
+        self._listing: dict[str, str | None] | None = None
+
+    @property
+    def pending(self) -> list[str]:
+        """結果を回収していないジョブのCLIコマンドID。"""
+        return list(self._pending)
+
+    def submit(self, cmd_list: list[CLI] | list[str] | list[str | CLI]) -> str:
+        """ジョブを投入する。
+
+        Args:
+            cmd_list (list[CLI] | list[str] | list[str | CLI]): CLIコマンドのリスト (最大10個)
+
+        Raises:
+            ValueError: コマンドが10個を超える場合
+
+        Returns:
+            str: CLIコマンドID
+        """
+        clis_id = self._api.commands_submit(cmd_list)
+        self._pending[clis_id] = [cli["cmd"] for cli in to_cli_dicts(cmd_list)]
+        return clis_id
+
+    def submit_many(self, jobs: Iterable[list[CLI] | list[str] | list[str | CLI]]) -> list[str]:
+        """複数のジョブを投入する。
+
+        Args:
+            jobs (Iterable[list[CLI] | list[str] | list[str | CLI]]): ジョブごとのCLIコマンドのリスト
+
+        Returns:
+            list[str]: ジョブごとのCLIコマンドID
+        """
+        return [self.submit(cmd_list) for cmd_list in jobs]
+
+    def _harvest(self) -> None:
+        listing = listed_jobs(self._api.commands_list())
+        self._listing = listing
+        for clis_id in list(self._pending):
+            if clis_id not in listing or listing[clis_id] == "Processing":
+                continue
+            result = self._api.commands_result(clis_id)
+            if result["status"] != "Processing":
+                self._results[clis_id] = result
+                del self._pending[clis_id]
+
+    def _delete(self, clis_id: str) -> None:
+        try:
+            self._api.commands_delete(clis_id)
+        except FITELnetAPIError as e:
+            if e.http_code != 404:
+                raise
+
+    def _cleanup(self, collected: list[str]) -> None:
+        if not collected:
+            return
+        # 未回収のジョブがなく、機器上のジョブが全て回収済みの自分のジョブの場合だけ一括削除する。
+        # 直前に一覧を取得し直し、他の利用者のジョブが現れていれば個別削除にする。
+        # 一覧の取得から一括削除までの間に投入された他の利用者のジョブは削除されうるが、その間隔は1リクエスト分に限られる
+        own = set(collected)
+        bulk = not self._pending and self._listing is not None and set(self._listing) <= own
+        if bulk and set(listed_jobs(self._api.commands_list())) <= own:
+            self._api.commands_delete_all()
+            return
+        for clis_id in collected:
+            self._delete(clis_id)
+
+    def wait(self, delete: bool = True, deadline: float | None = None) -> dict[str, dict]:
+        """投入した全てのジョブの完了を待ち、結果を回収する。
+
+        Args:
+            delete (bool, optional): 回収した結果を機器から削除するかどうか
+            deadline (float | None, optional): 回収全体の期限(秒)
+
+        Raises:
+            TimeoutError: ポーリングポリシーの上限または期限までに全てのジョブが完了しなかった場合。
+                完了したジョブの結果は次回の wait() で返す
+
+        Returns:
+            dict[str, dict]: CLIコマンドIDごとの実行結果
+        """
+        collected = [*self._results, *self._pending]
+        self._listing = None
+        with deadline_scope(deadline):
+            try:
+                delays = self._poll.delays([cmd for cmds in self._pending.values() for cmd in cmds])
+                for delay in delays:
+                    if not self._pending:
+                        break
+                    if not can_wait(delay):
+                        raise TimeoutError("Deadline exceeded.")
+                    time.sleep(delay)
+                    self._harvest()
+                if self._pending:
+                    raise TimeoutError(f"Jobs did not complete: {', '.join(self._pending)}")
+            finally:
+                if delete:
+                    self._cleanup([clis_id for clis_id in collected if clis_id in self._results])
+        return {clis_id: self._results.pop(clis_id) for clis_id in collected}
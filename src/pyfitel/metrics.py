@@ -0,0 +1,317 @@
+import bisect
+import logging
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+_CLIS_ID_RE = re.compile(r"^/api/v1/clis/\d+$")
+_TOKEN_RE = re.compile(r"^/api/v1/token/[^/]+$")
+
+
+def endpoint_template(endpoint: str) -> str:
+    """エンドポイントURLに含まれる実行IDやアクセストークンを置き換え、集計用のテンプレートにする。
+
+    Args:
+        endpoint (str): APIエンドポイントURL
+    Returns:
+        str: /api/v1/clis/{id} や /api/v1/token/{token} の形式のエンドポイント
+    """
+    path = "/" + endpoint.lstrip("/")
+    path = _CLIS_ID_RE.sub("/api/v1/clis/{id}", path)
+    return _TOKEN_RE.sub("/api/v1/token/{token}", path)
+
+
+class RequestEvent(NamedTuple):
+    """1回のAPI呼び出し(リトライを含む)の計測結果。"""
+
+    device: str
+    method: str
+    endpoint: str
+    status: int | None
+    bytes_sent: int | None
+    bytes_received: int | None
+    elapsed: float
+    response_time: float | None
+    retries: int
+    error: str | None
+
+
+class PollEvent(NamedTuple):
+    """複数コマンド実行結果のポーリングの計測結果。"""
+
+    device: str
+    clis_id: str
+    polls: int
+    elapsed: float
+    status: str | None
+
+
+type Event = RequestEvent | PollEvent
+type Hook = Callable[[Event], None]
+
+_hooks: tuple[Hook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> Hook:
+    """API呼び出しとポーリングの計測結果を受け取るフックを登録する。
+
+    フックは呼び出したスレッドで同期的に実行される。フック内で発生した例外はログに記録して無視する。
+
+    Args:
+        hook (Hook): RequestEvent または PollEvent を受け取る関数
+    Returns:
+        Hook: 登録したフック
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = (*_hooks, hook)
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    """登録したフックを削除する。
+
+    Args:
+        hook (Hook): 削除するフック
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def has_hooks() -> bool:
+    """フックが登録されているかどうかを返す。"""
+    return bool(_hooks)
+
+
+def emit(event: Event) -> None:
+    """登録された全てのフックに計測結果を渡す。
+
+    Args:
+        event (Event): 計測結果
+    """
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("pyfitel metrics hook %r failed", hook)
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class LatencyHistogram:
+    """API呼び出しの所要時間をメソッドとエンドポイントごとにヒストグラムで集計するフック。
+
+    add_hook() に登録して使用する。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            buckets (Sequence[float], optional): バケットの上限秒数の昇順のリスト
+        """
+        if list(buckets) != sorted(buckets) or len(buckets) == 0:
+            raise ValueError("buckets must be a non-empty ascending sequence")
+        self._buckets = tuple(buckets)
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self._buckets
+
+    def __call__(self, event: Event) -> None:
+        if isinstance(event, RequestEvent):
+            self.observe(f"{event.method} {event.endpoint}", event.elapsed)
+
+    def observe(self, key: str, seconds: float) -> None:
+        """所要時間を記録する。
+
+        Args:
+            key (str): 集計キー
+            seconds (float): 所要時間(秒)
+        """
+        index = bisect.bisect_left(self._buckets, seconds)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self._buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += seconds
+
+    def count(self, key: str | None = None) -> int:
+        """記録した件数を返す。
+
+        Args:
+            key (str | None, optional): 集計キー。Noneの場合は全てのキーの合計
+        """
+        with self._lock:
+            if key is None:
+                return sum(sum(counts) for counts in self._counts.values())
+            return sum(self._counts.get(key, ()))
+
+    def quantile(self, q: float, key: str | None = None) -> float | None:
+        """所要時間の分位数の推定値(該当するバケットの上限)を返す。
+
+        Args:
+            q (float): 分位 (0.0 - 1.0)
+            key (str | None, optional): 集計キー。Noneの場合は全てのキーの合計
+        Returns:
+            float | None: 分位数の推定値。記録がない場合はNone。最大のバケットを超える場合は inf
+        """
+        with self._lock:
+            rows = list(self._counts.values()) if key is None else [self._counts.get(key, [])]
+            counts = [sum(column) for column in zip(*rows)] if any(rows) else []
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip((*self._buckets, float("inf")), counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict[str, dict]:
+        """集計キーごとの件数、合計秒数、バケットごとの累積件数を返す。
+
+        Returns:
+            dict[str, dict]: {"GET /api/v1/clis/{id}": {"count": 3, "sum": 0.12, "buckets": {0.005: 0, ...}}}
+        """
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        snapshot = {}
+        for key, counts, total in items:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip((*self._buckets, float("inf")), counts):
+                cumulative += count
+                buckets[bound] = cumulative
+            snapshot[key] = {"count": cumulative, "sum": total, "buckets": buckets}
+        return snapshot
+
+    def reset(self) -> None:
+        """記録を全て削除する。"""
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class DeviceCounters:
+    """機器ごとのリクエスト数、エラー数、リトライ数、送受信バイト数、ポーリング回数を集計するフック。
+
+    add_hook() に登録して使用する。
+    """
+
+    def __init__(self) -> None:
+        self._counters: dict[str, Counter[str]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        with self._lock:
+            counter = self._counters.setdefault(event.device, Counter())
+            if isinstance(event, RequestEvent):
+                counter["requests"] += 1
+                counter["retries"] += event.retries
+                counter["bytes_sent"] += event.bytes_sent or 0
+                counter["bytes_received"] += event.bytes_received or 0
+                if event.error is not None:
+                    counter["errors"] += 1
+            else:
+                counter["jobs"] += 1
+                counter["polls"] += event.polls
+                if event.status is None:
+                    counter["timeouts"] += 1
+
+    def get(self, device: str) -> dict[str, int]:
+        """機器の集計値を返す。
+
+        Args:
+            device (str): 機器を識別するキー(スキーム://ホスト:ポート)
+        Returns:
+            dict[str, int]: 集計項目と値
+        """
+        with self._lock:
+            return dict(self._counters.get(device, {}))
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """全ての機器の集計値を返す。"""
+        with self._lock:
+            return {device: dict(counter) for device, counter in self._counters.items()}
+
+    def reset(self) -> None:
+        """集計値を全て削除する。"""
+        with self._lock:
+            self._counters.clear()
+
+
+class OpenTelemetryExporter:
+    """計測結果を OpenTelemetry のメトリクスとして記録するフック。
+
+    OpenTelemetry SDK の MeterProvider に OTLP エクスポーターを設定すれば、ローカルのコレクターに送信できる。
+    利用するには `pip install pyfitel[otel]` で opentelemetry-api をインストールする必要がある。
+    """
+
+    def __init__(self, meter_provider=None) -> None:
+        """
+        Args:
+            meter_provider (MeterProvider | None, optional): 使用する MeterProvider。Noneの場合はグローバルの設定
+        """
+        # opentelemetry は読み込みに時間がかかるため、使用するときに読み込む
+        try:
+            from opentelemetry import metrics as otel_metrics
+        except ImportError:
+            raise ImportError(
+                "opentelemetry-api is required for OpenTelemetryExporter. Install it with `pip install pyfitel[otel]`."
+            ) from None
+        meter = otel_metrics.get_meter("pyfitel", meter_provider=meter_provider)
+        self._duration = meter.create_histogram(
+            "pyfitel.request.duration", unit="s", description="API呼び出し全体の所要時間(リトライを含む)"
+        )
+        self._response_time = meter.create_histogram(
+            "pyfitel.request.response_time", unit="s", description="最後の試行の送信開始からレスポンスヘッダー受信まで"
+        )
+        self._retries = meter.create_counter("pyfitel.request.retries", description="リトライ回数")
+        self._bytes_sent = meter.create_counter("pyfitel.request.bytes_sent", unit="By", description="送信バイト数")
+        self._bytes_received = meter.create_counter(
+            "pyfitel.request.bytes_received", unit="By", description="受信バイト数"
+        )
+        self._polls = meter.create_histogram("pyfitel.clis.polls", description="複数コマンド実行結果のポーリング回数")
+        self._poll_duration = meter.create_histogram(
+            "pyfitel.clis.duration", unit="s", description="複数コマンド実行結果の取得までの所要時間"
+        )
+
+    def __call__(self, event: Event) -> None:
+        if isinstance(event, PollEvent):
+            attributes = {"pyfitel.device": event.device, "pyfitel.clis.status": event.status or "timeout"}
+            self._polls.record(event.polls, attributes)
+            self._poll_duration.record(event.elapsed, attributes)
+            return
+
+        attributes: dict[str, str | int] = {
+            "pyfitel.device": event.device,
+            "http.request.method": event.method,
+            "url.template": event.endpoint,
+        }
+        if event.status is not None:
+            attributes["http.response.status_code"] = event.status
+        if event.error is not None:
+            attributes["error.type"] = event.error
+        self._duration.record(event.elapsed, attributes)
+        if event.response_time is not None:
+            self._response_time.record(event.response_time, attributes)
+        if event.retries:
+            self._retries.add(event.retries, attributes)
+        if event.bytes_sent:
+            self._bytes_sent.add(event.bytes_sent, attributes)
+        if event.bytes_received:
+            self._bytes_received.add(event.bytes_received, attributes)
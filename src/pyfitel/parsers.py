@@ -0,0 +1,275 @@
+import re
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, NamedTuple
+
+type Parser = Callable[[Iterable[str]], Any]
+
+
+class Route(NamedTuple):
+    """show ip route / show ipv6 route の経路。"""
+
+    protocol: str
+    prefix: str
+    nexthop: str | None
+    interface: str | None
+    distance: int | None
+    metric: int | None
+    selected: bool
+    fib: bool
+
+
+class ArpEntry(NamedTuple):
+    """show arp のエントリー。"""
+
+    address: str
+    mac: str
+    interface: str | None
+
+
+class NeighborEntry(NamedTuple):
+    """show ipv6 neighbors のエントリー。"""
+
+    address: str
+    mac: str
+    state: str | None
+    interface: str | None
+
+
+class InterfaceStatus(NamedTuple):
+    """show interface のインターフェース情報。"""
+
+    name: str
+    status: str
+    protocol: str | None
+    address: str | None
+    mtu: int | None
+    input_packets: int | None
+    input_bytes: int | None
+    output_packets: int | None
+    output_bytes: int | None
+
+
+class ParserRegistry:
+    """コマンドと出力パーサーの対応を管理する。
+
+    コマンドは空白を正規化した前方一致で検索し、最も長く一致したパーサーを使用する。
+    パーサーは出力の各行を受け取り、1回の走査で解析結果(通常はレコードのリスト)を返す関数とする。
+    """
+
+    def __init__(self) -> None:
+        self._parsers: dict[str, Parser] = {}
+
+    @staticmethod
+    def _normalize(cmd: str) -> str:
+        return " ".join(cmd.split("|", 1)[0].split())
+
+    def register(self, command: str, parser: Parser) -> None:
+        """パーサーを登録する。同じコマンドのパーサーは置き換えられる。
+
+        Args:
+            command (str): コマンド(前方一致)
+            parser (Parser): 出力の各行を受け取り解析結果を返す関数
+        """
+        self._parsers[self._normalize(command)] = parser
+
+    def get(self, cmd: str) -> Parser | None:
+        """コマンドに対応するパーサーを返す。
+
+        Args:
+            cmd (str): コマンド
+        Returns:
+            Parser | None: パーサー。登録がない場合はNone
+        """
+        cmd = self._normalize(cmd)
+        matches = [command for command in self._parsers if cmd == command or cmd.startswith(command + " ")]
+        if not matches:
+            return None
+        return self._parsers[max(matches, key=len)]
+
+    def parse(self, cmd: str, output: str | Iterable[str]) -> Any:
+        """コマンドの出力を解析する。
+
+        Args:
+            cmd (str): コマンド
+            output (str | Iterable[str]): コマンドの出力、または出力の各行
+        Returns:
+            Any: 解析結果
+        Raises:
+            KeyError: コマンドに対応するパーサーが登録されていない場合
+        """
+        parser = self.get(cmd)
+        if parser is None:
+            raise KeyError(f"No parser registered for command: {cmd}")
+        return parser(output.splitlines() if isinstance(output, str) else output)
+
+
+registry = ParserRegistry()
+
+
+def register_parser(command: str) -> Callable[[Parser], Parser]:
+    """既定のレジストリにパーサーを登録するデコレーター。
+
+    Args:
+        command (str): コマンド(前方一致)
+    Returns:
+        Callable[[Parser], Parser]: デコレーター
+    """
+
+    def decorator(parser: Parser) -> Parser:
+        registry.register(command, parser)
+        return parser
+
+    return decorator
+
+
+def parse_output(cmd: str, output: str | Iterable[str]) -> Any:
+    """既定のレジストリを使用してコマンドの出力を解析する。
+
+    Args:
+        cmd (str): コマンド
+        output (str | Iterable[str]): コマンドの出力、または出力の各行
+    Returns:
+        Any: 解析結果のレコードのリスト
+    """
+    return registry.parse(cmd, output)
+
+
+_ROUTE_RE = re.compile(
+    r"^(?P<protocol>[A-Za-z][A-Za-z0-9]?)\s*(?P<selected>>)?\s*(?P<fib>\*)?\s+"
+    r"(?P<prefix>[0-9A-Fa-f:.]+/\d+)"
+    r"(?:\s+\[(?P<distance>\d+)/(?P<metric>\d+)\])?"
+    r"\s+(?:via\s+(?P<nexthop>[0-9A-Fa-f:.]+)|is directly connected)"
+    r"(?:,\s*(?P<interface>[^,\s]+))?"
+)
+_ROUTE_NEXTHOP_RE = re.compile(
+    r"^\s+(?P<selected>>)?\s*(?P<fib>\*)?\s*"
+    r"(?:\[(?P<distance>\d+)/(?P<metric>\d+)\]\s+)?"
+    r"via\s+(?P<nexthop>[0-9A-Fa-f:.]+)"
+    r"(?:,\s*(?P<interface>[^,\s]+))?"
+)
+
+
+def _int(value: str | None) -> int | None:
+    return None if value is None else int(value)
+
+
+def iter_routes(lines: Iterable[str]) -> Iterator[Route]:
+    """show ip route / show ipv6 route の出力から経路を順に返す。
+
+    ECMP の2つ目以降のネクストホップ行は直前の経路のプレフィックスを引き継ぐ。
+    """
+    last: Route | None = None
+    for line in lines:
+        m = _ROUTE_RE.match(line)
+        if m is not None:
+            last = Route(
+                m["protocol"],
+                m["prefix"],
+                m["nexthop"],
+                m["interface"],
+                _int(m["distance"]),
+                _int(m["metric"]),
+                m["selected"] is not None,
+                m["fib"] is not None,
+            )
+            yield last
+            continue
+        if last is None:
+            continue
+        m = _ROUTE_NEXTHOP_RE.match(line)
+        if m is not None:
+            yield last._replace(
+                nexthop=m["nexthop"],
+                interface=m["interface"],
+                distance=_int(m["distance"]) if m["distance"] else last.distance,
+                metric=_int(m["metric"]) if m["metric"] else last.metric,
+                selected=m["selected"] is not None,
+                fib=m["fib"] is not None,
+            )
+
+
+@register_parser("show ip route")
+@register_parser("show ipv6 route")
+def parse_route(lines: Iterable[str]) -> list[Route]:
+    """show ip route / show ipv6 route の出力を解析する。"""
+    return list(iter_routes(lines))
+
+
+_MAC_PATTERN = r"[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}|(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}"
+_ARP_RE = re.compile(
+    rf"^\s*(?P<address>\d{{1,3}}(?:\.\d{{1,3}}){{3}})\s+(?:\S+\s+)*?(?P<mac>{_MAC_PATTERN})(?:\s+(?P<interface>\S+))?"
+)
+_NEIGHBOR_RE = re.compile(
+    rf"^\s*(?P<address>[0-9A-Fa-f]*:[0-9A-Fa-f:.]*)(?:%\S+)?\s+(?:\S+\s+)*?(?P<mac>{_MAC_PATTERN})"
+    r"(?:\s+(?P<state>[A-Z]{3,}))?(?:\s+(?P<interface>\S+))?\s*$"
+)
+
+
+def iter_arp(lines: Iterable[str]) -> Iterator[ArpEntry]:
+    """show arp の出力からエントリーを順に返す。IPv4アドレスとMACアドレスを含む行をエントリーとして扱う。"""
+    for line in lines:
+        m = _ARP_RE.match(line)
+        if m is not None:
+            yield ArpEntry(m["address"], m["mac"].lower(), m["interface"])
+
+
+@register_parser("show arp")
+def parse_arp(lines: Iterable[str]) -> list[ArpEntry]:
+    """show arp の出力を解析する。"""
+    return list(iter_arp(lines))
+
+
+def iter_neighbors(lines: Iterable[str]) -> Iterator[NeighborEntry]:
+    """show ipv6 neighbors の出力からエントリーを順に返す。IPv6アドレスとMACアドレスを含む行をエントリーとして扱う。"""
+    for line in lines:
+        m = _NEIGHBOR_RE.match(line)
+        if m is not None:
+            yield NeighborEntry(m["address"], m["mac"].lower(), m["state"], m["interface"])
+
+
+@register_parser("show ipv6 neighbors")
+def parse_neighbors(lines: Iterable[str]) -> list[NeighborEntry]:
+    """show ipv6 neighbors の出力を解析する。"""
+    return list(iter_neighbors(lines))
+
+
+_IF_HEADER_RE = re.compile(r"^(?P<name>\S+) is (?P<status>[^,]+?)(?:, line protocol is (?P<protocol>\S+?))?\s*$")
+_IF_ADDRESS_RE = re.compile(r"^\s+Internet address is (?P<address>\S+)")
+_IF_MTU_RE = re.compile(r"\bMTU (?P<mtu>\d+)")
+_IF_INPUT_RE = re.compile(r"^\s+(?P<packets>\d+) packets input, (?P<bytes>\d+) bytes")
+_IF_OUTPUT_RE = re.compile(r"^\s+(?P<packets>\d+) packets output, (?P<bytes>\d+) bytes")
+
+
+def iter_interfaces(lines: Iterable[str]) -> Iterator[InterfaceStatus]:
+    """show interface の出力からインターフェース情報を順に返す。
+
+    インデントのない "<name> is <status>" の行ごとに1つのインターフェースとして扱い、
+    続くインデントされた行からアドレス、MTU、入出力カウンターを取得する。
+    """
+    fields: dict[str, Any] | None = None
+    for line in lines:
+        m = _IF_HEADER_RE.match(line)
+        if m is not None:
+            if fields is not None:
+                yield InterfaceStatus(**fields)
+            fields = dict.fromkeys(InterfaceStatus._fields)
+            fields.update(name=m["name"], status=m["status"], protocol=m["protocol"])
+            continue
+        if fields is None:
+            continue
+        if m := _IF_ADDRESS_RE.match(line):
+            fields["address"] = m["address"]
+        elif m := _IF_INPUT_RE.match(line):
+            fields["input_packets"], fields["input_bytes"] = int(m["packets"]), int(m["bytes"])
+        elif m := _IF_OUTPUT_RE.match(line):
+            fields["output_packets"], fields["output_bytes"] = int(m["packets"]), int(m["bytes"])
+        elif fields["mtu"] is None and (m := _IF_MTU_RE.search(line)):
+            fields["mtu"] = int(m["mtu"])
+    if fields is not None:
+        yield InterfaceStatus(**fields)
+
+
+@register_parser("show interface")
+def parse_interface(lines: Iterable[str]) -> list[InterfaceStatus]:
+    """show interface の出力を解析する。"""
+    return list(iter_interfaces(lines))
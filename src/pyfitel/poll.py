@@ -0,0 +1,105 @@
+import random
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Mapping
+
+
+class PollPolicy(ABC):
+    """commands_wait で実行結果を取得するまでの待機時間を決めるポリシー。"""
+
+    @abstractmethod
+    def delays(self, cmds: list[str]) -> Iterator[float]:
+        """各ポーリングの直前に待機する秒数を順に返す。
+
+        イテレーターが終了した時点で完了していない場合はタイムアウトとして扱われる。
+
+        Args:
+            cmds (list[str]): 実行したコマンドのリスト
+        Returns:
+            Iterator[float]: 待機秒数
+        """
+
+
+class FixedPoll(PollPolicy):
+    """初回待機後、一定間隔でポーリングする。"""
+
+    def __init__(self, wait: float = 0.5, retries: int = 5, interval: float = 1.0) -> None:
+        """
+        Args:
+            wait (float, optional): CLI実行後の初回待機秒数
+            retries (int, optional): リトライ回数
+            interval (float, optional): リトライ間隔(秒)
+        """
+        if retries < 0:
+            raise ValueError("retries must be 0 or more")
+        self.wait = wait
+        self.retries = retries
+        self.interval = interval
+
+    def delays(self, cmds: list[str]) -> Iterator[float]:
+        yield self.wait
+        for _ in range(self.retries):
+            yield self.interval
+
+
+class BackoffPoll(PollPolicy):
+    """指数バックオフ(ジッター付き)でポーリングし、全体の待機時間を timeout 秒までに制限する。
+
+    初回の待機時間は、コマンドの前方一致で hints に登録された想定実行時間のうち最大のもの、
+    登録がない場合は initial となる。
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.05,
+        factor: float = 2.0,
+        max_interval: float = 2.0,
+        jitter: float = 0.1,
+        timeout: float = 30.0,
+        hints: Mapping[str, float] | None = None,
+    ) -> None:
+        """
+        Args:
+            initial (float, optional): 初回の待機秒数
+            factor (float, optional): 待機秒数の増加倍率
+            max_interval (float, optional): 待機秒数の上限
+            jitter (float, optional): 待機秒数に加える揺らぎの割合 (0.1 の場合は ±10%)
+            timeout (float, optional): 最初の待機開始から諦めるまでの秒数
+            hints (Mapping[str, float] | None, optional): コマンドの前方一致文字列と想定実行秒数の対応
+        """
+        if initial <= 0:
+            raise ValueError("initial must be greater than 0")
+        if factor < 1:
+            raise ValueError("factor must be 1 or more")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in the range [0, 1)")
+        self.initial = initial
+        self.factor = factor
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.hints = dict(hints or {})
+
+    def expected_duration(self, cmds: list[str]) -> float | None:
+        """hints に登録された想定実行秒数のうち最大のものを返す。
+
+        Args:
+            cmds (list[str]): 実行したコマンドのリスト
+        Returns:
+            float | None: 想定実行秒数。登録がない場合はNone
+        """
+        durations = [
+            duration for cmd in cmds for prefix, duration in self.hints.items() if cmd.strip().startswith(prefix)
+        ]
+        return max(durations, default=None)
+
+    def delays(self, cmds: list[str]) -> Iterator[float]:
+        deadline = time.monotonic() + self.timeout
+        expected = self.expected_duration(cmds)
+        delay = self.initial if expected is None else expected
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(delay * random.uniform(1 - self.jitter, 1 + self.jitter), remaining)
+            delay = min(max(delay, self.initial) * self.factor, max(self.max_interval, self.initial))
@@ -0,0 +1,154 @@
+import ipaddress
+import threading
+import time
+from collections.abc import Callable
+from urllib.parse import urlsplit
+
+type GroupBy = Callable[[str], str | None]
+
+
+class TokenBucket:
+    """トークンバケット。
+
+    1秒あたり rate 個のトークンが最大 burst 個まで補充され、1リクエストごとに1個消費する。
+    トークンが不足している場合は前借りして、補充されるまでの待機秒数を返す。
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        """
+        Args:
+            rate (float): 1秒あたりのトークン補充数
+            burst (float | None, optional): バケットの容量。Noneの場合は max(1, rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self._rate = rate
+        self._burst = burst if burst is not None else max(1.0, rate)
+        if self._burst < 1:
+            raise ValueError("burst must be 1 or more")
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def burst(self) -> float:
+        return self._burst
+
+    def reserve(self, now: float, tokens: float = 1.0) -> float:
+        """トークンを消費し、使用可能になるまでの待機秒数を返す。スレッドセーフではない。
+
+        Args:
+            now (float): time.monotonic() の現在値
+            tokens (float, optional): 消費するトークン数
+        Returns:
+            float: 待機秒数
+        """
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= tokens
+        return max(0.0, -self._tokens / self._rate)
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """消費したトークンを戻す。スレッドセーフではない。"""
+        self._tokens = min(self._burst, self._tokens + tokens)
+
+
+def subnet_group(prefixlen: int = 24, ipv6_prefixlen: int = 64) -> GroupBy:
+    """機器のIPアドレスが属するサブネットでグループ化する関数を作成する。
+
+    ホスト名がIPアドレスでない機器はグループに属さない。
+
+    Args:
+        prefixlen (int, optional): IPv4のプレフィックス長
+        ipv6_prefixlen (int, optional): IPv6のプレフィックス長
+    Returns:
+        GroupBy: 機器を識別するキーからグループ名を返す関数
+    """
+
+    def group_by(device: str) -> str | None:
+        try:
+            address = ipaddress.ip_address(urlsplit(device).hostname or "")
+        except ValueError:
+            return None
+        length = prefixlen if address.version == 4 else ipv6_prefixlen
+        return str(ipaddress.ip_network(f"{address}/{length}", strict=False))
+
+    return group_by
+
+
+class RateLimiter:
+    """機器ごと、グループ(サブネットや拠点)ごと、全体のリクエスト数を制限するレートリミッター。
+
+    複数のスレッドや asyncio のタスクで共有でき、全てのバケットにトークンがある場合にリクエストを送信する。
+    """
+
+    def __init__(
+        self,
+        device_rate: float | None = None,
+        device_burst: float | None = None,
+        global_rate: float | None = None,
+        global_burst: float | None = None,
+        group_rate: float | None = None,
+        group_burst: float | None = None,
+        group_by: GroupBy | None = None,
+    ) -> None:
+        """
+        Args:
+            device_rate (float | None, optional): 1機器あたりの1秒間のリクエスト数。Noneの場合は制限しない
+            device_burst (float | None, optional): 1機器あたりの連続リクエスト数
+            global_rate (float | None, optional): 全機器合計の1秒間のリクエスト数。Noneの場合は制限しない
+            global_burst (float | None, optional): 全機器合計の連続リクエスト数
+            group_rate (float | None, optional): 1グループあたりの1秒間のリクエスト数。Noneの場合は制限しない
+            group_burst (float | None, optional): 1グループあたりの連続リクエスト数
+            group_by (GroupBy | None, optional): 機器を識別するキーからグループ名を返す関数。既定は subnet_group()
+        """
+        self._device_rate = (device_rate, device_burst) if device_rate is not None else None
+        self._group_rate = (group_rate, group_burst) if group_rate is not None else None
+        self._group_by = group_by or subnet_group()
+        self._global = TokenBucket(global_rate, global_burst) if global_rate is not None else None
+        self._devices: dict[str, TokenBucket] = {}
+        self._groups: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _buckets(self, device: str) -> list[TokenBucket]:
+        buckets = []
+        if self._device_rate is not None:
+            bucket = self._devices.get(device)
+            if bucket is None:
+                bucket = self._devices[device] = TokenBucket(*self._device_rate)
+            buckets.append(bucket)
+        if self._group_rate is not None:
+            group = self._group_by(device)
+            if group is not None:
+                bucket = self._groups.get(group)
+                if bucket is None:
+                    bucket = self._groups[group] = TokenBucket(*self._group_rate)
+                buckets.append(bucket)
+        if self._global is not None:
+            buckets.append(self._global)
+        return buckets
+
+    def reserve(self, device: str) -> float:
+        """機器へのリクエスト1回分のトークンを予約し、送信できるまでの待機秒数を返す。
+
+        Args:
+            device (str): 機器を識別するキー(スキーム://ホスト:ポート)
+        Returns:
+            float: 待機秒数
+        """
+        now = time.monotonic()
+        with self._lock:
+            return max((bucket.reserve(now) for bucket in self._buckets(device)), default=0.0)
+
+    def cancel(self, device: str) -> None:
+        """予約したトークンを戻す。
+
+        Args:
+            device (str): 機器を識別するキー(スキーム://ホスト:ポート)
+        """
+        with self._lock:
+            for bucket in self._buckets(device):
+                bucket.refund()
@@ -0,0 +1,172 @@
+from collections.abc import Iterator
+from typing import Any
+
+_COMMAND_KEYS = ("cmd", "on_fail", "result", "message", "contents")
+_BATCH_KEYS = ("clis_id", "status", "list", "total")
+
+
+class CommandResult:
+    """複数CLIコマンド実行結果のコマンド1個分の結果。
+
+    出力は改行で連結した bytes で保持し、output や lines を参照したときにデコードする。
+    result["contents"] のように辞書と同じキーでも参照できる。
+    """
+
+    __slots__ = ("_output", "action", "cmd", "message", "result")
+
+    def __init__(
+        self, cmd: str, result: str, output: bytes | None = None, message: str = "", action: str = "continue"
+    ) -> None:
+        """
+        Args:
+            cmd (str): 実行したコマンド
+            result (str): コマンドの実行結果 (success, failure など)
+            output (bytes | None, optional): 改行で連結したコマンドの出力。Noneの場合は出力の行がない
+            message (str, optional): 実行結果のメッセージ
+            action (str, optional): 失敗時の動作 (continue, exit)
+        """
+        self.cmd = cmd
+        self.result = result
+        self.message = message
+        self.action = action
+        self._output = output
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "CommandResult":
+        """get_commands_result の list の要素から作成する。"""
+        # contents が空の場合と空文字1行の場合を区別するため、行がない場合は None で保持する
+        contents = item.get("contents")
+        return cls(
+            cmd=item.get("cmd", ""),
+            result=item.get("result", ""),
+            output="\n".join(contents).encode() if contents else None,
+            message=item.get("message", ""),
+            action=item.get("on_fail", {}).get("action", "continue"),
+        )
+
+    @property
+    def ok(self) -> bool:
+        return self.result == "success"
+
+    @property
+    def raw(self) -> bytes:
+        """改行で連結したコマンドの出力。"""
+        return self._output or b""
+
+    @property
+    def output(self) -> str:
+        """コマンドの出力。"""
+        return self.raw.decode(errors="replace")
+
+    @property
+    def lines(self) -> list[str]:
+        """コマンドの出力の各行。"""
+        if self._output is None:
+            return []
+        return self.output.split("\n")
+
+    def to_dict(self) -> dict:
+        """get_commands_result の list の要素と同じ形式の辞書に変換する。"""
+        return {
+            "cmd": self.cmd,
+            "on_fail": {"action": self.action},
+            "result": self.result,
+            "message": self.message,
+            "contents": self.lines,
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "contents":
+            return self.lines
+        if key == "on_fail":
+            return {"action": self.action}
+        if key not in _COMMAND_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in _COMMAND_KEYS else default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CommandResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CommandResult(cmd={self.cmd!r}, result={self.result!r}, output={len(self.raw)} bytes)"
+
+
+class CommandsResult:
+    """複数CLIコマンド実行結果。
+
+    res["status"], res["list"] のように辞書と同じキーでも参照できる。
+    """
+
+    __slots__ = ("clis_id", "commands", "status", "total")
+
+    def __init__(
+        self, clis_id: str | list[str], status: str, commands: tuple[CommandResult, ...], total: int | None = None
+    ) -> None:
+        """
+        Args:
+            clis_id (str | list[str]): CLIコマンドID。分割して実行した場合は分割実行ごとのIDのリスト
+            status (str): 実行結果の状態
+            commands (tuple[CommandResult, ...]): コマンドごとの結果
+            total (int | None, optional): 実行を要求したコマンド数。Noneの場合は結果の数
+        """
+        self.clis_id = clis_id
+        self.status = status
+        self.commands = commands
+        self.total = len(commands) if total is None else total
+
+    @classmethod
+    def from_dict(cls, res: dict) -> "CommandsResult":
+        """get_commands_result または commands_wait の結果から作成する。"""
+        return cls(
+            clis_id=res.get("clis_id", ""),
+            status=res.get("status", ""),
+            commands=tuple(CommandResult.from_dict(item) for item in res.get("list", [])),
+            total=res.get("total"),
+        )
+
+    @property
+    def ok(self) -> bool:
+        """全てのコマンドが成功したかどうか。"""
+        return all(command.ok for command in self.commands)
+
+    def to_dict(self) -> dict:
+        """get_commands_result と同じ形式の辞書に変換する。"""
+        return {
+            "clis_id": self.clis_id,
+            "status": self.status,
+            "list": [command.to_dict() for command in self.commands],
+            "total": self.total,
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "list":
+            return list(self.commands)
+        if key not in _BATCH_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in _BATCH_KEYS else default
+
+    def __iter__(self) -> Iterator[CommandResult]:
+        return iter(self.commands)
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CommandsResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CommandsResult(clis_id={self.clis_id!r}, status={self.status!r}, commands={len(self.commands)})"
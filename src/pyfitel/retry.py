@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from collections.abc import Collection
+from email.utils import parsedate_to_datetime
+
+
+class CircuitOpenError(Exception):
+    """Circuit breaker is open for the device."""
+
+    def __init__(self, device: str, retry_in: float):
+        self._device = device
+        self._retry_in = retry_in
+
+    def __str__(self):
+        return f"Circuit open for {self._device}, retry in {self._retry_in:.1f} seconds"
+
+    @property
+    def device(self):
+        return self._device
+
+
+class RetryPolicy:
+    """一時的な障害に対するリトライの方針。
+
+    接続エラー・タイムアウトおよび status_codes に含まれるレスポンスを、methods に含まれる
+    HTTPメソッドに限り指数バックオフ(ジッター付き)でリトライする。Retry-After ヘッダーが
+    ある場合はその秒数以上待機する。
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff: float = 0.5,
+        factor: float = 2.0,
+        max_backoff: float = 10.0,
+        jitter: float = 0.1,
+        status_codes: Collection[int] = (429, 500, 502, 503, 504),
+        methods: Collection[str] = ("GET", "PUT", "DELETE"),
+    ) -> None:
+        """
+        Args:
+            retries (int, optional): 最大リトライ回数
+            backoff (float, optional): 初回リトライまでの待機秒数
+            factor (float, optional): 待機秒数の増加倍率
+            max_backoff (float, optional): 待機秒数の上限
+            jitter (float, optional): 待機秒数に加える揺らぎの割合
+            status_codes (Collection[int], optional): リトライするHTTPステータスコード
+            methods (Collection[str], optional): リトライするHTTPメソッド。
+                POST, PATCH は冪等ではないため、リトライする場合は明示的に指定する
+        """
+        if retries < 0:
+            raise ValueError("retries must be 0 or more")
+        self.retries = retries
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """attempt 回目のリトライを行えるかどうかを返す。
+
+        Args:
+            method (str): HTTPメソッド
+            attempt (int): これまでのリトライ回数
+        Returns:
+            bool: リトライできる場合はTrue
+        """
+        return attempt < self.retries and method.upper() in self.methods
+
+    def delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """リトライ前に待機する秒数を返す。
+
+        Args:
+            attempt (int): これまでのリトライ回数
+            retry_after (str | None, optional): レスポンスの Retry-After ヘッダーの値
+        Returns:
+            float: 待機秒数
+        """
+        delay = min(self.backoff * self.factor**attempt, self.max_backoff)
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(delay, parse_retry_after(retry_after))
+
+
+def parse_retry_after(value: str | None) -> float:
+    """Retry-After ヘッダーの値を秒数に変換する。
+
+    Args:
+        value (str | None): 秒数またはHTTP日付
+    Returns:
+        float: 待機秒数。解釈できない場合は0
+    """
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class CircuitBreaker:
+    """機器ごとのサーキットブレーカー。
+
+    連続して failure_threshold 回失敗した機器へのリクエストは、reset_timeout 秒間
+    送信せずに CircuitOpenError を送出する。reset_timeout 経過後は半開状態になり、
+    1件のリクエストだけを試行として送信する。試行が成功すると通常状態に戻り、失敗すると
+    再び reset_timeout 秒間遮断する。試行の結果が出るまで、他のリクエストは遮断する。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        """
+        Args:
+            failure_threshold (int, optional): 遮断するまでの連続失敗回数
+            reset_timeout (float, optional): 遮断する秒数
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be 1 or more")
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._probing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def _retry_in(self, device: str) -> float | None:
+        opened_at = self._opened_at.get(device)
+        if opened_at is None:
+            return None
+        return opened_at + self._reset_timeout - time.monotonic()
+
+    def check(self, device: str) -> bool:
+        """機器へのリクエストを送信できるか確認する。
+
+        半開状態の場合は、呼び出し元がリクエストを試行として送信する権利を得る。試行の結果は
+        record_success() または record_failure() で記録し、どちらも記録しない場合は cancel() を呼び出す。
+
+        Args:
+            device (str): 機器を識別するキー
+        Raises:
+            CircuitOpenError: 遮断中、または他のリクエストが試行中の場合
+        Returns:
+            bool: 半開状態の試行として送信する場合はTrue
+        """
+        with self._lock:
+            retry_in = self._retry_in(device)
+            if retry_in is None:
+                return False
+            if retry_in > 0:
+                raise CircuitOpenError(device, retry_in)
+            if device in self._probing:
+                raise CircuitOpenError(device, 0.0)
+            self._probing.add(device)
+            return True
+
+    def cancel(self, device: str) -> None:
+        """結果を記録せずに終了した試行を取り消し、次のリクエストが試行できるようにする。"""
+        with self._lock:
+            self._probing.discard(device)
+
+    def record_success(self, device: str) -> None:
+        with self._lock:
+            self._failures.pop(device, None)
+            self._opened_at.pop(device, None)
+            self._probing.discard(device)
+
+    def record_failure(self, device: str) -> None:
+        with self._lock:
+            failures = self._failures.get(device, 0) + 1
+            self._failures[device] = failures
+            if failures >= self._failure_threshold or device in self._probing:
+                self._opened_at[device] = time.monotonic()
+            self._probing.discard(device)
+
+    def is_open(self, device: str) -> bool:
+        """遮断中かどうかを返す。半開状態で試行中の場合もTrueを返す。"""
+        with self._lock:
+            retry_in = self._retry_in(device)
+            return retry_in is not None and (retry_in > 0 or device in self._probing)
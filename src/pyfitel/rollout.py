@@ -0,0 +1,187 @@
+import os
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from .core import deadline_scope
+from .fitel import FITELnetAPI
+from .fleet import FleetResult
+
+type HealthCheck = Callable[[FITELnetAPI], bool]
+
+
+class HealthCheckError(Exception):
+    """構成定義適用後のヘルスチェックに失敗した。"""
+
+
+class RolloutAbortedError(Exception):
+    """前のウェーブの失敗によりロールアウトが中止され、構成定義を送信しなかった。"""
+
+
+class RolloutResult:
+    """ロールアウトの結果。"""
+
+    def __init__(self, results: dict[str, FleetResult[None]], waves: list[list[str]], completed: int) -> None:
+        """
+        Args:
+            results (dict[str, FleetResult[None]]): 機器名ごとの処理結果
+            waves (list[list[str]]): ウェーブごとの機器名
+            completed (int): 完了したウェーブ数
+        """
+        self.results = results
+        self.waves = waves
+        self.completed = completed
+
+    @property
+    def aborted(self) -> bool:
+        return self.completed < len(self.waves)
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results.values())
+
+    @property
+    def failed(self) -> list[str]:
+        return [name for name, result in self.results.items() if not result.ok]
+
+    def __repr__(self) -> str:
+        return (
+            f"RolloutResult(devices={len(self.results)}, failed={len(self.failed)}, "
+            f"waves={self.completed}/{len(self.waves)})"
+        )
+
+
+class ConfigRollout:
+    """複数の機器に構成定義をウェーブに分けて適用する。
+
+    各ウェーブでは構成定義の送信と commit を別々のスレッドプールで実行し、ある機器の commit 中に
+    次の機器の送信を進める。ウェーブの全機器が完了した後にヘルスチェックを実行し、失敗した機器数が
+    max_failures を超えた場合は以降のウェーブを中止する。
+    """
+
+    def __init__(
+        self,
+        devices: Mapping[str, FITELnetAPI],
+        wave_size: int = 50,
+        max_workers: int = 16,
+        health_check: HealthCheck | None = None,
+        max_failures: int = 0,
+        timeout: float | None = None,
+    ) -> None:
+        """
+        Args:
+            devices (Mapping[str, FITELnetAPI]): 機器名とFITELnetAPIの対応。この順にウェーブに分割する
+            wave_size (int, optional): 1ウェーブの機器数
+            max_workers (int, optional): 送信と commit それぞれの最大同時実行数
+            health_check (HealthCheck | None, optional): 適用後の機器を確認する関数。
+                False を返すか例外を送出した場合は失敗とする
+            max_failures (int, optional): 1ウェーブで許容する失敗機器数
+            timeout (float | None, optional): 送信・commit・ヘルスチェックそれぞれの1台あたりのタイムアウト秒数
+        """
+        if wave_size < 1:
+            raise ValueError("wave_size must be 1 or more")
+        if max_workers < 1:
+            raise ValueError("max_workers must be 1 or more")
+        if max_failures < 0:
+            raise ValueError("max_failures must be 0 or more")
+        self._devices = dict(devices)
+        self._wave_size = wave_size
+        self._max_workers = max_workers
+        self._health_check = health_check
+        self._max_failures = max_failures
+        self._timeout = timeout
+
+    def waves(self) -> list[list[str]]:
+        """ウェーブごとの機器名を返す。"""
+        names = list(self._devices)
+        return [names[i : i + self._wave_size] for i in range(0, len(names), self._wave_size)]
+
+    def _stage(self, func: Callable[[], object]) -> float:
+        start = time.monotonic()
+        with deadline_scope(self._timeout):
+            func()
+        return time.monotonic() - start
+
+    def _check(self, api: FITELnetAPI) -> float:
+        assert self._health_check is not None
+        start = time.monotonic()
+        with deadline_scope(self._timeout):
+            healthy = self._health_check(api)
+        if not healthy:
+            raise HealthCheckError(f"{api.host}: health check failed.")
+        return time.monotonic() - start
+
+    def _run_wave(
+        self,
+        wave: list[str],
+        config: bytes | str | list[str] | os.PathLike,
+        commit: bool,
+        uploads: ThreadPoolExecutor,
+        commits: ThreadPoolExecutor,
+    ) -> dict[str, FleetResult[None]]:
+        results: dict[str, FleetResult[None]] = {}
+        elapsed: dict[str, float] = {}
+        committed: dict[Future[float], str] = {}
+
+        def finish(futures: Mapping[Future[float], str]) -> list[str]:
+            succeeded = []
+            for future in as_completed(futures):
+                name = futures[future]
+                error = future.exception()
+                if error is not None:
+                    results[name] = FleetResult(error=error, elapsed=elapsed.get(name, 0.0))
+                else:
+                    elapsed[name] = elapsed.get(name, 0.0) + future.result()
+                    succeeded.append(name)
+            return succeeded
+
+        uploaded: dict[Future[float], str] = {
+            uploads.submit(self._stage, lambda api=self._devices[name]: api.config(config, commit=False)): name
+            for name in wave
+        }
+        for future in as_completed(uploaded):
+            name = uploaded[future]
+            error = future.exception()
+            if error is not None:
+                results[name] = FleetResult(error=error)
+                continue
+            elapsed[name] = future.result()
+            if commit:
+                committed[commits.submit(self._stage, lambda api=self._devices[name]: api.commit())] = name
+        applied = finish(committed) if commit else [name for name in wave if name in elapsed]
+
+        if self._health_check is not None:
+            applied = finish({uploads.submit(self._check, self._devices[name]): name for name in applied})
+        for name in applied:
+            results[name] = FleetResult(elapsed=elapsed[name])
+        return {name: results[name] for name in wave}
+
+    def run(self, config: bytes | str | list[str] | os.PathLike, commit: bool = True) -> RolloutResult:
+        """構成定義をウェーブごとに適用する。
+
+        Args:
+            config (bytes | str | list[str] | os.PathLike): 構成定義。全ての機器に送信するため、ファイルオブジェクトやイテレーターは指定できない
+            commit (bool, optional): 構成定義適用後にcommitを実行するかどうか
+
+        Returns:
+            RolloutResult: 機器名ごとの処理結果。中止された機器の結果には RolloutAbortedError が格納される
+        """
+        waves = self.waves()
+        results: dict[str, FleetResult[None]] = {}
+        completed = 0
+        with (
+            ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pyfitel-upload") as uploads,
+            ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pyfitel-commit") as commits,
+        ):
+            for wave in waves:
+                wave_results = self._run_wave(wave, config, commit, uploads, commits)
+                results.update(wave_results)
+                completed += 1
+                failures = sum(not result.ok for result in wave_results.values())
+                if failures > self._max_failures:
+                    break
+
+        for wave in waves[completed:]:
+            for name in wave:
+                results[name] = FleetResult(error=RolloutAbortedError(f"{name}: rollout aborted."))
+        return RolloutResult({name: results[name] for name in self._devices}, waves, completed)
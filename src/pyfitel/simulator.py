@@ -0,0 +1,303 @@
+import base64
+import itertools
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Self
+
+from .fitel import FITELnetAPI
+from .metrics import endpoint_template
+
+
+class _Job:
+    def __init__(self, clis_id: int, cmd_list: list[dict], ready_at: float) -> None:
+        self.clis_id = clis_id
+        self.cmd_list = cmd_list
+        self.ready_at = ready_at
+        self.result: dict | None = None
+
+
+class FITELnetSimulator:
+    """FITELnet API を模擬するプロセス内HTTPサーバー。
+
+    /api/v1/cli, /api/v1/clis[/id], /api/v1/config, /api/v1/token に対応し、
+    応答遅延、エラー率、複数コマンド実行の処理時間、出力サイズを設定できる。
+    テストやベンチマークで実機の代わりに使用する。
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        user: str = "user",
+        password: str = "password",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        processing_delay: float = 0.0,
+        output_size: int = 0,
+        outputs: Mapping[str, str] | None = None,
+        running_config: str = "",
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            host (str, optional): 待ち受けるアドレス
+            port (int, optional): 待ち受けるポート番号。0の場合は空いているポートを使用する
+            user (str, optional): BASIC認証のユーザー名
+            password (str, optional): BASIC認証のパスワード
+            latency (float, optional): 各リクエストの応答までの遅延秒数
+            error_rate (float, optional): HTTP 503 を返す確率 (0.0 - 1.0)
+            processing_delay (float, optional): 複数コマンド実行が Processing から完了になるまでの秒数
+            output_size (int, optional): outputs に登録されていないコマンドの出力バイト数
+            outputs (Mapping[str, str] | None, optional): コマンドと出力の対応
+            running_config (str, optional): show running-config の初期値
+            seed (int | None, optional): エラー発生の乱数シード
+        """
+        self.user = user
+        self.password = password
+        self.latency = latency
+        self.error_rate = error_rate
+        self.processing_delay = processing_delay
+        self.output_size = output_size
+        self.outputs = dict(outputs or {})
+        self.running_config = running_config
+        self.candidate_config: str | None = None
+        self.requests: Counter[tuple[str, str]] = Counter()
+
+        self._random = random.Random(seed)
+        self._tokens: set[str] = set()
+        self._jobs: dict[int, _Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        return str(self._server.server_address[0])
+
+    @property
+    def port(self) -> int:
+        return int(self._server.server_address[1])
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self) -> Self:
+        """バックグラウンドのスレッドでサーバーを開始する。"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, args=(0.05,), name="pyfitel-simulator", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止する。"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def api(self, **kwargs) -> FITELnetAPI:
+        """このシミュレーターに接続する FITELnetAPI を作成する。
+
+        Args:
+            **kwargs: FITELnetAPI に渡す追加の引数
+        Returns:
+            FITELnetAPI: クライアント
+        """
+        return FITELnetAPI(self.host, self.port, self.user, self.password, tls=False, **kwargs)
+
+    def output(self, cmd: str) -> str:
+        """コマンドの出力を返す。"""
+        cmd = " ".join(cmd.split())
+        if cmd == "show running-config":
+            return self.running_config
+        if cmd in self.outputs:
+            return self.outputs[cmd]
+        line = f"{cmd} output line\n"
+        return (line * (self.output_size // len(line) + 1))[: self.output_size]
+
+    def _execute(self, cmd: str) -> str:
+        if cmd.split()[:1] == ["commit"]:
+            with self._lock:
+                if self.candidate_config is not None:
+                    self.running_config, self.candidate_config = self.candidate_config, None
+            return ""
+        return self.output(cmd)
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                simulator._dispatch(self, "GET")
+
+            def do_POST(self) -> None:
+                simulator._dispatch(self, "POST")
+
+            def do_PUT(self) -> None:
+                simulator._dispatch(self, "PUT")
+
+            def do_PATCH(self) -> None:
+                simulator._dispatch(self, "PATCH")
+
+            def do_DELETE(self) -> None:
+                simulator._dispatch(self, "DELETE")
+
+        return Handler
+
+    @staticmethod
+    def _read_body(handler: BaseHTTPRequestHandler) -> bytes:
+        if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(handler.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    while handler.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return bytes(body)
+                body += handler.rfile.read(size)
+                handler.rfile.readline()
+        return handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+
+    @staticmethod
+    def _respond(handler: BaseHTTPRequestHandler, status: int, body: Any = None) -> None:
+        if body is None:
+            data = b""
+            content_type = "text/plain"
+        elif isinstance(body, str):
+            data = body.encode()
+            content_type = "text/plain; charset=utf-8"
+        else:
+            data = json.dumps(body).encode()
+            content_type = "application/json"
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _authorized(self, handler: BaseHTTPRequestHandler, basic_only: bool = False) -> bool:
+        header = handler.headers.get("Authorization", "")
+        scheme, _, credential = header.partition(" ")
+        if scheme == "Basic":
+            try:
+                user, _, password = base64.b64decode(credential).decode().partition(":")
+            except ValueError:
+                return False
+            return user == self.user and password == self.password
+        if scheme == "Bearer" and not basic_only:
+            with self._lock:
+                return credential in self._tokens
+        return False
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        path = handler.path.split("?", 1)[0]
+        body = self._read_body(handler)
+        if self.latency:
+            time.sleep(self.latency)
+
+        endpoint = endpoint_template(path)
+        with self._lock:
+            self.requests[(method, endpoint)] += 1
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._respond(handler, 503, {"error": "Service Unavailable"})
+            return
+        if not self._authorized(handler, basic_only=(method, path) == ("POST", "/api/v1/token")):
+            self._respond(handler, 401, {"error": "Unauthorized"})
+            return
+
+        route = (method, endpoint)
+        if route == ("POST", "/api/v1/cli"):
+            self._respond(handler, 201, self._execute(json.loads(body)["cmd"]))
+        elif route == ("POST", "/api/v1/clis"):
+            cmd_list = json.loads(body)["list"]
+            if not 0 < len(cmd_list) <= 10:
+                self._respond(handler, 400, {"error": "Invalid number of commands"})
+                return
+            with self._lock:
+                job = _Job(next(self._ids), cmd_list, time.monotonic() + self.processing_delay)
+                self._jobs[job.clis_id] = job
+            self._respond(handler, 202, {"clis_id": job.clis_id, "expires_in": 3600})
+        elif route == ("GET", "/api/v1/clis"):
+            with self._lock:
+                jobs = [self._jobs[clis_id] for clis_id in sorted(self._jobs)]
+            data = [{"clis_id": job.clis_id, "status": self._job_status(job)} for job in jobs]
+            self._respond(handler, 200, {"data": data, "total": len(data)})
+        elif route == ("DELETE", "/api/v1/clis"):
+            with self._lock:
+                self._jobs.clear()
+            self._respond(handler, 204)
+        elif endpoint == "/api/v1/clis/{id}" and method in ("GET", "DELETE"):
+            clis_id = int(path.rsplit("/", 1)[1])
+            with self._lock:
+                job = self._jobs.pop(clis_id, None) if method == "DELETE" else self._jobs.get(clis_id)
+            if job is None:
+                self._respond(handler, 404, {"error": "Not Found"})
+            elif method == "DELETE":
+                self._respond(handler, 204)
+            else:
+                self._respond(handler, 200, self._job_result(job))
+        elif endpoint == "/api/v1/config" and method in ("PUT", "PATCH"):
+            config = body.decode()
+            with self._lock:
+                if method == "PUT":
+                    self.candidate_config = config
+                else:
+                    base = self.running_config if self.candidate_config is None else self.candidate_config
+                    self.candidate_config = base.rstrip("\n") + "\n" + config if base else config
+            self._respond(handler, 200, "")
+        elif route == ("POST", "/api/v1/token"):
+            token = secrets.token_hex(16)
+            with self._lock:
+                self._tokens.add(token)
+            self._respond(handler, 201, {"access_token": token, "token_type": "Bearer", "expires_in": 3600})
+        elif endpoint == "/api/v1/token/{token}" and method == "DELETE":
+            with self._lock:
+                self._tokens.discard(path.rsplit("/", 1)[1])
+            self._respond(handler, 204)
+        else:
+            self._respond(handler, 404, {"error": "Not Found"})
+
+    def _job_status(self, job: _Job) -> str:
+        return "Processing" if time.monotonic() < job.ready_at else "success"
+
+    def _job_result(self, job: _Job) -> dict:
+        if time.monotonic() < job.ready_at:
+            return {"clis_id": job.clis_id, "status": "Processing", "total": len(job.cmd_list)}
+        if job.result is None:
+            results = [
+                {
+                    "cmd": cli["cmd"],
+                    "on_fail": cli.get("on_fail", {"action": "continue"}),
+                    "result": "success",
+                    "message": "The result of the command execution is in Contents.",
+                    "contents": self._execute(cli["cmd"]).splitlines(),
+                }
+                for cli in job.cmd_list
+            ]
+            job.result = {"clis_id": job.clis_id, "status": "success", "list": results, "total": len(results)}
+        return job.result
@@ -0,0 +1,180 @@
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from .cache import register
+from .core import device_key
+from .fitel import FITELnetAPI
+
+
+class Snapshot(NamedTuple):
+    """保存された show running-config のスナップショットの情報。"""
+
+    device: str
+    digest: str
+    stored_at: float
+    valid: bool
+
+
+class FetchResult(NamedTuple):
+    """SnapshotStore.fetch() の結果。"""
+
+    snapshot: Snapshot
+    changed: bool
+
+
+def config_digest(config: str) -> str:
+    """構成定義のハッシュ値(SHA-256)を返す。"""
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+    """機器ごとの show running-config をディスクに保存するスナップショットストア。
+
+    構成定義は gzip で圧縮して保存し、SHA-256 のハッシュ値で変更を検出する。
+    pyfitel の config(), replace_config(), update_config() や commit で構成定義を変更すると、
+    同じプロセス内のストアではその機器のスナップショットが無効になる。
+    """
+
+    def __init__(self, path: str | os.PathLike, compresslevel: int = 6) -> None:
+        """
+        Args:
+            path (str | os.PathLike): 保存先のディレクトリ。存在しない場合は作成する
+            compresslevel (int, optional): gzip の圧縮レベル (0 - 9)
+        """
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._compresslevel = compresslevel
+        self._lock = threading.Lock()
+        register(self)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _files(self, url: str) -> tuple[str, Path, Path]:
+        device = device_key(url)
+        name = hashlib.sha256(device.encode("utf-8")).hexdigest()[:32]
+        return device, self._path / f"{name}.json", self._path / f"{name}.gz"
+
+    def _write(self, path: Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self._path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get(self, url: str) -> Snapshot | None:
+        """機器のスナップショットの情報を返す。
+
+        Args:
+            url (str): API URL
+        Returns:
+            Snapshot | None: スナップショットの情報。保存されていない場合はNone
+        """
+        _, meta, _ = self._files(url)
+        try:
+            return Snapshot(**json.loads(meta.read_text()))
+        except FileNotFoundError:
+            return None
+
+    def load(self, url: str) -> str | None:
+        """保存された構成定義を返す。
+
+        Args:
+            url (str): API URL
+        Returns:
+            str | None: 構成定義。保存されていない場合はNone
+        """
+        _, _, data = self._files(url)
+        try:
+            return gzip.decompress(data.read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, url: str, config: str) -> bool:
+        """構成定義を保存する。ハッシュ値が変わっていない場合は構成定義を書き込まない。
+
+        Args:
+            url (str): API URL
+            config (str): show running-config の出力
+        Returns:
+            bool: 前回から変更された(または初めて保存した)場合はTrue
+        """
+        device, meta, data = self._files(url)
+        digest = config_digest(config)
+        with self._lock:
+            previous = self.get(url)
+            changed = previous is None or previous.digest != digest
+            if changed:
+                self._write(data, gzip.compress(config.encode("utf-8"), self._compresslevel, mtime=0))
+            snapshot = Snapshot(device=device, digest=digest, stored_at=time.time(), valid=True)
+            self._write(meta, json.dumps(snapshot._asdict()).encode("utf-8"))
+        return changed
+
+    def diff(self, url: str, config: str) -> str:
+        """保存された構成定義と config の差分を unified diff 形式で返す。
+
+        Args:
+            url (str): API URL
+            config (str): 比較する構成定義
+        Returns:
+            str: 差分。差分がない場合は空文字
+        """
+        previous = self.load(url) or ""
+        return "".join(
+            difflib.unified_diff(
+                previous.splitlines(keepends=True),
+                config.splitlines(keepends=True),
+                fromfile="snapshot",
+                tofile="running-config",
+            )
+        )
+
+    def invalidate(self, url: str | None = None) -> None:
+        """スナップショットを無効にする。保存された構成定義は diff() の比較用に残す。
+
+        Args:
+            url (str | None, optional): 無効にする機器のAPI URL。Noneの場合は全て無効にする
+        """
+        with self._lock:
+            metas = self._path.glob("*.json") if url is None else [self._files(url)[1]]
+            for meta in metas:
+                try:
+                    snapshot = Snapshot(**json.loads(meta.read_text()))
+                except FileNotFoundError:
+                    continue
+                if snapshot.valid:
+                    self._write(meta, json.dumps(snapshot._replace(valid=False)._asdict()).encode("utf-8"))
+
+    def fetch(self, api: FITELnetAPI, max_age: float | None = None) -> FetchResult:
+        """機器から show running-config を取得して保存する。
+
+        max_age を指定した場合、有効なスナップショットが max_age 秒以内に保存されていれば
+        機器から取得せずにそのスナップショットを返す。
+
+        Args:
+            api (FITELnetAPI): 取得する機器
+            max_age (float | None, optional): 取得を省略するスナップショットの最大経過秒数
+
+        Returns:
+            FetchResult: スナップショットの情報と、前回から変更されたかどうか
+        """
+        if max_age is not None:
+            snapshot = self.get(api.url)
+            if snapshot is not None and snapshot.valid and time.time() - snapshot.stored_at <= max_age:
+                return FetchResult(snapshot, False)
+        changed = self.put(api.url, api.command("show running-config"))
+        snapshot = self.get(api.url)
+        assert snapshot is not None
+        return FetchResult(snapshot, changed)
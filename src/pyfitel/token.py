@@ -1,13 +1,14 @@
-from .core import auth, delete, post
+from .core import Timeout, auth, delete, post
 
 
-def publish_token(url: str, user: str, password: str) -> dict:
+def publish_token(url: str, user: str, password: str, timeout: Timeout = None) -> dict:
     """アクセストークンを発行する。
 
     Args:
         url (str): API URL
         user (str): ユーザー名
         password (str): パスワード
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     Returns:
         dict: 発行されたアクセストークン情報
     """
@@ -18,18 +19,20 @@ def publish_token(url: str, user: str, password: str) -> dict:
         base_url=url,
         endpoint=api,
         auth=auth(bearer=False, user=user, password=password, token=None),
+        timeout=timeout,
         data=None,
     )
 
     return res.json()
 
 
-def delete_token(url: str, token: str) -> None:
+def delete_token(url: str, token: str, timeout: Timeout = None) -> None:
     """アクセストークンを削除する。
 
     Args:
         url (str): API URL
         token (str): アクセストークン
+        timeout (Timeout): 接続・読み込みタイムアウト秒数。Noneの場合は既定値
     """
 
     api = f"/api/v1/token/{token}"
@@ -38,4 +41,5 @@ def delete_token(url: str, token: str) -> None:
         base_url=url,
         endpoint=api,
         auth=auth(bearer=True, user=None, password=None, token=token),
+        timeout=timeout,
     )
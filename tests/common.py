@@ -2,9 +2,10 @@ import json
 
 
 class MockReponse:
-    def __init__(self, status_code: int, text: str):
+    def __init__(self, status_code: int, text: str, encoding: str | None = None):
         self.__status_code = status_code
         self.__text = text
+        self.encoding = encoding
 
     @property
     def status_code(self) -> int:
@@ -16,3 +17,17 @@ class MockReponse:
 
     def json(self) -> dict:
         return json.loads(self.__text)
+
+    def iter_content(self, chunk_size: int = 1):
+        content = self.__text.encode(self.encoding or "utf-8")
+        for i in range(0, len(content), chunk_size):
+            yield content[i : i + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from pyfitel import AsyncFITELnetAPI, FITELnetAPIError
+
+httpx = pytest.importorskip("httpx")
+
+
+def make_api(handler, **kwargs) -> AsyncFITELnetAPI:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch.object(httpx, "AsyncClient", return_value=client):
+        return AsyncFITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, **kwargs)
+
+
+def test_command():
+    def handler(request):
+        assert request.url.path == "/api/v1/cli"
+        assert request.headers["Authorization"].startswith("Basic ")
+        return httpx.Response(201, text=f"result of {json.loads(request.content)['cmd']}")
+
+    async def main():
+        async with make_api(handler) as api:
+            return await api.command("show version")
+
+    assert asyncio.run(main()) == "result of show version"
+
+
+def test_command_failure():
+    def handler(request):
+        return httpx.Response(400, json={"error": "bad command"})
+
+    async def main():
+        async with make_api(handler) as api:
+            await api.command("show foo")
+
+    with pytest.raises(FITELnetAPIError) as e:
+        asyncio.run(main())
+    assert e.value.http_code == 400
+    assert e.value.message == "bad command"
+
+
+def test_commands_wait():
+    polls = 0
+    requests = []
+
+    def handler(request):
+        nonlocal polls
+        requests.append((request.method, request.url.path))
+        if request.method == "POST":
+            return httpx.Response(202, json={"clis_id": 7, "expires_in": 3600})
+        if request.method == "GET":
+            polls += 1
+            return httpx.Response(200, json={"clis_id": 7, "status": "Processing" if polls < 2 else "Completed"})
+        return httpx.Response(204)
+
+    async def main():
+        async with make_api(handler) as api:
+            return await api.commands_wait(["show version"], wait=0, interval=0)
+
+    res = asyncio.run(main())
+    assert res["status"] == "Completed"
+    assert requests == [
+        ("POST", "/api/v1/clis"),
+        ("GET", "/api/v1/clis/7"),
+        ("GET", "/api/v1/clis/7"),
+        ("DELETE", "/api/v1/clis/7"),
+    ]
+
+
+def test_commands_wait_timeout_deletes_pipelined():
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        if request.method == "POST":
+            return httpx.Response(202, json={"clis_id": len(requests), "expires_in": 3600})
+        if request.method == "GET":
+            return httpx.Response(200, json={"status": "Processing"})
+        return httpx.Response(204)
+
+    async def main():
+        async with make_api(handler) as api:
+            await api.commands_wait([f"show {i}" for i in range(15)], wait=0, retries=1, interval=0)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(main())
+    assert requests == [
+        ("POST", "/api/v1/clis"),
+        ("POST", "/api/v1/clis"),
+        ("GET", "/api/v1/clis/1"),
+        ("GET", "/api/v1/clis/1"),
+        ("DELETE", "/api/v1/clis/1"),
+        ("DELETE", "/api/v1/clis/2"),
+    ]
+
+
+def test_token_mode():
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path, request.headers.get("Authorization")))
+        if request.url.path == "/api/v1/token":
+            return httpx.Response(201, json={"access_token": "token1", "token_type": "Bearer", "expires_in": 3600})
+        return httpx.Response(200, text="ok")
+
+    async def main():
+        async with make_api(handler, use_token=True) as api:
+            await api.config(["interface Loopback 1", "description foo"], commit=False)
+            await api.command("show version")
+
+    asyncio.run(main())
+    assert [r[:2] for r in requests] == [
+        ("POST", "/api/v1/token"),
+        ("PATCH", "/api/v1/config"),
+        ("POST", "/api/v1/cli"),
+        ("DELETE", "/api/v1/token/token1"),
+    ]
+    assert requests[1][2] == "Bearer token1"
+
+
+@pytest.mark.parametrize("replayable", [True, False])
+def test_expired_token_config(replayable):
+    requests = []
+    tokens = iter(["expired", "token2"])
+
+    async def handler(request):
+        body = b"".join([chunk async for chunk in request.stream])
+        requests.append((request.method, request.url.path, body))
+        if request.url.path == "/api/v1/token":
+            return httpx.Response(201, json={"access_token": next(tokens), "token_type": "Bearer"})
+        if request.headers.get("Authorization") == "Bearer expired":
+            return httpx.Response(401, json={"error": "Unauthorized"})
+        return httpx.Response(200, text="ok")
+
+    lines = ["hostname router1"]
+    source = lines if replayable else iter(lines)
+
+    async def main():
+        async with make_api(handler, use_token=True) as api:
+            await api.config(source, commit=True)
+
+    if replayable:
+        asyncio.run(main())
+        assert [r[:2] for r in requests].count(("POST", "/api/v1/cli")) == 1
+        assert requests[-3][2] == b"hostname router1"
+    else:
+        with pytest.raises(FITELnetAPIError) as e:
+            asyncio.run(main())
+        assert e.value.http_code == 401
+        assert ("POST", "/api/v1/cli") not in [r[:2] for r in requests]
+    assert [r[:2] for r in requests].count(("POST", "/api/v1/token")) == 2
+
+
+def test_config_reads_in_thread():
+    received = []
+    threads = set()
+
+    async def handler(request):
+        received.append(b"".join([chunk async for chunk in request.stream]))
+        return httpx.Response(200, text="ok")
+
+    def lines():
+        for i in range(3):
+            threads.add(threading.current_thread())
+            yield f"interface Loopback {i}"
+
+    async def main():
+        async with make_api(handler) as api:
+            await api.config(lines(), commit=False)
+
+    asyncio.run(main())
+    assert received == [b"interface Loopback 0\ninterface Loopback 1\ninterface Loopback 2"]
+    assert threading.main_thread() not in threads
+
+
+def test_metrics():
+    from pyfitel import RequestEvent, add_hook, remove_hook
+
+    def handler(request):
+        if request.url.path == "/api/v1/config":
+            return httpx.Response(200)
+        return httpx.Response(201, text="ok")
+
+    async def main():
+        async with make_api(handler) as api:
+            await api.config(["interface Loopback 1"], commit=False)
+            await api.command("show version")
+
+    events = []
+    hook = add_hook(events.append)
+    try:
+        asyncio.run(main())
+    finally:
+        remove_hook(hook)
+
+    config, command = events
+    assert isinstance(config, RequestEvent)
+    assert (config.method, config.endpoint, config.status, config.bytes_sent) == ("PATCH", "/api/v1/config", 200, 20)
+    assert (command.method, command.endpoint, command.bytes_received) == ("POST", "/api/v1/cli", 2)
+
+
+def test_rate_limit():
+    import time
+
+    from pyfitel import RateLimiter, configure_rate_limit
+
+    def handler(request):
+        return httpx.Response(201, text="ok")
+
+    async def main():
+        async with make_api(handler) as api:
+            await asyncio.gather(*(api.command("show version") for _ in range(5)))
+
+    configure_rate_limit(RateLimiter(device_rate=50, device_burst=1))
+    try:
+        start = time.perf_counter()
+        asyncio.run(main())
+        assert time.perf_counter() - start >= 0.075
+    finally:
+        configure_rate_limit(None)
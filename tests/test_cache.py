@@ -0,0 +1,70 @@
+from pytest_mock import MockFixture
+
+from pyfitel import FITELnetAPI, ResponseCache, update_config
+
+from .common import MockReponse
+
+
+def test_ttl():
+    cache = ResponseCache(ttls={"show": 10.0, "show version": 60.0})
+    assert cache.ttl("show version") == 60.0
+    assert cache.ttl("show  interface") == 10.0
+    assert cache.ttl("commit") == 0.0
+    assert ResponseCache(ttls={"": 30.0}).ttl("commit") == 0.0
+
+
+def test_expire(mocker: MockFixture):
+    monotonic = mocker.patch("pyfitel.cache.time.monotonic", return_value=0.0)
+    cache = ResponseCache(ttls={"show": 10.0})
+    cache.put("http://192.168.1.1:50443/", "show version", "v1")
+    cache.put("http://192.168.1.1:50443/", "commit", "ok")
+    assert cache.get("http://192.168.1.1:50443", "show version") == "v1"
+    assert cache.get("http://192.168.1.1:50443", "commit") is None
+    monotonic.return_value = 10.0
+    assert cache.get("http://192.168.1.1:50443", "show version") is None
+
+
+def test_lru():
+    cache = ResponseCache(maxsize=2)
+    cache.put("http://192.168.1.1:50443/", "show a", "a")
+    cache.put("http://192.168.1.1:50443/", "show b", "b")
+    cache.get("http://192.168.1.1:50443/", "show a")
+    cache.put("http://192.168.1.1:50443/", "show c", "c")
+    assert len(cache) == 2
+    assert cache.get("http://192.168.1.1:50443/", "show a") == "a"
+    assert cache.get("http://192.168.1.1:50443/", "show b") is None
+
+
+def test_fitelnet_api(mocker: MockFixture):
+    mock_post = mocker.patch("pyfitel.cli.post", return_value=MockReponse(status_code=201, text="result"))
+    mocker.patch("pyfitel.config.patch", return_value=MockReponse(status_code=200, text=""))
+
+    cache = ResponseCache()
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, cache=cache)
+    other = FITELnetAPI("192.168.1.2", 50443, "user", "password", tls=False, cache=cache)
+
+    assert api.command("show version") == "result"
+    assert api.command("show version") == "result"
+    assert other.command("show version") == "result"
+    assert mock_post.call_count == 2
+
+    api.command("commit")
+    assert mock_post.call_count == 3
+    api.command("show version")
+    other.command("show version")
+    assert mock_post.call_count == 4
+
+    update_config(url="http://192.168.1.1:50443", config="hostname foo", user="user", password="password")
+    api.command("show version")
+    assert mock_post.call_count == 5
+
+
+def test_commit_is_never_cached(mocker: MockFixture):
+    mock_post = mocker.patch("pyfitel.cli.post", return_value=MockReponse(status_code=200, text="ok"))
+    mocker.patch("pyfitel.fitel.update_config")
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, cache=ResponseCache(ttls={"": 30.0}))
+    api.command("commit")
+    api.command("commit")
+    api.config("hostname foo")
+    api.commit()
+    assert mock_post.call_count == 4
@@ -0,0 +1,88 @@
+import pytest
+
+from pyfitel import Checkpoint, FITELnetAPI, FixedPoll, ResumableJob
+from pyfitel.simulator import FITELnetSimulator
+
+POLL = FixedPoll(wait=0.01, retries=20, interval=0.01)
+
+
+def test_commands_wait_skips_completed_devices(tmp_path):
+    with FITELnetSimulator() as sim1, FITELnetSimulator() as sim2, Checkpoint(tmp_path / "job.db") as checkpoint:
+        devices = {"r1": sim1.api(), "r2": sim2.api()}
+        results = ResumableJob(checkpoint, "audit", devices).commands_wait(["show version", "show arp"], poll=POLL)
+        assert all(result.ok for result in results.values())
+        assert {progress.state for progress in checkpoint.progress("audit").values()} == {"completed"}
+        assert sim1.requests["DELETE", "/api/v1/clis/{id}"] == 1
+
+        rerun = ResumableJob(checkpoint, "audit", devices).commands_wait(["show version", "show arp"], poll=POLL)
+        assert rerun["r1"].value == results["r1"].value
+        assert sim1.requests["POST", "/api/v1/clis"] == 1
+        assert sim2.requests["POST", "/api/v1/clis"] == 1
+
+        with pytest.raises(ValueError):
+            ResumableJob(checkpoint, "audit", devices).commands_wait(["show interface"], poll=POLL)
+
+
+def test_commands_wait_resumes_submitted_jobs(tmp_path):
+    cmds = [f"show command {i}" for i in range(12)]
+    with FITELnetSimulator() as sim, sim.api() as api, Checkpoint(tmp_path / "job.db") as checkpoint:
+        clis_id = api.commands_submit(cmds[:10])
+        checkpoint.update("audit", "r1", "submitted", [clis_id])
+
+        result = ResumableJob(checkpoint, "audit", {"r1": api}).commands_wait(cmds, poll=POLL)["r1"]
+        assert result.ok and result.value is not None
+        assert str(result.value["clis_id"][0]) == clis_id
+        assert [item["cmd"] for item in result.value["list"]] == cmds
+        assert sim.requests["POST", "/api/v1/clis"] == 2
+        progress = checkpoint.get("audit", "r1")
+        assert progress is not None and progress.clis_ids[0] == clis_id
+
+
+def test_commands_wait_resubmits_lost_jobs(tmp_path):
+    with FITELnetSimulator() as sim, sim.api() as api, Checkpoint(tmp_path / "job.db") as checkpoint:
+        checkpoint.update("audit", "r1", "submitted", ["999"])
+        result = ResumableJob(checkpoint, "audit", {"r1": api}).commands_wait(["show version"], poll=POLL)["r1"]
+        assert result.ok
+        assert sim.requests["POST", "/api/v1/clis"] == 1
+        progress = checkpoint.get("audit", "r1")
+        assert progress is not None and progress.clis_ids != ("999",)
+
+
+def test_config_reapplies_uncommitted_devices(tmp_path):
+    with FITELnetSimulator() as sim1, FITELnetSimulator() as sim2, Checkpoint(tmp_path / "job.db") as checkpoint:
+        devices = {"r1": sim1.api(), "r2": sim2.api()}
+        config = "hostname router"
+        # r2 was uploaded before the interruption, but the device lost the uncommitted change
+        checkpoint.update("change", "r2", "submitted")
+
+        job = ResumableJob(checkpoint, "change", devices)
+        results = job.config(config)
+        assert all(result.ok for result in results.values())
+        assert {progress.state for progress in checkpoint.progress("change").values()} == {"committed"}
+        assert sim2.requests["PATCH", "/api/v1/config"] == 1
+        assert "hostname router" in sim2.running_config
+
+        assert job.config(config)["r1"].ok
+        assert sim1.requests["PATCH", "/api/v1/config"] == 1
+        assert sim1.requests["POST", "/api/v1/cli"] == 1
+
+
+def test_error_is_recorded(tmp_path):
+    with Checkpoint(tmp_path / "job.db") as checkpoint:
+        job = ResumableJob(
+            checkpoint, "audit", {"dead": FITELnetAPI("127.0.0.1", 9, "user", "password", tls=False)}, timeout=5
+        )
+        result = job.commands_wait(["show version"], poll=POLL)["dead"]
+        assert not result.ok
+        progress = checkpoint.get("audit", "dead")
+        assert progress is not None
+        assert progress.state == "pending"
+        assert progress.error is not None
+
+
+def test_devices_sharing_an_api(tmp_path):
+    with FITELnetSimulator() as sim, sim.api() as api, Checkpoint(tmp_path / "job.db") as checkpoint:
+        results = ResumableJob(checkpoint, "audit", {"a": api, "b": api}).commands_wait(["show version"], poll=POLL)
+        assert all(result.ok for result in results.values())
+        assert set(checkpoint.progress("audit")) == {"a", "b"}
+        assert sim.requests["POST", "/api/v1/clis"] == 2
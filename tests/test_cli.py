@@ -1,3 +1,4 @@
+import io
 import json
 
 import pytest
@@ -7,6 +8,8 @@ from pyfitel import (
     delete_commands_result,
     delete_commands_result_all,
     exec_command,
+    exec_command_lines,
+    exec_command_to,
     exec_commands,
     get_clis_id_all,
     get_commands_result,
@@ -144,3 +147,36 @@ def test_delete_commands_result_all(mocker: MockFixture):
     url = "http://192.168.1.1:50443"
     delete_commands_result_all(url=url, bearer=True, token="testtoken")
     assert mock_api.call_count == 1
+
+
+def test_exec_command_lines(mocker: MockFixture):
+    command_result = "F70   Version 01.16(01)\r\n日本語\n\nlast"
+    mock_api = mocker.patch(
+        "pyfitel.cli.post",
+        return_value=MockReponse(status_code=201, text=command_result),
+    )
+
+    url = "http://192.168.1.1:50443"
+    lines = exec_command_lines(url=url, cmd="show version", user="operator", password="password123", chunk_size=3)
+
+    assert mock_api.call_count == 1
+    assert mock_api.call_args.kwargs["stream"] is True
+    assert list(lines) == ["F70   Version 01.16(01)", "日本語", "", "last"]
+
+
+def test_exec_command_to(mocker: MockFixture, tmp_path):
+    command_result = "line1\nline2\n"
+    mocker.patch(
+        "pyfitel.cli.post",
+        return_value=MockReponse(status_code=201, text=command_result),
+    )
+
+    url = "http://192.168.1.1:50443"
+    buf = io.BytesIO()
+    size = exec_command_to(url=url, cmd="show version", out=buf, user="operator", password="password123")
+    assert size == len(command_result)
+    assert buf.getvalue() == command_result.encode()
+
+    path = tmp_path / "out.txt"
+    exec_command_to(url=url, cmd="show version", out=path, user="operator", password="password123")
+    assert path.read_bytes() == command_result.encode()
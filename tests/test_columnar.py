@@ -0,0 +1,73 @@
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import ArpEntry, FITELnetAPI, NeighborEntry, Route, arp_table, neighbor_table, route_table
+from pyfitel.columnar import pack_address, pack_mac, unpack_address
+
+np = pytest.importorskip("numpy")
+
+
+def test_pack_address():
+    assert pack_address("192.168.10.1") == (4, 0, 0xC0A80A01)
+    assert pack_address("2001:db8::1") == (6, 0x20010DB800000000, 1)
+    assert unpack_address(*pack_address("192.168.10.1")) == "192.168.10.1"
+    assert unpack_address(*pack_address("2001:db8::1")) == "2001:db8::1"
+    assert pack_mac("00:11:22:aa:bb:cc") == pack_mac("0011.22aa.bbcc") == 0x001122AABBCC
+
+
+def test_route_table():
+    table = route_table(
+        [
+            Route("S", "0.0.0.0/0", "192.168.10.1", "port-channel0", 1, 0, True, True),
+            Route("C", "192.168.10.0/24", None, "port-channel0", None, None, True, True),
+            Route("O", "2001:db8::/32", "fe80::1", "port-channel1", 110, 20, False, True),
+        ]
+    )
+    assert len(table) == 3
+    assert table["network_lo"].dtype == np.uint64
+    assert table["network_lo"].tolist()[:2] == [0, 0xC0A80A00]
+    assert table["prefixlen"].tolist() == [0, 24, 32]
+    assert table["family"].tolist() == [4, 4, 6]
+    assert table["nexthop_family"].tolist() == [4, 0, 6]
+    assert table["distance"].tolist() == [1, -1, 110]
+    assert table["selected"].dtype == np.bool_
+    assert table.decode("protocol") == ["S", "C", "O"]
+    assert table.categories["interface"] == ["port-channel0", "port-channel1"]
+
+
+def test_arp_table():
+    table = arp_table([ArpEntry("192.168.10.1", "00:11:22:aa:bb:cc", None)])
+    assert table["address"].dtype == np.uint32
+    assert table["address"].tolist() == [0xC0A80A01]
+    assert table["mac"].tolist() == [0x001122AABBCC]
+    assert table.decode("interface") == [None]
+
+
+def test_neighbor_table():
+    table = neighbor_table(
+        [
+            NeighborEntry("2001:db8::1", "0011.22aa.bbcc", "REACH", "port-channel0"),
+            NeighborEntry("fe80::1", "00:11:22:aa:bb:cd", None, None),
+        ]
+    )
+    assert table["address_hi"].dtype == np.uint64
+    hi, lo = table["address_hi"].tolist(), table["address_lo"].tolist()
+    assert [unpack_address(6, h, l) for h, l in zip(hi, lo)] == ["2001:db8::1", "fe80::1"]
+    assert table["mac"].tolist() == [0x001122AABBCC, 0x001122AABBCD]
+    assert table.decode("state") == ["REACH", None]
+
+
+def test_empty_table():
+    assert len(route_table([])) == 0
+
+
+def test_command_table(mocker: MockFixture):
+    mocker.patch(
+        "pyfitel.fitel.exec_command_lines",
+        return_value=iter(["S > * 0.0.0.0/0 [1/0] via 192.168.10.1, port-channel0"]),
+    )
+
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+    table = api.command_table("show ip route")
+    assert len(table) == 1
+    assert table["nexthop_lo"].tolist() == [0xC0A80A01]
@@ -1,6 +1,10 @@
+import io
+from collections.abc import Iterator
+
 from pytest_mock import MockFixture
 
 from pyfitel import replace_config, update_config
+from pyfitel.config import config_body
 
 from .common import MockReponse
 
@@ -35,3 +39,32 @@ def test_update_confgi(mocker: MockFixture):
     """
     update_config(url=url, config=config, bearer=True, token=token)
     assert mock_api.call_count == 1
+
+
+def read_body(body: bytes | Iterator[bytes]) -> bytes:
+    return body if isinstance(body, bytes) else b"".join(body)
+
+
+def test_config_body(tmp_path):
+    assert config_body("int lo 1") == b"int lo 1"
+    assert config_body(b"int lo 1") == b"int lo 1"
+    assert read_body(config_body(["int lo 1", "description foobar\n"])) == b"int lo 1\ndescription foobar"
+    assert read_body(config_body(io.StringIO("int lo 1\ndescription foobar\n"))) == b"int lo 1\ndescription foobar\n"
+
+    path = tmp_path / "config.txt"
+    path.write_bytes(b"x" * 10 + b"\n")
+    chunks = list(config_body(path, chunk_size=4))
+    assert chunks == [b"xxxx", b"xxxx", b"xx\n"]
+
+
+def test_update_config_stream(mocker: MockFixture, tmp_path):
+    sent = []
+    mocker.patch(
+        "pyfitel.config.patch",
+        side_effect=lambda data, **kwargs: sent.append(b"".join(data)) or MockReponse(status_code=200, text=""),
+    )
+
+    path = tmp_path / "config.txt"
+    path.write_text("int lo 1\ndescription foobar\n")
+    update_config(url="http://192.168.1.1:50443", config=path, bearer=True, token="testtoken")
+    assert sent == [b"int lo 1\ndescription foobar\n"]
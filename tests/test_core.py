@@ -2,7 +2,20 @@ import pytest
 from pytest_mock import MockFixture
 from requests.auth import HTTPBasicAuth
 
-from pyfitel.core import FITELnetAPIError, auth, delete, get, patch, post, put
+from pyfitel.core import (
+    DEFAULT_TIMEOUT,
+    FITELnetAPIError,
+    SessionPool,
+    auth,
+    deadline_scope,
+    delete,
+    get,
+    patch,
+    post,
+    put,
+    remaining,
+    request_timeout,
+)
 
 from .common import MockReponse
 
@@ -39,7 +52,7 @@ def test_auth_bearer_none():
 
 def test_get(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.get",
+        "pyfitel.core.requests.Session.get",
         return_value=MockReponse(status_code=200, text="success"),
     )
 
@@ -51,7 +64,7 @@ def test_get(mocker: MockFixture):
 
 def test_post_success(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.post",
+        "pyfitel.core.requests.Session.post",
         return_value=MockReponse(status_code=200, text="success"),
     )
 
@@ -63,7 +76,7 @@ def test_post_success(mocker: MockFixture):
 
 def test_post_failure(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.post",
+        "pyfitel.core.requests.Session.post",
         return_value=MockReponse(status_code=400, text='{"error": "error"}'),
     )
 
@@ -75,7 +88,7 @@ def test_post_failure(mocker: MockFixture):
 
 def test_delete(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.delete",
+        "pyfitel.core.requests.Session.delete",
         return_value=MockReponse(status_code=200, text="deleted"),
     )
 
@@ -86,7 +99,7 @@ def test_delete(mocker: MockFixture):
 
 def test_put(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.put",
+        "pyfitel.core.requests.Session.put",
         return_value=MockReponse(status_code=200, text="ok"),
     )
     url = "http://192.168.1.1:50443"
@@ -96,7 +109,7 @@ def test_put(mocker: MockFixture):
 
 def test_patch(mocker: MockFixture):
     mock_api = mocker.patch(
-        "pyfitel.core.requests.patch",
+        "pyfitel.core.requests.Session.patch",
         return_value=MockReponse(status_code=200, text="ok"),
     )
     url = "http://192.168.1.1:50443"
@@ -104,3 +117,64 @@ def test_patch(mocker: MockFixture):
         base_url=url, endpoint="api", auth=auth(bearer=True, token="testtoken", user=None, password=None), data=b"data"
     )
     assert mock_api.call_count == 1
+
+
+class TestSessionPool:
+    def test_reuse_session(self):
+        pool = SessionPool()
+        s1 = pool.session("http://192.168.1.1:50443/")
+        s2 = pool.session("http://192.168.1.1:50443/api/v1/cli")
+        s3 = pool.session("http://192.168.1.2:50443/")
+        assert s1 is s2
+        assert s1 is not s3
+        pool.close()
+
+    def test_close_device(self):
+        pool = SessionPool()
+        s1 = pool.session("http://192.168.1.1:50443/")
+        pool.close("http://192.168.1.1:50443/")
+        assert pool.session("http://192.168.1.1:50443/") is not s1
+        pool.close()
+
+    def test_evict_idle(self, mocker: MockFixture):
+        pool = SessionPool(idle_timeout=10.0)
+        monotonic = mocker.patch("pyfitel.core.time.monotonic", return_value=100.0)
+        s1 = pool.session("http://192.168.1.1:50443/")
+        monotonic.return_value = 105.0
+        assert pool.session("http://192.168.1.1:50443/") is s1
+        monotonic.return_value = 120.0
+        pool.evict_idle()
+        assert pool.session("http://192.168.1.1:50443/") is not s1
+        pool.close()
+
+    def test_invalid_pool_maxsize(self):
+        with pytest.raises(ValueError):
+            SessionPool(pool_maxsize=0)
+
+
+class TestTimeout:
+    def test_request_timeout(self):
+        assert request_timeout() == DEFAULT_TIMEOUT == (10.0, None)
+        assert request_timeout(5.0) == (5.0, 5.0)
+        assert request_timeout((3.0, None)) == (3.0, None)
+
+    def test_deadline(self, mocker: MockFixture):
+        monotonic = mocker.patch("pyfitel.core.time.monotonic", return_value=0.0)
+        with deadline_scope(20.0):
+            assert request_timeout((10.0, None)) == (10.0, 20.0)
+            with deadline_scope(30.0):
+                assert remaining() == 20.0
+            monotonic.return_value = 15.0
+            assert request_timeout((10.0, 60.0)) == (5.0, 5.0)
+            monotonic.return_value = 20.0
+            with pytest.raises(TimeoutError):
+                request_timeout()
+        assert remaining() is None
+
+    def test_get_timeout(self, mocker: MockFixture):
+        mock_api = mocker.patch(
+            "pyfitel.core.requests.Session.get",
+            return_value=MockReponse(status_code=200, text="success"),
+        )
+        get(base_url="http://192.168.1.1:50443", endpoint="api", auth={}, timeout=(1.0, 2.0))
+        assert mock_api.call_args.kwargs["timeout"] == (1.0, 2.0)
@@ -0,0 +1,92 @@
+from pyfitel import FITELnetFleet, FITELnetSimulator, diff_config, parse_config
+
+RUNNING = """\
+!
+hostname router1
+!
+interface Loopback 1
+ description old
+ ip address 10.0.0.1 255.255.255.255
+ exit
+!
+interface Loopback 2
+ ip address 10.0.0.2 255.255.255.255
+ exit
+!
+ip route 0.0.0.0 0.0.0.0 192.168.1.254
+ip redirects
+!
+end
+"""
+
+
+def test_parse_config():
+    root = parse_config(RUNNING)
+    assert list(root.children) == [
+        "hostname router1",
+        "interface Loopback 1",
+        "interface Loopback 2",
+        "ip route 0.0.0.0 0.0.0.0 192.168.1.254",
+        "ip redirects",
+    ]
+    assert list(root.children["interface Loopback 1"].children) == [
+        "description old",
+        "ip address 10.0.0.1 255.255.255.255",
+    ]
+    assert list(root.children["interface Loopback 1"].lines()) == [
+        "interface Loopback 1",
+        " description old",
+        " ip address 10.0.0.1 255.255.255.255",
+        " exit",
+    ]
+
+
+def test_diff_config_unchanged():
+    desired = "hostname router1\n" + RUNNING.replace("!\nhostname router1\n", "")
+    assert diff_config(RUNNING, desired) == ""
+
+
+def test_diff_config():
+    desired = """\
+hostname router1
+interface Loopback 1
+ description new
+ ip address 10.0.0.1 255.255.255.255
+interface Loopback 3
+ ip address 10.0.0.3 255.255.255.255
+ip route 0.0.0.0 0.0.0.0 192.168.1.254
+no ip redirects
+"""
+    assert diff_config(RUNNING, desired) == (
+        "no interface Loopback 2\n"
+        "interface Loopback 1\n"
+        " no description old\n"
+        " description new\n"
+        " exit\n"
+        "interface Loopback 3\n"
+        " ip address 10.0.0.3 255.255.255.255\n"
+        " exit\n"
+        "no ip redirects\n"
+    )
+
+
+def test_sync_config():
+    with FITELnetSimulator(running_config=RUNNING) as sim, sim.api() as api:
+        assert api.sync_config(RUNNING) == ""
+        assert sim.requests["PATCH", "/api/v1/config"] == 0
+
+        delta = api.sync_config(RUNNING.replace("description old", "description new"))
+        assert delta == "interface Loopback 1\n no description old\n description new\n exit\n"
+        assert sim.requests["PATCH", "/api/v1/config"] == 1
+        assert "description new" in sim.running_config
+
+
+def test_fleet_sync_config():
+    with (
+        FITELnetSimulator(running_config=RUNNING) as sim1,
+        FITELnetSimulator(running_config=RUNNING.replace("router1", "router2")) as sim2,
+        FITELnetFleet({"r1": sim1.api(), "r2": sim2.api()}) as fleet,
+    ):
+        results = fleet.sync_config(RUNNING, commit=False)
+    assert results["r1"].value == ""
+    assert results["r2"].value == "no hostname router2\nhostname router1\n"
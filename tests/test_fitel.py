@@ -0,0 +1,239 @@
+import io
+
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import CLI, BackoffPoll, FITELnetAPI, FITELnetAPIError, FITELnetSimulator
+
+
+class TestTokenMode:
+    def test_publish_once(self, mocker: MockFixture):
+        mock_publish = mocker.patch("pyfitel.fitel.publish_token", return_value={"access_token": "token1"})
+        mock_exec = mocker.patch("pyfitel.fitel.exec_command", return_value="ok")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, use_token=True)
+        assert api.command("show version") == "ok"
+        assert api.command("show version") == "ok"
+
+        assert mock_publish.call_count == 1
+        assert mock_exec.call_args.kwargs["bearer"] is True
+        assert mock_exec.call_args.kwargs["token"] == "token1"
+
+    def test_refresh_on_401(self, mocker: MockFixture):
+        mock_publish = mocker.patch(
+            "pyfitel.fitel.publish_token",
+            side_effect=[{"access_token": "token1"}, {"access_token": "token2"}],
+        )
+        mock_exec = mocker.patch(
+            "pyfitel.fitel.exec_command",
+            side_effect=[FITELnetAPIError("Unauthorized", 401), "ok"],
+        )
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, use_token=True)
+        assert api.command("show version") == "ok"
+        assert mock_publish.call_count == 2
+        assert mock_exec.call_args.kwargs["token"] == "token2"
+
+    def test_basic_auth_no_refresh(self, mocker: MockFixture):
+        mock_publish = mocker.patch("pyfitel.fitel.publish_token")
+        mocker.patch("pyfitel.fitel.exec_command", side_effect=FITELnetAPIError("Unauthorized", 401))
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        with pytest.raises(FITELnetAPIError):
+            api.command("show version")
+        assert mock_publish.call_count == 0
+
+    def test_delete_on_close(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.publish_token", return_value={"access_token": "token1"})
+        mocker.patch("pyfitel.fitel.exec_command", return_value="ok")
+        mock_delete = mocker.patch("pyfitel.fitel.delete_token")
+
+        with FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, use_token=True) as api:
+            api.command("show version")
+        mock_delete.assert_called_once_with(url="http://192.168.1.1:50443/", token="token1", timeout=None)
+
+        api.close()
+        assert mock_delete.call_count == 1
+
+    def test_expired_token_with_stream_config(self):
+        with FITELnetSimulator() as sim, sim.api(use_token=True) as api:
+            api.command("show version")
+            sim._tokens.clear()
+
+            with pytest.raises(FITELnetAPIError) as e:
+                api.config(io.BytesIO(b"hostname router1\n"), commit=True)
+            assert e.value.http_code == 401
+            assert sim.requests["PATCH", "/api/v1/config"] == 1
+            assert sim.requests["POST", "/api/v1/cli"] == 1
+            assert "hostname router1" not in sim.running_config
+
+            api.config(io.BytesIO(b"hostname router1\n"), commit=True)
+            assert sim.requests["POST", "/api/v1/token"] == 2
+            assert "hostname router1" in sim.running_config
+
+    def test_expired_token_with_replayable_config(self):
+        with FITELnetSimulator() as sim, sim.api(use_token=True) as api:
+            api.command("show version")
+            sim._tokens.clear()
+
+            api.config(["hostname router1"], commit=True)
+            assert sim.requests["PATCH", "/api/v1/config"] == 2
+            assert "hostname router1" in sim.running_config
+
+
+class TestCommandsWait:
+    def test_fixed(self, mocker: MockFixture):
+        mock_sleep = mocker.patch("pyfitel.fitel.time.sleep")
+        mocker.patch("pyfitel.fitel.exec_commands", return_value={"clis_id": 1})
+        mocker.patch(
+            "pyfitel.fitel.get_commands_result",
+            side_effect=[{"status": "Processing"}, {"status": "Completed"}],
+        )
+        mock_delete = mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        assert api.commands_wait(["show version"])["status"] == "Completed"
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+        assert mock_delete.call_count == 1
+
+    def test_timeout(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.time.sleep")
+        mocker.patch("pyfitel.fitel.exec_commands", return_value={"clis_id": 1})
+        mock_get = mocker.patch("pyfitel.fitel.get_commands_result", return_value={"status": "Processing"})
+        mock_delete = mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        with pytest.raises(TimeoutError):
+            api.commands_wait(["show version"], retries=2)
+        assert mock_get.call_count == 3
+        # the timed-out job is deleted instead of being left on the device
+        assert [c.kwargs["clis_id"] for c in mock_delete.call_args_list] == [1]
+        with pytest.raises(ValueError):
+            api.commands_wait(["show version"], retries=-1)
+
+    def test_poll_policy(self, mocker: MockFixture):
+        mock_sleep = mocker.patch("pyfitel.fitel.time.sleep")
+        mocker.patch("pyfitel.fitel.exec_commands", return_value={"clis_id": 1})
+        mocker.patch("pyfitel.fitel.get_commands_result", return_value={"status": "Completed"})
+        mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        api.commands_wait(["show version"], poll=BackoffPoll(initial=0.01, jitter=0))
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.01]
+
+    def test_chunked(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.time.sleep")
+        events = []
+
+        def exec_commands(cmd_list, **kwargs):
+            clis_id = len([e for e in events if e[0] == "exec"]) + 1
+            events.append(("exec", clis_id, len(cmd_list)))
+            return {"clis_id": clis_id}
+
+        def get_commands_result(clis_id, **kwargs):
+            events.append(("get", clis_id))
+            return {
+                "clis_id": clis_id,
+                "status": "success",
+                "list": [{"cmd": f"show {clis_id}", "on_fail": {"action": "continue"}, "result": "success"}],
+            }
+
+        mocker.patch("pyfitel.fitel.exec_commands", side_effect=exec_commands)
+        mocker.patch("pyfitel.fitel.get_commands_result", side_effect=get_commands_result)
+        mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        res = api.commands_wait([f"show {i}" for i in range(25)])
+
+        assert events == [
+            ("exec", 1, 10),
+            ("exec", 2, 10),
+            ("get", 1),
+            ("exec", 3, 5),
+            ("get", 2),
+            ("get", 3),
+        ]
+        assert res["clis_id"] == [1, 2, 3]
+        assert res["status"] == "success"
+        assert res["total"] == 25
+        assert [item["cmd"] for item in res["list"]] == ["show 1", "show 2", "show 3"]
+
+    def test_chunked_exit_on_fail(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.time.sleep")
+        mock_exec = mocker.patch("pyfitel.fitel.exec_commands", return_value={"clis_id": 1})
+        mocker.patch(
+            "pyfitel.fitel.get_commands_result",
+            return_value={
+                "clis_id": 1,
+                "status": "failure",
+                "list": [{"cmd": "foo", "on_fail": {"action": "exit"}, "result": "failure"}],
+            },
+        )
+        mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        res = api.commands_wait([CLI("foo", on_fail_exit=True)] + ["show version"] * 15)
+
+        assert mock_exec.call_count == 1
+        assert res["status"] == "failure"
+
+    def test_chunked_timeout_deletes_pipelined(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.time.sleep")
+        mocker.patch("pyfitel.fitel.exec_commands", side_effect=[{"clis_id": 1}, {"clis_id": 2}])
+        mocker.patch("pyfitel.fitel.get_commands_result", return_value={"status": "Processing"})
+        mock_delete = mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        with pytest.raises(TimeoutError):
+            api.commands_wait([f"show {i}" for i in range(15)], retries=1)
+        # both the waited chunk and the one submitted ahead of it are deleted
+        assert [c.kwargs["clis_id"] for c in mock_delete.call_args_list] == [1, 2]
+
+    def test_chunked_timeout_keeps_jobs(self, mocker: MockFixture):
+        mocker.patch("pyfitel.fitel.time.sleep")
+        mocker.patch("pyfitel.fitel.exec_commands", side_effect=[{"clis_id": 1}, {"clis_id": 2}])
+        mocker.patch("pyfitel.fitel.get_commands_result", return_value={"status": "Processing"})
+        mock_delete = mocker.patch("pyfitel.fitel.delete_commands_result")
+
+        api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+        with pytest.raises(TimeoutError) as e:
+            api.commands_wait([f"show {i}" for i in range(15)], retries=1, delete=False)
+        assert mock_delete.call_count == 0
+        assert e.value.__notes__ == ["Jobs left on the device: clis_id=1, 2"]
+
+    def test_deadline_deletes_pipelined(self):
+        with FITELnetSimulator(processing_delay=10) as sim, sim.api() as api:
+            with pytest.raises(TimeoutError):
+                api.commands_wait([f"show {i}" for i in range(15)], poll=BackoffPoll(initial=0.01), deadline=0.2)
+            assert sim.requests["POST", "/api/v1/clis"] == 2
+            assert api.commands_list().get("data", []) == []
+
+    def test_submit_and_collect(self):
+        with FITELnetSimulator(outputs={"show version": "F70"}) as sim, sim.api() as api:
+            clis_id = api.commands_submit(["show version"])
+            assert clis_id in [str(item["clis_id"]) for item in api.commands_list()["data"]]
+            res = api.commands_wait_result(clis_id, ["show version"], delete=False)
+            assert res["list"][0]["contents"] == ["F70"]
+            assert api.commands_result(clis_id)["status"] == res["status"]
+            api.commands_delete(clis_id)
+            assert api.commands_list().get("data", []) == []
+
+
+def test_command_lines(mocker: MockFixture):
+    mock_exec = mocker.patch("pyfitel.fitel.exec_command_lines", return_value=iter(["line1", "line2"]))
+
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+    assert list(api.command_lines("show running-config")) == ["line1", "line2"]
+    assert mock_exec.call_args.kwargs["cmd"] == "show running-config"
+
+
+def test_commands_wait_deadline(mocker: MockFixture):
+    mocker.patch("pyfitel.fitel.exec_commands", return_value={"clis_id": 1})
+    mock_get = mocker.patch("pyfitel.fitel.get_commands_result", return_value={"status": "Processing"})
+    mocker.patch("pyfitel.fitel.delete_commands_result")
+
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False, timeout=(1.0, 5.0))
+    with pytest.raises(TimeoutError):
+        api.commands_wait(["show version"], poll=BackoffPoll(initial=0.01, timeout=60.0), deadline=0.05)
+    assert mock_get.call_count >= 1
+    assert mock_get.call_args.kwargs["timeout"] == (1.0, 5.0)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import requests
+from pytest_mock import MockFixture
+
+from pyfitel import FITELnetAPI, FITELnetAPIError, FITELnetFleet
+
+
+def make_devices(n: int) -> dict[str, FITELnetAPI]:
+    return {f"r{i}": FITELnetAPI(f"192.168.1.{i}", 50443, "user", "password", tls=False) for i in range(n)}
+
+
+def test_command(mocker: MockFixture):
+    def exec_command(url, cmd, **kwargs):
+        if url.startswith("http://192.168.1.1:"):
+            raise FITELnetAPIError("error", 500)
+        if url.startswith("http://192.168.1.2:"):
+            raise requests.ConnectionError("refused")
+        return f"{url} {cmd}"
+
+    mocker.patch("pyfitel.fitel.exec_command", side_effect=exec_command)
+
+    with FITELnetFleet(make_devices(4), max_workers=4) as fleet:
+        results = fleet.command("show version")
+
+    assert list(results) == ["r0", "r1", "r2", "r3"]
+    assert results["r0"].ok
+    assert results["r0"].value == "http://192.168.1.0:50443/ show version"
+    assert isinstance(results["r1"].error, FITELnetAPIError)
+    assert isinstance(results["r2"].error, requests.ConnectionError)
+    assert results["r3"].ok
+
+
+def test_timeout(mocker: MockFixture):
+    release = threading.Event()
+
+    def exec_command(url, cmd, **kwargs):
+        if url.startswith("http://192.168.1.0:"):
+            release.wait(5)
+        return "ok"
+
+    mocker.patch("pyfitel.fitel.exec_command", side_effect=exec_command)
+
+    fleet = FITELnetFleet(make_devices(2), max_workers=2, timeout=0.1)
+    results = fleet.command("show version")
+    release.set()
+
+    assert isinstance(results["r0"].error, TimeoutError)
+    assert results["r1"].value == "ok"
+
+
+def test_max_per_host(mocker: MockFixture):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def exec_command(url, cmd, **kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return "ok"
+
+    mocker.patch("pyfitel.fitel.exec_command", side_effect=exec_command)
+
+    devices = {f"r{i}": FITELnetAPI("192.168.1.1", 50443 + i, "user", "password", tls=False) for i in range(4)}
+    results = FITELnetFleet(devices, max_workers=4, max_per_host=1).command("show version")
+
+    assert all(r.ok for r in results.values())
+    assert peak == 1
+
+
+def test_timeout_releases_host_slot(mocker: MockFixture):
+    release = threading.Event()
+
+    def exec_command(url, cmd, **kwargs):
+        if url.endswith(":50443/"):
+            release.wait(5)
+        return "ok"
+
+    mocker.patch("pyfitel.fitel.exec_command", side_effect=exec_command)
+
+    devices = {f"r{i}": FITELnetAPI("192.168.1.1", 50443 + i, "user", "password", tls=False) for i in range(2)}
+    start = time.monotonic()
+    results = FITELnetFleet(devices, max_workers=2, max_per_host=1, timeout=0.2).command("show version")
+    elapsed = time.monotonic() - start
+    release.set()
+
+    assert isinstance(results["r0"].error, TimeoutError)
+    assert results["r1"].value == "ok"
+    assert elapsed < 2
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pyfitel
+
+# import pyfitel にかけてよい時間(マイクロ秒)。-X importtime の累積値で計測する
+IMPORT_BUDGET_US = 50_000
+
+HEAVY_MODULES = ["requests", "urllib3", "httpx", "numpy", "opentelemetry"]
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    return subprocess.run([sys.executable, *options, "-c", code], capture_output=True, text=True, check=True, env=env)
+
+
+def test_import_is_lazy():
+    code = "import json, sys, pyfitel; print(json.dumps(sorted(sys.modules)))"
+    modules = json.loads(run_python(code).stdout)
+    assert [name for name in modules if name.split(".")[0] in HEAVY_MODULES] == []
+    assert [name for name in modules if name.startswith("pyfitel.")] == []
+
+
+def test_import_time_budget():
+    stderr = run_python("import pyfitel", "-X", "importtime").stderr
+    (line,) = [line for line in stderr.splitlines() if line.rstrip().endswith("| pyfitel")]
+    cumulative = int(line.split("|")[1])
+    assert cumulative < IMPORT_BUDGET_US
+
+
+def test_lazy_attributes():
+    from pyfitel.fitel import FITELnetAPI
+
+    assert pyfitel.FITELnetAPI is FITELnetAPI
+    assert set(pyfitel.__all__) <= set(dir(pyfitel))
+    for name in pyfitel.__all__:
+        assert getattr(pyfitel, name) is not None
+    with pytest.raises(AttributeError):
+        _ = pyfitel.no_such_attribute
@@ -0,0 +1,87 @@
+import pytest
+
+from pyfitel import FixedPoll, JobManager
+from pyfitel.simulator import FITELnetSimulator
+
+
+def test_job_manager():
+    with FITELnetSimulator(processing_delay=0.05) as sim, sim.api() as api:
+        jobs = JobManager(api, poll=FixedPoll(wait=0.02, retries=20, interval=0.02))
+        ids = jobs.submit_many([["show version"], ["show ip route", "show arp"], ["show interface"]] * 4)
+        assert len(ids) == 12
+        assert jobs.pending == ids
+
+        results = jobs.wait()
+        assert list(results) == ids
+        assert all(result["status"] == "success" for result in results.values())
+        assert [item["cmd"] for item in results[ids[1]]["list"]] == ["show ip route", "show arp"]
+        assert jobs.pending == []
+
+        assert sim.requests["GET", "/api/v1/clis/{id}"] == 12
+        assert sim.requests["GET", "/api/v1/clis"] <= 6
+        assert sim.requests["DELETE", "/api/v1/clis"] == 1
+        assert sim.requests["DELETE", "/api/v1/clis/{id}"] == 0
+        assert list(sim._jobs) == []
+
+
+def test_job_manager_keeps_foreign_jobs():
+    with FITELnetSimulator() as sim, sim.api() as api:
+        foreign = JobManager(api).submit(["show version"])
+        jobs = JobManager(api, poll=FixedPoll(wait=0.01, retries=5, interval=0.01))
+        clis_id = jobs.submit(["show version"])
+        assert list(jobs.wait()) == [clis_id]
+
+        assert sim.requests["DELETE", "/api/v1/clis"] == 0
+        assert sim.requests["DELETE", "/api/v1/clis/{id}"] == 1
+        assert [str(job) for job in sim._jobs] == [foreign]
+
+
+def test_job_manager_foreign_job_before_bulk_delete(mocker):
+    with FITELnetSimulator() as sim, sim.api() as api, sim.api() as other:
+        jobs = JobManager(api, poll=FixedPoll(wait=0.01, retries=5, interval=0.01))
+        ids = jobs.submit_many([["show version"], ["show arp"]])
+        foreign: list[str] = []
+        commands_list = api.commands_list
+
+        def listing() -> dict:
+            # a foreign job arrives after the last harvest, right before cleanup re-lists
+            if not jobs.pending and not foreign:
+                foreign.append(other.commands_submit(["show version"]))
+            return commands_list()
+
+        mocker.patch.object(api, "commands_list", side_effect=listing)
+        assert list(jobs.wait()) == ids
+
+        assert sim.requests["DELETE", "/api/v1/clis"] == 0
+        assert sim.requests["DELETE", "/api/v1/clis/{id}"] == 2
+        assert [str(job) for job in sim._jobs] == foreign
+
+
+def test_job_manager_listing_without_status(mocker):
+    with FITELnetSimulator() as sim, sim.api() as api:
+        jobs = JobManager(api, poll=FixedPoll(wait=0.01, retries=5, interval=0.01))
+        ids = jobs.submit_many([["show version"], ["show arp"]])
+        commands_list = api.commands_list
+
+        def listing() -> dict:
+            data = commands_list()["data"]
+            return {"data": [{"clis_id": item["clis_id"]} for item in data if str(item["clis_id"]) != ids[1]]}
+
+        mocker.patch.object(api, "commands_list", side_effect=listing)
+        with pytest.raises(TimeoutError):
+            jobs.wait()
+        # ids[1] is missing from the listing, so its result is never fetched
+        assert jobs.pending == [ids[1]]
+        assert sim.requests["GET", "/api/v1/clis/{id}"] == 1
+        assert sim.requests["DELETE", "/api/v1/clis"] == 0
+        assert [str(job) for job in sim._jobs] == [ids[1]]
+
+
+def test_job_manager_timeout():
+    with FITELnetSimulator(processing_delay=10) as sim, sim.api() as api:
+        jobs = JobManager(api, poll=FixedPoll(wait=0.01, retries=2, interval=0.01))
+        clis_id = jobs.submit(["show version"])
+        with pytest.raises(TimeoutError):
+            jobs.wait()
+        assert jobs.pending == [clis_id]
+        assert sim.requests["GET", "/api/v1/clis/{id}"] == 0
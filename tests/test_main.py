@@ -0,0 +1,142 @@
+import io
+import json
+
+import pytest
+
+from pyfitel import FITELnetSimulator, load_inventory
+from pyfitel.__main__ import _output_files, main
+
+
+def test_load_inventory(tmp_path, monkeypatch):
+    monkeypatch.setenv("R2_PASSWORD", "secret")
+    csv_path = tmp_path / "inventory.csv"
+    csv_path.write_text(
+        "name,host,port,tls,user,password_env\nr1,192.168.1.1,50443,false,admin,\nr2,192.168.1.2,,true,,R2_PASSWORD\n"
+    )
+    devices = load_inventory(csv_path, user="default", password="default-password")
+    assert devices["r1"].port == 50443
+    assert not devices["r1"].tls
+    assert (devices["r1"].user, devices["r1"].password) == ("admin", "default-password")
+    assert (devices["r2"].port, devices["r2"].tls) == (443, True)
+    assert (devices["r2"].user, devices["r2"].password) == ("default", "secret")
+    assert devices["r2"].api().url == "https://192.168.1.2:443/"
+
+    json_path = tmp_path / "inventory.json"
+    json_path.write_text(json.dumps({"devices": [{"host": "10.0.0.1", "user": "u", "password": "p"}]}))
+    assert list(load_inventory(json_path)) == ["10.0.0.1"]
+
+    json_path.write_text(json.dumps([{"host": "10.0.0.1"}, {"host": "10.0.0.1"}]))
+    with pytest.raises(ValueError):
+        load_inventory(json_path, user="u", password="p")
+    with pytest.raises(ValueError):
+        load_inventory(json_path)
+
+
+def test_load_inventory_yaml(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "inventory.yaml"
+    path.write_text("devices:\n  - name: r1\n    host: 10.0.0.1\n    tls: yes\n    user: u\n    password: p\n")
+    assert load_inventory(path)["r1"].tls
+
+
+def test_load_inventory_invalid_yaml(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "inventory.yaml"
+    path.write_text("devices: [\n")
+    with pytest.raises(ValueError, match="invalid YAML"):
+        load_inventory(path)
+    path.write_text("just a string\n")
+    with pytest.raises(ValueError):
+        load_inventory(path)
+
+
+def test_output_files(tmp_path):
+    files = _output_files(tmp_path, ["a/b", "a_b", "A_B", "a_b-2"])
+    assert [path.name for path in files.values()] == ["a_b.json", "a_b-2.json", "A_B-3.json", "a_b-2-2.json"]
+
+
+def write_inventory(tmp_path, sims, extra=()) -> str:
+    entries = [
+        {"name": f"r{i}", "host": sim.host, "port": sim.port, "user": sim.user, "password_env": "PYFITEL_PASSWORD"}
+        for i, sim in enumerate(sims)
+    ]
+    path = tmp_path / "inventory.json"
+    path.write_text(json.dumps([*entries, *extra]))
+    return str(path)
+
+
+def test_main_command(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYFITEL_PASSWORD", "password")
+    with FITELnetSimulator(outputs={"show version": "F70"}) as sim1, FITELnetSimulator() as sim2:
+        inventory = write_inventory(tmp_path, [sim1, sim2])
+        out = io.StringIO()
+        assert main(["command", inventory, "show version", "-j", "2"], out=out) == 0
+
+    records = {record["device"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert set(records) == {"r0", "r1"}
+    assert records["r0"]["ok"]
+    assert records["r0"]["result"] == "F70"
+    assert records["r0"]["error"] is None
+
+
+def test_main_failure_and_output_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYFITEL_PASSWORD", "password")
+    config = tmp_path / "change.txt"
+    config.write_text("hostname router\n")
+    with FITELnetSimulator() as sim:
+        dead = {"name": "dead", "host": "127.0.0.1", "port": 9, "user": "u", "password": "p"}
+        inventory = write_inventory(tmp_path, [sim], extra=[dead])
+        out = io.StringIO()
+        code = main(
+            ["config", inventory, str(config), "--output-dir", str(tmp_path / "out"), "--timeout", "5"], out=out
+        )
+
+    assert code == 1
+    assert "hostname router" in sim.running_config
+    records = {record["device"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert records["r0"]["ok"]
+    assert not records["dead"]["ok"]
+    assert records["dead"]["error"].startswith("ConnectionError")
+    assert "result" not in records["r0"]
+    assert json.loads((tmp_path / "out" / "r0.json").read_text())["result"] is None
+
+
+def test_main_commands_wait(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYFITEL_PASSWORD", "password")
+    with FITELnetSimulator() as sim:
+        out = io.StringIO()
+        assert main(["commands-wait", write_inventory(tmp_path, [sim]), "show version", "show arp"], out=out) == 0
+    (record,) = map(json.loads, out.getvalue().splitlines())
+    assert [item["cmd"] for item in record["result"]["list"]] == ["show version", "show arp"]
+
+
+def test_main_commands_wait_poll_timeout(tmp_path, monkeypatch):
+    monkeypatch.setenv("PYFITEL_PASSWORD", "password")
+    with FITELnetSimulator(processing_delay=0.5) as sim:
+        inventory = write_inventory(tmp_path, [sim])
+        out = io.StringIO()
+        assert main(["commands-wait", inventory, "show version", "--poll-timeout", "0.1"], out=out) == 1
+        (record,) = map(json.loads, out.getvalue().splitlines())
+        assert record["error"].startswith("TimeoutError")
+
+        out = io.StringIO()
+        assert main(["commands-wait", inventory, "show version", "--poll-interval", "0.1"], out=out) == 0
+
+
+@pytest.mark.parametrize("option", ["--parallel", "--max-per-host", "--timeout"])
+def test_main_rejects_non_positive(tmp_path, option):
+    with pytest.raises(SystemExit) as e:
+        main(["command", str(tmp_path / "inventory.csv"), "show version", option, "0"])
+    assert e.value.code == 2
+
+
+def test_main_bad_inventory(tmp_path, capsys):
+    with pytest.raises(SystemExit) as e:
+        main(["command", str(tmp_path / "missing.csv"), "show version"])
+    assert e.value.code == 2
+
+    path = tmp_path / "inventory.json"
+    path.write_text("[{")
+    with pytest.raises(SystemExit) as e:
+        main(["command", str(path), "show version"])
+    assert e.value.code == 2
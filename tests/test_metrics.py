@@ -0,0 +1,163 @@
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import (
+    DeviceCounters,
+    FITELnetAPIError,
+    FITELnetSimulator,
+    LatencyHistogram,
+    OpenTelemetryExporter,
+    PollEvent,
+    RequestEvent,
+    RetryPolicy,
+    add_hook,
+    configure_retry,
+    remove_hook,
+)
+from pyfitel.core import get
+from pyfitel.metrics import endpoint_template
+
+from .common import MockReponse
+
+URL = "http://192.168.1.1:50443"
+
+
+@pytest.fixture
+def events():
+    received = []
+    hook = add_hook(received.append)
+    yield received
+    remove_hook(hook)
+
+
+def test_endpoint_template():
+    assert endpoint_template("/api/v1/clis/123") == "/api/v1/clis/{id}"
+    assert endpoint_template("api/v1/token/abc") == "/api/v1/token/{token}"
+    assert endpoint_template("/api/v1/cli") == "/api/v1/cli"
+
+
+def test_request_event(events):
+    with FITELnetSimulator(outputs={"show version": "F70"}) as sim, sim.api() as api:
+        api.command("show version")
+        api.config(iter(["interface Loopback 1", "description test"]), commit=False)
+
+    command, config = events
+    assert isinstance(command, RequestEvent)
+    assert command.device == sim.url.rstrip("/")
+    assert (command.method, command.endpoint, command.status) == ("POST", "/api/v1/cli", 201)
+    assert command.bytes_received == 3
+    assert command.bytes_sent is not None and command.bytes_sent > 0
+    assert command.retries == 0
+    assert command.error is None
+    assert command.response_time is not None and command.response_time <= command.elapsed
+    assert (config.method, config.endpoint) == ("PATCH", "/api/v1/config")
+    assert config.bytes_sent == len(b"interface Loopback 1\ndescription test")
+
+
+def test_request_event_retries_and_error(mocker: MockFixture, events):
+    mocker.patch("pyfitel.core.time.sleep")
+    mocker.patch(
+        "pyfitel.core.requests.Session.get",
+        side_effect=[MockReponse(status_code=503, text=""), MockReponse(status_code=500, text='{"error": "x"}')],
+    )
+    configure_retry(RetryPolicy(retries=1, jitter=0))
+    try:
+        with pytest.raises(FITELnetAPIError):
+            get(base_url=URL, endpoint="/api/v1/clis/7", auth={})
+    finally:
+        configure_retry(None)
+
+    (event,) = events
+    assert (event.endpoint, event.status, event.retries, event.error) == (
+        "/api/v1/clis/{id}",
+        500,
+        1,
+        "FITELnetAPIError",
+    )
+
+
+def test_poll_event(events):
+    with FITELnetSimulator(processing_delay=0.05) as sim, sim.api() as api:
+        api.commands_wait(["show version"], wait=0.01, retries=20, interval=0.02)
+
+    (poll,) = [event for event in events if isinstance(event, PollEvent)]
+    assert poll.status == "success"
+    assert poll.polls >= 2
+    assert [event.endpoint for event in events if isinstance(event, RequestEvent)].count("/api/v1/clis/{id}") == (
+        poll.polls + 1
+    )
+
+
+def test_hook_error_is_ignored(mocker: MockFixture):
+    mocker.patch("pyfitel.core.requests.Session.get", return_value=MockReponse(status_code=200, text="ok"))
+
+    def broken(event):
+        raise RuntimeError("broken")
+
+    add_hook(broken)
+    try:
+        assert get(base_url=URL, endpoint="api", auth={}).text == "ok"
+    finally:
+        remove_hook(broken)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram(buckets=[0.1, 1.0])
+    for seconds in [0.05, 0.05, 0.5, 2.0]:
+        histogram(RequestEvent(URL, "GET", "/api/v1/cli", 200, 0, 0, seconds, None, 0, None))
+
+    assert histogram.count() == 4
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(1.0) == float("inf")
+    assert histogram.quantile(0.5, "POST /api/v1/cli") is None
+    assert histogram.snapshot()["GET /api/v1/cli"]["buckets"] == {0.1: 2, 1.0: 3, float("inf"): 4}
+
+    with pytest.raises(ValueError):
+        LatencyHistogram(buckets=[1.0, 0.1])
+
+
+def test_device_counters():
+    counters = DeviceCounters()
+    counters(RequestEvent(URL, "GET", "/api/v1/cli", 200, 10, 100, 0.1, None, 2, None))
+    counters(RequestEvent(URL, "GET", "/api/v1/cli", None, None, None, 0.1, None, 0, "ConnectionError"))
+    counters(PollEvent(URL, "1", 3, 1.0, None))
+
+    assert counters.get(URL) == {
+        "requests": 2,
+        "retries": 2,
+        "bytes_sent": 10,
+        "bytes_received": 100,
+        "errors": 1,
+        "jobs": 1,
+        "polls": 3,
+        "timeouts": 1,
+    }
+    assert counters.get("http://unknown") == {}
+
+
+def test_opentelemetry_exporter():
+    sdk_metrics = pytest.importorskip("opentelemetry.sdk.metrics")
+    from opentelemetry.sdk.metrics.export import HistogramDataPoint, InMemoryMetricReader, NumberDataPoint
+
+    reader = InMemoryMetricReader()
+    exporter = OpenTelemetryExporter(meter_provider=sdk_metrics.MeterProvider(metric_readers=[reader]))
+    exporter(RequestEvent(URL, "GET", "/api/v1/cli", 200, 10, 100, 0.1, 0.05, 1, None))
+    exporter(PollEvent(URL, "1", 3, 1.0, "success"))
+
+    data = reader.get_metrics_data()
+    assert data is not None
+    points = {
+        metric.name: metric.data.data_points[0]
+        for resource in data.resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+    }
+    duration, retries, polls = (
+        points["pyfitel.request.duration"],
+        points["pyfitel.request.retries"],
+        points["pyfitel.clis.polls"],
+    )
+    assert duration.attributes is not None and duration.attributes["url.template"] == "/api/v1/cli"
+    assert isinstance(retries, NumberDataPoint) and retries.value == 1
+    assert isinstance(polls, HistogramDataPoint) and polls.sum == 3
@@ -0,0 +1,89 @@
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import FITELnetAPI, ParserRegistry, Route, parse_output
+from pyfitel.parsers import ArpEntry, InterfaceStatus, NeighborEntry, parse_interface
+
+ROUTE_OUTPUT = """Codes: K - kernel route, C - connected, S - static, R - RIP,
+       O - OSPF, B - BGP, > - selected route, * - FIB route
+
+S > * 0.0.0.0/0 [1/0] via 192.168.10.1, port-channel0
+O>* 10.0.0.0/24 [110/20] via 192.168.10.2, port-channel0, 00:01:02
+  *                      via 192.168.10.3, port-channel1, 00:01:02
+C > * 192.168.10.0/24 is directly connected, port-channel0
+"""
+
+ARP_OUTPUT = """Address          HWaddress          Interface
+192.168.10.1     00:11:22:AA:BB:CC  port-channel0
+192.168.10.2     0011.22aa.bbcd     port-channel1
+Total 2 entries
+"""
+
+NEIGHBOR_OUTPUT = """IPv6 Address                    Age  Link-layer Addr  State  Interface
+2001:db8::1                       0  0011.22aa.bbcc  REACH  port-channel0
+fe80::211:22ff:feaa:bbcd%port-channel1  12  00:11:22:AA:BB:CD  STALE  port-channel1
+Total 2 entries
+"""
+
+INTERFACE_OUTPUT = """port-channel0 is up, line protocol is up
+  Hardware is Ethernet, address is 0011.22aa.bbcc
+  Internet address is 192.168.10.254/24
+  MTU 1500 bytes
+     1234 packets input, 567890 bytes
+     4321 packets output, 98765 bytes
+Loopback1 is up
+  Internet address is 10.255.0.1/32
+"""
+
+
+def test_parse_route():
+    routes = parse_output("show ip route", ROUTE_OUTPUT)
+    assert routes == [
+        Route("S", "0.0.0.0/0", "192.168.10.1", "port-channel0", 1, 0, True, True),
+        Route("O", "10.0.0.0/24", "192.168.10.2", "port-channel0", 110, 20, True, True),
+        Route("O", "10.0.0.0/24", "192.168.10.3", "port-channel1", 110, 20, False, True),
+        Route("C", "192.168.10.0/24", None, "port-channel0", None, None, True, True),
+    ]
+
+
+def test_parse_arp():
+    assert parse_output("show arp", ARP_OUTPUT) == [
+        ArpEntry("192.168.10.1", "00:11:22:aa:bb:cc", "port-channel0"),
+        ArpEntry("192.168.10.2", "0011.22aa.bbcd", "port-channel1"),
+    ]
+
+
+def test_parse_neighbors():
+    assert parse_output("show ipv6 neighbors", NEIGHBOR_OUTPUT) == [
+        NeighborEntry("2001:db8::1", "0011.22aa.bbcc", "REACH", "port-channel0"),
+        NeighborEntry("fe80::211:22ff:feaa:bbcd", "00:11:22:aa:bb:cd", "STALE", "port-channel1"),
+    ]
+
+
+def test_parse_interface():
+    interfaces = parse_interface(INTERFACE_OUTPUT.splitlines())
+    assert interfaces == [
+        InterfaceStatus("port-channel0", "up", "up", "192.168.10.254/24", 1500, 1234, 567890, 4321, 98765),
+        InterfaceStatus("Loopback1", "up", None, "10.255.0.1/32", None, None, None, None, None),
+    ]
+
+
+def test_registry():
+    registry = ParserRegistry()
+    registry.register("show foo", lambda lines: [line.upper() for line in lines])
+    registry.register("show foo bar", lambda lines: ["bar"])
+
+    assert registry.parse("show  foo", "a\nb") == ["A", "B"]
+    assert registry.parse("show foo bar | search grep x", "a") == ["bar"]
+    assert registry.get("show foobar") is None
+    with pytest.raises(KeyError):
+        registry.parse("show baz", "")
+
+
+def test_command_parsed(mocker: MockFixture):
+    mocker.patch("pyfitel.fitel.exec_command_lines", return_value=iter(ROUTE_OUTPUT.splitlines()))
+
+    api = FITELnetAPI("192.168.1.1", 50443, "user", "password", tls=False)
+    routes = api.command_parsed("show ip route")
+    assert len(routes) == 4
+    assert routes[0].prefix == "0.0.0.0/0"
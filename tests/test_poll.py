@@ -0,0 +1,42 @@
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import BackoffPoll, FixedPoll, PollPolicy
+
+
+def test_fixed_poll():
+    assert list(FixedPoll(wait=0.5, retries=2, interval=1.0).delays(["show version"])) == [0.5, 1.0, 1.0]
+    assert list(FixedPoll(retries=0).delays(["show version"])) == [0.5]
+    with pytest.raises(ValueError):
+        FixedPoll(retries=-1)
+
+
+def test_backoff_poll(mocker: MockFixture):
+    mocker.patch("pyfitel.poll.time.monotonic", return_value=0.0)
+    poll = BackoffPoll(initial=0.05, factor=2.0, max_interval=0.3, jitter=0)
+    delays = poll.delays(["show version"])
+    assert [next(delays) for _ in range(5)] == pytest.approx([0.05, 0.1, 0.2, 0.3, 0.3])
+
+
+def test_backoff_poll_deadline(mocker: MockFixture):
+    monotonic = mocker.patch("pyfitel.poll.time.monotonic", return_value=0.0)
+    delays = BackoffPoll(initial=1.0, jitter=0, timeout=2.5).delays(["show version"])
+    assert next(delays) == 1.0
+    monotonic.return_value = 2.0
+    assert next(delays) == 0.5
+    monotonic.return_value = 2.5
+    assert list(delays) == []
+
+
+def test_backoff_poll_hints(mocker: MockFixture):
+    mocker.patch("pyfitel.poll.time.monotonic", return_value=0.0)
+    poll = BackoffPoll(jitter=0, hints={"save": 1.5, "show tech": 5.0})
+    assert next(poll.delays(["show version", "save"])) == 1.5
+    assert next(poll.delays(["show version"])) == 0.05
+    with pytest.raises(ValueError):
+        BackoffPoll(initial=0)
+
+
+def test_poll_policy_is_abstract():
+    with pytest.raises(TypeError):
+        PollPolicy()  # type: ignore[abstract]
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from pytest_mock import MockFixture
+
+from pyfitel import RateLimiter, TokenBucket, configure_rate_limit, deadline_scope, subnet_group
+from pyfitel.core import get
+
+from .common import MockReponse
+
+URL = "http://192.168.1.1:50443"
+
+
+@pytest.fixture(autouse=True)
+def restore_rate_limit():
+    yield
+    configure_rate_limit(None)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket._updated
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == 0.0
+    assert bucket.reserve(now) == pytest.approx(0.1)
+    assert bucket.reserve(now) == pytest.approx(0.2)
+    assert bucket.reserve(now + 1.0) == 0.0
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0.5)
+
+
+def test_subnet_group():
+    group_by = subnet_group(prefixlen=24)
+    assert group_by("http://192.168.1.1:50443") == "192.168.1.0/24"
+    assert group_by("https://[2001:db8::1]:443") == "2001:db8::/64"
+    assert group_by("http://router.example.com") is None
+
+
+def test_rate_limiter(mocker: MockFixture):
+    mocker.patch("pyfitel.ratelimit.time.monotonic", return_value=100.0)
+    limiter = RateLimiter(device_rate=10, device_burst=1, group_rate=5, group_burst=3, global_rate=100)
+
+    assert limiter.reserve("http://192.168.1.1:80") == 0.0
+    assert limiter.reserve("http://192.168.1.1:80") == pytest.approx(0.1)
+    assert limiter.reserve("http://192.168.1.2:80") == 0.0
+    # the /24 group has used its burst of 3
+    assert limiter.reserve("http://192.168.1.3:80") == pytest.approx(0.2)
+    assert limiter.reserve("http://10.0.0.1:80") == 0.0
+
+    limiter.cancel("http://192.168.1.3:80")
+    assert limiter.reserve("http://192.168.1.4:80") == pytest.approx(0.2)
+
+
+def test_rate_limiter_threads():
+    limiter = RateLimiter(global_rate=1000, global_burst=1)
+    delays = []
+
+    def worker():
+        for _ in range(50):
+            delays.append(limiter.reserve(URL))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(delays) == pytest.approx(0.199, abs=0.01)
+
+
+def test_request_throttled(mocker: MockFixture):
+    mocker.patch("pyfitel.ratelimit.time.monotonic", return_value=100.0)
+    mock_sleep = mocker.patch("pyfitel.core.time.sleep")
+    mock_api = mocker.patch("pyfitel.core.requests.Session.get", return_value=MockReponse(status_code=200, text=""))
+    configure_rate_limit(RateLimiter(device_rate=4, device_burst=1))
+
+    for _ in range(3):
+        get(base_url=URL, endpoint="api", auth={})
+    assert mock_api.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.25, 0.5]
+
+
+def test_request_throttled_deadline(mocker: MockFixture):
+    mocker.patch("pyfitel.core.time.sleep")
+    mock_api = mocker.patch("pyfitel.core.requests.Session.get", return_value=MockReponse(status_code=200, text=""))
+    limiter = RateLimiter(device_rate=1, device_burst=1)
+    configure_rate_limit(limiter)
+
+    get(base_url=URL, endpoint="api", auth={})
+    with deadline_scope(0.5), pytest.raises(TimeoutError):
+        get(base_url=URL, endpoint="api", auth={})
+    assert mock_api.call_count == 1
+    assert limiter.reserve(URL) == pytest.approx(1.0, abs=0.05)
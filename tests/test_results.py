@@ -0,0 +1,112 @@
+import copy
+import json
+import pickle
+import tracemalloc
+
+import pytest
+
+from pyfitel import CLI, CommandResult, CommandsResult
+from pyfitel.fitel import to_cli_dicts
+from pyfitel.simulator import FITELnetSimulator
+
+
+def test_cli():
+    cli = CLI("show version", on_fail_exit=True)
+    assert cli.cmd == "show version"
+    assert cli.on_fail_exit
+    assert cli.to_dict() == {"cmd": "show version", "on_fail": {"action": "exit"}}
+    assert cli == CLI("show version", on_fail_exit=True)
+    assert len({cli, CLI("show version", on_fail_exit=True), CLI("show version")}) == 2
+    with pytest.raises(AttributeError):
+        cli.cmd = "show arp"  # type: ignore[misc]
+    with pytest.raises(AttributeError):
+        cli.extra = 1
+
+
+def test_cli_copy_and_pickle():
+    cli = CLI("show version", on_fail_exit=True)
+    assert copy.copy(cli) == cli
+    assert copy.deepcopy(cli) == cli
+    assert pickle.loads(pickle.dumps(cli)) == cli
+
+
+def test_cli_dicts():
+    cli = CLI("show version")
+    cli.to_dict()["on_fail"]["action"] = "exit"
+    assert cli.to_dict() == {"cmd": "show version", "on_fail": {"action": "continue"}}
+    assert to_cli_dicts(["show arp"]) == [{"cmd": "show arp", "on_fail": {"action": "continue"}}]
+    assert to_cli_dicts(["show arp"])[0] is to_cli_dicts(["show arp"])[0]
+
+
+def test_commands_result():
+    item = {
+        "cmd": "show version",
+        "on_fail": {"action": "exit"},
+        "result": "success",
+        "message": "ok",
+        "contents": ["F70", "Version 01.16(01)"],
+    }
+    res = CommandsResult.from_dict({"clis_id": "1", "status": "success", "list": [item], "total": 1})
+    (command,) = res
+    assert isinstance(command, CommandResult)
+    assert command.raw == b"F70\nVersion 01.16(01)"
+    assert command.output == "F70\nVersion 01.16(01)"
+    assert command.lines == ["F70", "Version 01.16(01)"]
+    assert command.ok
+    assert command["contents"] == item["contents"]
+    assert command.get("unknown") is None
+    assert res["status"] == "success"
+    assert res["list"][0]["cmd"] == "show version"
+    assert res.to_dict() == {"clis_id": "1", "status": "success", "list": [item], "total": 1}
+    assert CommandsResult.from_dict(res.to_dict()) == res
+    with pytest.raises(KeyError):
+        res["unknown"]
+
+
+def test_command_result_empty_output():
+    for contents in ([], [""], ["", ""]):
+        item = {
+            "cmd": "show",
+            "on_fail": {"action": "continue"},
+            "result": "success",
+            "message": "",
+            "contents": contents,
+        }
+        assert CommandResult.from_dict(item).to_dict() == item
+    assert CommandResult.from_dict({"cmd": "show", "contents": None}).lines == []
+
+
+def test_commands_wait_compact():
+    with FITELnetSimulator(outputs={"show version": "F70\nVersion 01.16(01)"}) as sim, sim.api() as api:
+        res = api.commands_wait_compact(["show version"] * 12, wait=0.01, interval=0.01, retries=20)
+    assert isinstance(res, CommandsResult)
+    assert res.ok
+    assert res.total == 12
+    assert len(res["clis_id"]) == 2
+    assert all(command.lines == ["F70", "Version 01.16(01)"] for command in res)
+
+
+def test_compact_memory():
+    contents = [f"10.0.{i // 256}.{i % 256}/32 via 192.168.0.1, lan1" for i in range(1000)]
+    res = {
+        "clis_id": "1",
+        "status": "success",
+        "list": [
+            {"cmd": "show ip route", "on_fail": {"action": "continue"}, "result": "success", "contents": contents}
+        ],
+    }
+
+    def allocated(build) -> int:
+        tracemalloc.start()
+        try:
+            value = build()
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        del value
+        return size
+
+    text = json.dumps(res)
+    compact = allocated(lambda: [CommandsResult.from_dict(json.loads(text)) for _ in range(10)])
+    parsed = allocated(lambda: [json.loads(text) for _ in range(10)])
+    assert compact < parsed / 2
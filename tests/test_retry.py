@@ -0,0 +1,146 @@
+import pytest
+import requests
+from pytest_mock import MockFixture
+
+from pyfitel import CircuitBreaker, CircuitOpenError, FITELnetAPIError, RetryPolicy, configure_retry
+from pyfitel.core import RequestRetry, get, post, put
+from pyfitel.retry import parse_retry_after
+
+from .common import MockReponse
+
+URL = "http://192.168.1.1:50443"
+
+
+@pytest.fixture(autouse=True)
+def restore_retry():
+    yield
+    configure_retry(None)
+
+
+def test_no_retry_by_default(mocker: MockFixture):
+    mock_api = mocker.patch("pyfitel.core.requests.Session.put", return_value=MockReponse(status_code=503, text=""))
+    with pytest.raises(FITELnetAPIError):
+        put(base_url=URL, endpoint="api", auth={}, data=b"config")
+    assert mock_api.call_count == 1
+
+
+def test_retry_policy():
+    policy = RetryPolicy(retries=2, backoff=1.0, factor=2.0, max_backoff=3.0, jitter=0)
+    assert policy.can_retry("GET", 0)
+    assert policy.can_retry("get", 1)
+    assert not policy.can_retry("GET", 2)
+    assert not policy.can_retry("POST", 0)
+    assert [policy.delay(i) for i in range(3)] == [1.0, 2.0, 3.0]
+    assert policy.delay(0, retry_after="5") == 5.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) == 0.0
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("foo") == 0.0
+
+
+def test_retry_status(mocker: MockFixture):
+    mock_sleep = mocker.patch("pyfitel.core.time.sleep")
+    mock_api = mocker.patch(
+        "pyfitel.core.requests.Session.get",
+        side_effect=[MockReponse(status_code=503, text=""), MockReponse(status_code=200, text="ok")],
+    )
+    configure_retry(RetryPolicy(retries=2, backoff=0.1, jitter=0))
+
+    assert get(base_url=URL, endpoint="api", auth={}).text == "ok"
+    assert mock_api.call_count == 2
+    mock_sleep.assert_called_once_with(0.1)
+
+
+def test_retry_connection_error(mocker: MockFixture):
+    mocker.patch("pyfitel.core.time.sleep")
+    mock_api = mocker.patch("pyfitel.core.requests.Session.get", side_effect=requests.ConnectionError("reset"))
+    configure_retry(RetryPolicy(retries=2))
+
+    with pytest.raises(requests.ConnectionError):
+        get(base_url=URL, endpoint="api", auth={})
+    assert mock_api.call_count == 3
+
+
+def test_no_retry_unsafe(mocker: MockFixture):
+    mocker.patch("pyfitel.core.time.sleep")
+    mock_post = mocker.patch(
+        "pyfitel.core.requests.Session.post", return_value=MockReponse(status_code=503, text='{"error": "busy"}')
+    )
+    mock_put = mocker.patch("pyfitel.core.requests.Session.put", return_value=MockReponse(status_code=503, text=""))
+    configure_retry(RetryPolicy(retries=2))
+
+    with pytest.raises(FITELnetAPIError):
+        post(base_url=URL, endpoint="api", auth={}, data={"cmd": "show version"})
+    assert mock_post.call_count == 1
+
+    with pytest.raises(FITELnetAPIError):
+        put(base_url=URL, endpoint="api", auth={}, data=iter([b"config"]))
+    assert mock_put.call_count == 1
+
+    with pytest.raises(FITELnetAPIError):
+        put(URL, "api", {}, iter([b"config"]))
+    assert mock_put.call_count == 2
+
+
+def test_circuit_breaker(mocker: MockFixture):
+    monotonic = mocker.patch("pyfitel.retry.time.monotonic", return_value=0.0)
+    mock_api = mocker.patch("pyfitel.core.requests.Session.get", side_effect=requests.ConnectTimeout("timeout"))
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    configure_retry(None, circuit_breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(requests.ConnectTimeout):
+            get(base_url=URL, endpoint="api", auth={})
+    with pytest.raises(CircuitOpenError):
+        get(base_url=URL, endpoint="api", auth={})
+    assert mock_api.call_count == 2
+
+    monotonic.return_value = 10.0
+    mock_api.side_effect = None
+    mock_api.return_value = MockReponse(status_code=200, text="ok")
+    assert get(base_url=URL, endpoint="api", auth={}).text == "ok"
+    assert not breaker.is_open("http://192.168.1.1:50443")
+
+
+def test_circuit_breaker_half_open(mocker: MockFixture):
+    monotonic = mocker.patch("pyfitel.retry.time.monotonic", return_value=0.0)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    breaker.record_failure(URL)
+    assert breaker.is_open(URL)
+
+    monotonic.return_value = 10.0
+    assert not breaker.is_open(URL)
+    assert breaker.check(URL)
+    with pytest.raises(CircuitOpenError):
+        breaker.check(URL)
+    assert breaker.is_open(URL)
+
+    breaker.record_failure(URL)
+    with pytest.raises(CircuitOpenError):
+        breaker.check(URL)
+
+    monotonic.return_value = 20.0
+    assert breaker.check(URL)
+    breaker.cancel(URL)
+    assert breaker.check(URL)
+    breaker.record_success(URL)
+    assert not breaker.check(URL)
+    assert not breaker.check(URL)
+
+
+def test_request_retry(mocker: MockFixture):
+    mocker.patch("pyfitel.retry.random.uniform", return_value=1.0)
+    configure_retry(RetryPolicy(retries=1, backoff=0.5), circuit_breaker=CircuitBreaker(failure_threshold=1))
+    retry = RequestRetry(URL, "GET", replayable=True)
+    retry.begin()
+    assert retry.retry_on_response(503, "2") == 2.0
+    assert retry.retry_on_response(503) is None
+    assert retry.retries == 1
+    with pytest.raises(CircuitOpenError):
+        RequestRetry(URL, "GET", replayable=True).begin()
+
+    assert RequestRetry("http://192.168.1.2:50443", "POST", replayable=True).retry_on_error() is None
+    assert RequestRetry("http://192.168.1.3:50443", "GET", replayable=False).retry_on_response(503) is None
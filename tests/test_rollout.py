@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import cast
+
+from pyfitel import ConfigRollout, FITELnetAPI, FITELnetSimulator, HealthCheckError, RolloutAbortedError
+
+CONFIG = "interface Loopback 1\n description rollout\n exit\n"
+
+
+def make_simulators(count: int) -> list[FITELnetSimulator]:
+    return [FITELnetSimulator(running_config="hostname router\n").start() for _ in range(count)]
+
+
+def test_rollout():
+    sims = make_simulators(5)
+    try:
+        rollout = ConfigRollout({f"r{i}": sim.api() for i, sim in enumerate(sims)}, wave_size=2, max_workers=2)
+        assert rollout.waves() == [["r0", "r1"], ["r2", "r3"], ["r4"]]
+        result = rollout.run(CONFIG)
+    finally:
+        for sim in sims:
+            sim.stop()
+
+    assert result.ok
+    assert not result.aborted
+    assert result.completed == 3
+    assert list(result.results) == ["r0", "r1", "r2", "r3", "r4"]
+    for sim in sims:
+        assert "description rollout" in sim.running_config
+        assert sim.candidate_config is None
+
+
+def test_rollout_health_check_aborts():
+    sims = make_simulators(4)
+    try:
+        devices = {f"r{i}": sim.api() for i, sim in enumerate(sims)}
+        rollout = ConfigRollout(devices, wave_size=2, health_check=lambda api: api is not devices["r1"])
+        result = rollout.run(CONFIG)
+    finally:
+        for sim in sims:
+            sim.stop()
+
+    assert result.aborted
+    assert result.completed == 1
+    assert result.failed == ["r1", "r2", "r3"]
+    assert result.results["r0"].ok
+    assert isinstance(result.results["r1"].error, HealthCheckError)
+    assert isinstance(result.results["r2"].error, RolloutAbortedError)
+    assert sims[2].requests["PATCH", "/api/v1/config"] == 0
+
+
+def test_rollout_max_failures():
+    sims = make_simulators(2)
+    try:
+        devices = {f"r{i}": sim.api() for i, sim in enumerate(sims)}
+        sims[0].error_rate = 1.0
+        result = ConfigRollout(devices, wave_size=1, max_failures=1).run(CONFIG)
+    finally:
+        for sim in sims:
+            sim.stop()
+
+    assert not result.aborted
+    assert result.failed == ["r0"]
+    assert "description rollout" in sims[1].running_config
+
+
+class SlowAPI:
+    def __init__(self, name: str, events: list, lock: threading.Lock) -> None:
+        self.host = name
+        self._events = events
+        self._lock = lock
+
+    def _record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._events.append((self.host, stage, "start"))
+        time.sleep(seconds)
+        with self._lock:
+            self._events.append((self.host, stage, "end"))
+
+    def config(self, config, commit=True) -> None:
+        self._record("upload", 0.02)
+
+    def commit(self) -> str:
+        self._record("commit", 0.1)
+        return ""
+
+
+def test_rollout_pipelines_upload_and_commit():
+    events: list = []
+    lock = threading.Lock()
+    # ConfigRollout only calls config() and commit(), so a stand-in with those two is enough
+    devices = {name: cast(FITELnetAPI, SlowAPI(name, events, lock)) for name in ["a", "b", "c"]}
+    result = ConfigRollout(devices, wave_size=3, max_workers=1).run(CONFIG)
+
+    assert result.ok
+    # with one worker per stage, b is uploaded while a is committing
+    assert events.index(("b", "upload", "end")) < events.index(("a", "commit", "end"))
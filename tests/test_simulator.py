@@ -0,0 +1,49 @@
+import pytest
+
+from pyfitel import FITELnetAPIError, FITELnetSimulator, exec_command
+
+
+@pytest.fixture
+def simulator():
+    with FITELnetSimulator(outputs={"show version": "F70 Version 01.16(01)\n"}) as sim:
+        yield sim
+
+
+def test_command(simulator: FITELnetSimulator):
+    with simulator.api() as api:
+        assert api.command("show version") == "F70 Version 01.16(01)\n"
+        assert list(api.command_lines("show version")) == ["F70 Version 01.16(01)"]
+    assert simulator.requests[("POST", "/api/v1/cli")] == 2
+
+
+def test_unauthorized(simulator: FITELnetSimulator):
+    with pytest.raises(FITELnetAPIError) as e:
+        exec_command(url=simulator.url, cmd="show version", user="user", password="wrong")
+    assert e.value.http_code == 401
+
+
+def test_commands_wait(simulator: FITELnetSimulator):
+    simulator.processing_delay = 0.05
+    with simulator.api() as api:
+        res = api.commands_wait(["show version", "show ip route"], wait=0.01, interval=0.02, retries=20)
+    assert res["status"] == "success"
+    assert res["list"][0]["contents"] == ["F70 Version 01.16(01)"]
+    assert simulator.requests[("GET", "/api/v1/clis/{id}")] >= 2
+    assert simulator.requests[("DELETE", "/api/v1/clis/{id}")] == 1
+
+
+def test_config_and_token(simulator: FITELnetSimulator, tmp_path):
+    path = tmp_path / "config.txt"
+    path.write_text("interface Loopback 1\n description foo\n")
+    with simulator.api(use_token=True) as api:
+        api.config(path)
+        assert api.command("show running-config") == "interface Loopback 1\n description foo\n"
+    assert simulator.requests[("POST", "/api/v1/token")] == 1
+    assert simulator.requests[("DELETE", "/api/v1/token/{token}")] == 1
+
+
+def test_error_rate():
+    with FITELnetSimulator(error_rate=1.0) as sim, sim.api() as api:
+        with pytest.raises(FITELnetAPIError) as e:
+            api.command("show version")
+        assert e.value.http_code == 503
@@ -0,0 +1,69 @@
+import gzip
+
+from pyfitel import FITELnetSimulator, SnapshotStore, update_config
+
+CONFIG = "hostname router1\ninterface Loopback 1\n ip address 10.0.0.1 255.255.255.255\n exit\n"
+URL = "http://192.168.1.1:50443/"
+
+
+def test_put_and_load(tmp_path):
+    store = SnapshotStore(tmp_path)
+    assert store.get(URL) is None
+    assert store.load(URL) is None
+
+    assert store.put(URL, CONFIG)
+    snapshot = store.get(URL)
+    assert snapshot is not None
+    assert snapshot.device == "http://192.168.1.1:50443"
+    assert snapshot.valid
+    assert store.load(URL) == CONFIG
+    (data,) = tmp_path.glob("*.gz")
+    assert gzip.decompress(data.read_bytes()).decode() == CONFIG
+
+    assert not store.put(URL, CONFIG)
+    assert store.put(URL, CONFIG.replace("router1", "router2"))
+    reloaded, current = SnapshotStore(tmp_path).get(URL), store.get(URL)
+    assert reloaded is not None and current is not None
+    assert reloaded.digest == current.digest
+
+
+def test_diff(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.put(URL, CONFIG)
+    assert store.diff(URL, CONFIG) == ""
+    diff = store.diff(URL, CONFIG.replace("router1", "router2"))
+    assert "-hostname router1\n" in diff
+    assert "+hostname router2\n" in diff
+
+
+def test_invalidate(mocker, tmp_path):
+    mocker.patch("pyfitel.config.put")
+    mocker.patch("pyfitel.config.patch")
+    store = SnapshotStore(tmp_path)
+    store.put(URL, CONFIG)
+
+    update_config(url=URL, config=CONFIG, user="user", password="password")
+    snapshot = store.get(URL)
+    assert snapshot is not None and not snapshot.valid
+    assert store.load(URL) == CONFIG
+
+
+def test_fetch(tmp_path):
+    store = SnapshotStore(tmp_path)
+    with FITELnetSimulator(running_config=CONFIG) as sim, sim.api() as api:
+        first = store.fetch(api)
+        assert first.changed
+        assert store.load(api.url) == CONFIG
+
+        assert not store.fetch(api).changed
+        assert sim.requests["POST", "/api/v1/cli"] == 2
+
+        assert not store.fetch(api, max_age=60).changed
+        assert sim.requests["POST", "/api/v1/cli"] == 2
+
+        api.config("hostname router2", commit=False)
+        snapshot = store.get(api.url)
+        assert snapshot is not None and not snapshot.valid
+        result = store.fetch(api, max_age=60)
+        assert result.snapshot.valid
+        assert sim.requests["POST", "/api/v1/cli"] == 3